@@ -10,71 +10,147 @@ _scripts_python_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), '
 if _scripts_python_dir not in sys.path:
     sys.path.insert(0, _scripts_python_dir)
 
-from PySide6.QtCore import Qt
-from PySide6.QtWidgets import QApplication
+# 守护进程客户端只依赖标准库：请求能转发给 --daemon 时无需导入工具箱的其余模块
+from toolbox.daemon_client import forward_to_daemon
 
-from toolbox import (
-    is_admin,
-    run_as_admin,
-    log_error,
-    cleanup_tmp_dir,
-    parse_arguments,
-    list_scripts,
-    run_script_headless,
-    Window,
-)
 
-
-def main():
-    """主入口函数"""
-    try:
-        # Handle Ctrl+C gracefully
-        signal.signal(signal.SIGINT, signal.SIG_DFL)
+def run(args):
+    """按命令行参数执行对应功能，默认启动 GUI"""
+    from toolbox import (
+        is_admin,
+        run_as_admin,
+        log_error,
+        list_scripts,
+        run_scripts_batch,
+        split_script_names,
+        read_manifest,
+        cache_fetch,
+        download_file,
+        release_info,
+        show_stats,
+        run_daemon,
+    )
+    
+    # 处理 --daemon 参数 (常驻进程，持有脚本索引和调度器)
+    if args.daemon:
+        if not args.no_admin and not is_admin():
+            print("[INFO] 正在请求管理员权限...")
+            run_as_admin()
+            sys.exit(0)
+        sys.exit(run_daemon(max_parallel=args.max_parallel))
+    
+    # --status / --logs / --cancel / --stop-daemon 只能由守护进程处理 (守护进程在运行时已在 main() 中转发)
+    if args.status is not None or args.logs or args.cancel or args.stop_daemon:
+        print("[ERROR] 守护进程未运行，请先使用 --daemon 启动", file=sys.stderr)
+        sys.exit(1)
+    
+    # 处理 --list 参数
+    if args.list:
+        sys.exit(list_scripts(
+            scan_workers=args.scan_workers,
+            fmt=args.format,
+            filter_text=args.filter,
+            grep=args.grep
+        ))
+    
+    # 处理 --stats 参数 (汇总运行耗时)
+    if args.stats:
+        sys.exit(show_stats(fmt=args.format, filter_text=args.filter))
+    
+    # 处理 --cache-fetch 参数 (供脚本通过下载缓存获取文件，无需提权)
+    if args.cache_fetch:
+        sys.exit(cache_fetch(args.cache_fetch, args.output, args.sha256, args.connections))
+    
+    # 处理 --download 参数 (多连接分块下载，无需提权)
+    if args.download:
+        sys.exit(download_file(*args.download, connections=args.connections))
+    
+    # 处理 --release 参数 (供脚本查询 GitHub Release，无需提权)
+    if args.release:
+        sys.exit(release_info(args.release, args.asset, args.offline))
+    
+    # 处理 --run / --manifest 参数 (无头模式)
+    if args.run or args.manifest:
+        names = split_script_names(args.run)
+        if args.manifest:
+            names += read_manifest(args.manifest)
         
-        # 解析命令行参数
-        args = parse_arguments()
+        # --plan 只打印执行计划，无需提权
+        if args.plan:
+            sys.exit(run_scripts_batch(names, dry_run=True))
         
-        # 处理 --list 参数
-        if args.list:
-            list_scripts()
+        if not args.no_admin and not is_admin():
+            print("[INFO] 正在请求管理员权限...")
+            # 重新以管理员身份运行
+            run_as_admin()
             sys.exit(0)
         
-        # 处理 --run 参数 (无头模式)
-        if args.run:
-            if not args.no_admin and not is_admin():
-                print("[INFO] 正在请求管理员权限...")
-                # 重新以管理员身份运行
-                run_as_admin()
-                sys.exit(0)
-            
-            exit_code = run_script_headless(
-                args.run,
-                headless=args.headless,
-                silent=args.silent,
-                force=args.force,
-                no_admin=True  # 已经提权或跳过
-            )
+        exit_code = run_scripts_batch(
+            names,
+            jobs=args.jobs,
+            headless=args.headless,
+            silent=args.silent,
+            force=args.force,
+            no_admin=True,  # 已经提权或跳过
+            fail_fast=args.fail_fast,
+            executor=args.executor,
+            max_jobs=args.recycle_after,
+            timeout=args.timeout
+        )
+        sys.exit(exit_code)
+    
+    # 默认启动 GUI
+    if not is_admin():
+        run_as_admin()
+        sys.exit()
+    
+    # Qt 事件循环期间 Python 信号处理函数无法执行，Ctrl+C 直接结束进程
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    
+    # Qt 只在 GUI 路径上导入，命令行参数无需承担其加载时间
+    from PySide6.QtCore import Qt
+    from PySide6.QtWidgets import QApplication
+    from toolbox import Window
+    
+    QApplication.setHighDpiScaleFactorRoundingPolicy(Qt.HighDpiScaleFactorRoundingPolicy.PassThrough)
+    app = QApplication(sys.argv)
+    
+    # Check for qfluentwidgets resources
+    try:
+        from qfluentwidgets import Theme
+    except Exception as e:
+        log_error(f"Failed to import qfluentwidgets resources: {e}")
+        raise
+        
+    Window(scan_workers=args.scan_workers, max_parallel=args.max_parallel).show()
+    sys.exit(app.exec())
+
+
+def main():
+    """主入口函数"""
+    try:
+        # 守护进程在运行时直接转发，跳过导入、扫描和 UAC 提权
+        exit_code = forward_to_daemon(sys.argv[1:])
+        if exit_code is not None:
             sys.exit(exit_code)
         
-        # 默认启动 GUI
-        if not is_admin():
-            run_as_admin()
-            sys.exit()
+        from toolbox import parse_arguments, default_profile_path, Profiler
         
-        QApplication.setHighDpiScaleFactorRoundingPolicy(Qt.HighDpiScaleFactorRoundingPolicy.PassThrough)
-        app = QApplication(sys.argv)
+        # 解析命令行参数
+        args = parse_arguments()
         
-        # Check for qfluentwidgets resources
-        try:
-            from qfluentwidgets import Theme
-        except Exception as e:
-            log_error(f"Failed to import qfluentwidgets resources: {e}")
-            raise
-            
-        Window().show()
-        sys.exit(app.exec())
+        # --profile: 用 cProfile 包裹启动和事件循环，退出时写出 pstats 与计时直方图
+        if args.profile is not None:
+            with Profiler(args.profile or default_profile_path()):
+                run(args)
+        else:
+            run(args)
+    except KeyboardInterrupt:
+        # 命令行模式下 Ctrl+C 不打印调用栈 (批量运行时第一次 Ctrl+C 由任务运行器处理)
+        sys.exit(130)
     except Exception as e:
         import traceback
+        from toolbox import log_error
         log_error(f"Uncaught exception: {e}\n{traceback.format_exc()}")
         raise
 
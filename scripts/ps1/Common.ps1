@@ -83,7 +83,84 @@ function Show-Banner {
 
 <#
 .SYNOPSIS
-    带重试机制的下载函数
+    调用工具箱的 Python 命令行助手 (main.py)
+.DESCRIPTION
+    工具箱运行脚本时会设置 $env:TOOLBOX_PYTHON 和 $env:TOOLBOX_MAIN，
+    助手的输出会转发到 Write-Status。
+.PARAMETER Arguments
+    传给 main.py 的参数
+.PARAMETER Capture
+    捕获助手的标准输出并作为字符串返回，而不是转发到 Write-Status
+.RETURNS
+    助手退出码为 0 返回 $true；助手不可用或执行失败返回 $false。
+    使用 -Capture 时成功返回输出文本，否则返回 $null
+#>
+function Invoke-ToolboxHelper {
+    param(
+        [string[]]$Arguments,
+        [switch]$Capture
+    )
+    
+    if (-not $env:TOOLBOX_PYTHON) {
+        if ($Capture) { return $null }
+        return $false
+    }
+    
+    $helperArgs = @()
+    if ($env:TOOLBOX_MAIN) { $helperArgs += $env:TOOLBOX_MAIN }
+    $helperArgs += $Arguments
+    
+    try {
+        if ($Capture) {
+            $output = & $env:TOOLBOX_PYTHON @helperArgs
+            if ($LASTEXITCODE -ne 0) { return $null }
+            return ($output -join "`n")
+        }
+        & $env:TOOLBOX_PYTHON @helperArgs 2>&1 | ForEach-Object { Write-Status "$_" -Color Gray }
+        return ($LASTEXITCODE -eq 0)
+    }
+    catch {
+        Write-Status "工具箱助手不可用: $($_.Exception.Message)" -Color Yellow
+        if ($Capture) { return $null }
+        return $false
+    }
+}
+
+<#
+.SYNOPSIS
+    通过工具箱的持久化下载缓存获取文件
+.DESCRIPTION
+    工具箱运行脚本时会设置 $env:TOOLBOX_CACHE_DIR。缓存按 SHA-256 内容寻址，
+    复用前校验完整性，跨运行保留 (不会被 tmp 目录清理删除)，
+    未命中时使用多连接分块下载。
+.PARAMETER Url
+    下载 URL
+.PARAMETER OutFile
+    输出文件路径
+.PARAMETER Sha256
+    期望的 SHA-256 (可选)
+.RETURNS
+    成功返回 $true；缓存不可用或下载失败返回 $false
+#>
+function Invoke-CachedDownload {
+    param(
+        [string]$Url,
+        [string]$OutFile,
+        [string]$Sha256
+    )
+    
+    if (-not $env:TOOLBOX_CACHE_DIR) {
+        return $false
+    }
+    
+    $arguments = @('--cache-fetch', $Url, '--output', $OutFile)
+    if ($Sha256) { $arguments += @('--sha256', $Sha256) }
+    return ((Invoke-ToolboxHelper -Arguments $arguments) -and (Test-Path $OutFile))
+}
+
+<#
+.SYNOPSIS
+    带重试机制的下载函数 (工具箱环境下优先使用持久化下载缓存和多连接下载)
 .PARAMETER Url
     下载 URL
 .PARAMETER OutFile
@@ -100,6 +177,14 @@ function Invoke-DownloadWithRetry {
         [int]$MaxRetries = 3
     )
     
+    # 优先使用工具箱的持久化下载缓存，其次是多连接分块下载
+    if (Invoke-CachedDownload -Url $Url -OutFile $OutFile) {
+        return $true
+    }
+    if (-not $env:TOOLBOX_CACHE_DIR -and (Invoke-ToolboxHelper -Arguments @('--download', $Url, $OutFile)) -and (Test-Path $OutFile)) {
+        return $true
+    }
+    
     $headers = @{
         'User-Agent' = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
     }
@@ -227,6 +312,10 @@ function Request-AdminPrivilege {
 <#
 .SYNOPSIS
     从 GitHub Releases API 获取最新版本信息
+.DESCRIPTION
+    由工具箱运行时优先通过 main.py --release 查询：响应缓存在磁盘上，
+    有效期内不发请求，过期后用 ETag 条件请求重新验证，网络不可用或触发
+    速率限制时返回缓存的旧数据。助手不可用时直接调用 GitHub API。
 .PARAMETER Owner
     仓库所有者
 .PARAMETER Repo
@@ -240,6 +329,16 @@ function Get-GitHubLatestRelease {
         [string]$Repo
     )
     
+    $cached = Invoke-ToolboxHelper -Arguments @('--release', "$Owner/$Repo") -Capture
+    if ($cached) {
+        try {
+            return ($cached | ConvertFrom-Json)
+        }
+        catch {
+            Write-Status "无法解析缓存的 Release 信息，改为直接查询" -Color Yellow
+        }
+    }
+    
     [Net.ServicePointManager]::SecurityProtocol = [Net.SecurityProtocolType]::Tls12
     $api = "https://api.github.com/repos/$Owner/$Repo/releases/latest"
     $headers = @{ 'User-Agent' = 'PowerShell' }
@@ -1,5 +1,6 @@
 # 禁用 UAC 提升提示
 # 禁用管理员操作的 UAC 弹窗提示，适用于服务器自动化管理场景
+# probe: (Get-ItemProperty 'HKLM:\SOFTWARE\Microsoft\Windows\CurrentVersion\Policies\System').ConsentPromptBehaviorAdmin -eq 0
 # ---------------------------------------------------------
 # 相关文件:
 # - scripts/ps1/Common.ps1 (通用函数库)
@@ -1,5 +1,6 @@
 # 启用 UTF-8 支持
 # 为 Windows 所有终端自动开启 UTF-8 编码支持
+# probe: (Get-ItemProperty 'HKLM:\SYSTEM\CurrentControlSet\Control\Nls\CodePage').ACP -eq '65001'
 # ---------------------------------------------------------
 # 相关文件:
 # - scripts/ps1/Common.ps1 (通用函数库)
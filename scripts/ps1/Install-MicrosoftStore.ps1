@@ -1,5 +1,6 @@
 # 安装 Microsoft Store
 # 为系统安装或修复微软商店组件
+# conflicts: Install-WindowsTerminal   # 两者都调用 Add-AppxPackage，并发的 AppX 部署会失败 (0x80073D02)
 # ---------------------------------------------------------
 # 相关文件:
 # - scripts/ps1/Common.ps1 (通用函数库)
@@ -1,5 +1,7 @@
 # 安装 PowerShell 7
 # 一键安装或更新至最新稳定版 PowerShell 7
+# probe: Get-Command pwsh -ErrorAction SilentlyContinue
+# cache-ttl: 7d
 # ---------------------------------------------------------
 # 相关文件:
 # - scripts/ps1/Common.ps1 (通用函数库)
@@ -1,5 +1,7 @@
 # 安装 WSL2
 # 一键安装并配置 Windows Subsystem for Linux 2
+# reboot-after: true
+# timeout: 60m
 # ---------------------------------------------------------
 # 相关文件:
 # - scripts/ps1/Common.ps1 (通用函数库)
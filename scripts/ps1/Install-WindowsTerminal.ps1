@@ -1,5 +1,6 @@
 # 安装 Windows Terminal
 # 一键安装或更新至最新稳定版 Windows Terminal
+# after: Install-PowerShell7
 # ---------------------------------------------------------
 # 相关文件:
 # - scripts/ps1/Common.ps1 (通用函数库)
@@ -1,34 +1,132 @@
 # toolbox - Windows 工具箱核心模块
 # 重新导出所有公共 API，保持向后兼容性
 
-from .utils import (
-    is_admin,
-    run_as_admin,
-    get_base_dir,
-    log_error,
-    get_scripts_dir,
-    get_tmp_dir,
-    cleanup_tmp_dir,
-    parse_script_metadata,
-    scan_scripts,
-)
-
-from .cli import (
-    parse_arguments,
-    list_scripts,
-    run_script_headless,
-)
-
-from .gui.widgets import (
-    TerminalTextEdit,
-    TaskInterface,
-)
-
-from .gui.main_window import (
-    ToolCard,
-    ToolsInterface,
-    Window,
-)
+import importlib
+
+# 公共符号 -> 所在模块。所有符号都在首次访问时才导入：守护进程客户端等轻量路径只加载
+# 实际用到的模块，命令行路径 (--list / --run 等) 不加载 Qt
+_LAZY_IMPORTS = {
+    # utils
+    'is_admin': '.utils',
+    'run_as_admin': '.utils',
+    'get_base_dir': '.utils',
+    'log_error': '.utils',
+    'get_scripts_dir': '.utils',
+    'get_tmp_dir': '.utils',
+    'get_cache_dir': '.utils',
+    'cleanup_tmp_dir': '.utils',
+    'parse_script_metadata': '.utils',
+    'parse_script_header': '.utils',
+    'scan_scripts': '.utils',
+    # metadata
+    'CommentSyntax': '.metadata',
+    'ScriptDirectives': '.metadata',
+    'register_comment_syntax': '.metadata',
+    # discovery
+    'SCRIPT_EXTENSIONS': '.discovery',
+    'discover_scripts': '.discovery',
+    'build_name_index': '.discovery',
+    'suggest_names': '.discovery',
+    # watcher
+    'ScriptDiff': '.watcher',
+    'diff_snapshots': '.watcher',
+    'PollingWatcher': '.watcher',
+    # scheduler
+    'ScheduledTask': '.scheduler',
+    'TaskScheduler': '.scheduler',
+    # decoder
+    'StreamDecoder': '.decoder',
+    'detect_console_encoding': '.decoder',
+    # planner
+    'Plan': '.planner',
+    'PlanError': '.planner',
+    'build_plan': '.planner',
+    # executor
+    'ScriptJob': '.executor',
+    'ExecutorError': '.executor',
+    'ProcessExecutor': '.executor',
+    'WorkerPool': '.executor',
+    'create_executor': '.executor',
+    # batch
+    'BatchResult': '.batch',
+    'run_batch': '.batch',
+    # downloader
+    'DownloadFailed': '.downloader',
+    'download': '.downloader',
+    # download_cache
+    'DownloadCache': '.download_cache',
+    'DownloadError': '.download_cache',
+    'open_download_cache': '.download_cache',
+    # releases
+    'ReleaseError': '.releases',
+    'ReleaseResolver': '.releases',
+    'find_assets': '.releases',
+    # catalog
+    'ScriptRecord': '.catalog',
+    'iter_script_records': '.catalog',
+    # telemetry
+    'OutputMeter': '.telemetry',
+    'ScriptStats': '.telemetry',
+    'read_runs': '.telemetry',
+    'record_run': '.telemetry',
+    'summarize_runs': '.telemetry',
+    # result_cache
+    'CachedRun': '.result_cache',
+    'ResultCache': '.result_cache',
+    'open_result_cache': '.result_cache',
+    # profiling
+    'Profiler': '.profiling',
+    'SpanHistogram': '.profiling',
+    'span': '.profiling',
+    'timed': '.profiling',
+    'format_histograms': '.profiling',
+    # cli
+    'parse_arguments': '.cli',
+    'list_scripts': '.cli',
+    'run_script_headless': '.cli',
+    'run_scripts_batch': '.cli',
+    'split_script_names': '.cli',
+    'read_manifest': '.cli',
+    'cache_fetch': '.cli',
+    'download_file': '.cli',
+    'release_info': '.cli',
+    'show_stats': '.cli',
+    'default_profile_path': '.cli',
+    # gui
+    'TerminalTextEdit': '.gui.widgets',
+    'TaskInterface': '.gui.widgets',
+    'ToolListModel': '.gui.tool_list',
+    'ToolListView': '.gui.tool_list',
+    'ToolCard': '.gui.main_window',
+    'ToolsInterface': '.gui.main_window',
+    'Window': '.gui.main_window',
+    # runner
+    'TaskResult': '.runner',
+    'TaskRunner': '.runner',
+    'run_process': '.runner',
+    'cancel_on_interrupt': '.runner',
+    # daemon
+    'DaemonClient': '.daemon_client',
+    'DaemonError': '.daemon_client',
+    'forward_to_daemon': '.daemon_client',
+    'Daemon': '.daemon',
+    'DaemonServer': '.daemon',
+    'run_daemon': '.daemon',
+}
+
+
+def __getattr__(name):
+    module_name = _LAZY_IMPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_IMPORTS))
+
 
 __all__ = [
     # utils
@@ -38,16 +136,102 @@ __all__ = [
     'log_error',
     'get_scripts_dir',
     'get_tmp_dir',
+    'get_cache_dir',
     'cleanup_tmp_dir',
     'parse_script_metadata',
+    'parse_script_header',
     'scan_scripts',
+    # metadata
+    'CommentSyntax',
+    'ScriptDirectives',
+    'register_comment_syntax',
+    # discovery
+    'SCRIPT_EXTENSIONS',
+    'discover_scripts',
+    'build_name_index',
+    'suggest_names',
+    # watcher
+    'ScriptDiff',
+    'diff_snapshots',
+    'PollingWatcher',
+    # scheduler
+    'ScheduledTask',
+    'TaskScheduler',
+    # decoder
+    'StreamDecoder',
+    'detect_console_encoding',
+    # planner
+    'Plan',
+    'PlanError',
+    'build_plan',
+    # executor
+    'ScriptJob',
+    'ExecutorError',
+    'ProcessExecutor',
+    'WorkerPool',
+    'create_executor',
+    # runner
+    'TaskResult',
+    'TaskRunner',
+    'run_process',
+    'cancel_on_interrupt',
+    # batch
+    'BatchResult',
+    'run_batch',
+    # downloader
+    'DownloadFailed',
+    'download',
+    # download_cache
+    'DownloadCache',
+    'DownloadError',
+    'open_download_cache',
+    # releases
+    'ReleaseError',
+    'ReleaseResolver',
+    'find_assets',
+    # catalog
+    'ScriptRecord',
+    'iter_script_records',
+    # telemetry
+    'OutputMeter',
+    'ScriptStats',
+    'read_runs',
+    'record_run',
+    'summarize_runs',
+    # result_cache
+    'CachedRun',
+    'ResultCache',
+    'open_result_cache',
+    # profiling
+    'Profiler',
+    'SpanHistogram',
+    'span',
+    'timed',
+    'format_histograms',
     # cli
     'parse_arguments',
     'list_scripts',
     'run_script_headless',
+    'run_scripts_batch',
+    'split_script_names',
+    'read_manifest',
+    'cache_fetch',
+    'download_file',
+    'release_info',
+    'show_stats',
+    'default_profile_path',
+    # daemon
+    'DaemonClient',
+    'DaemonError',
+    'forward_to_daemon',
+    'Daemon',
+    'DaemonServer',
+    'run_daemon',
     # gui
     'TerminalTextEdit',
     'TaskInterface',
+    'ToolListModel',
+    'ToolListView',
     'ToolCard',
     'ToolsInterface',
     'Window',
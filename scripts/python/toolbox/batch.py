@@ -0,0 +1,188 @@
+# toolbox - Windows 工具箱核心模块
+# 批量运行模块：按并发数启动多个子进程，逐行转发带前缀的输出并汇总结果
+
+import sys
+import time
+import threading
+from collections import deque, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from .decoder import StreamDecoder
+from .executor import ExecutorError, ProcessExecutor, ScriptJob
+from .scheduler import CANCELLED, TIMEOUT
+from .telemetry import OutputMeter, record_run
+
+BatchResult = namedtuple('BatchResult', ['name', 'returncode', 'elapsed'])
+
+# returncode 为 None 表示因 fail_fast 被跳过
+SKIPPED = None
+
+
+class PrefixedWriter:
+    """线程安全地输出带 [名称] 前缀的整行文本"""
+
+    def __init__(self, stream=None, width=0):
+        self.stream = stream or sys.stdout
+        self.width = width
+        self._lock = threading.Lock()
+
+    def write_line(self, name, line):
+        line = line.rstrip('\r\n')
+        text = f'[{name:<{self.width}}] {line}\n'
+        with self._lock:
+            self.stream.write(text)
+            self.stream.flush()
+
+
+def _run_one(name, command, executor, writer, meter=None):
+    """通过执行后端运行单个任务并转发输出，返回退出码。meter 不为空时统计输出字节数。"""
+    decoder = StreamDecoder()
+
+    def on_output(raw):
+        if meter is not None:
+            meter.add(len(raw))
+        writer.write_line(name, decoder.decode(raw))
+
+    try:
+        returncode = executor.run(command, on_output)
+    except ExecutorError as e:
+        writer.write_line(name, f'[ERROR] {e}')
+        returncode = 1
+    tail = decoder.flush()
+    if tail:
+        writer.write_line(name, tail)
+    return returncode
+
+
+def run_batch(commands, jobs=1, env=None, fail_fast=False, stream=None, telemetry=False, executor=None,
+              timeout=None, runner=None, source='batch', timeouts=None):
+    """批量运行 [(名称, 命令), ...]，按输入顺序返回 BatchResult 列表。
+
+    命令默认为 argv 列表，由 TaskRunner 的事件循环统一监视，单个任务超过 timeout
+    秒 (timeouts 中按名称单独指定的优先) 时其进程树被终止；runner 为空时临时创建一个。传入 executor 时改由其在线程池中运行
+    命令 (例如交给常驻工作进程池的 ScriptJob，不支持 timeout)。env 只用于新建进程方式。
+    jobs=1 时按顺序串行执行；fail_fast=True 时首个失败之后尚未启动的任务被跳过，
+    任务被取消 (Ctrl+C) 后剩余任务同样跳过。telemetry=True 时为每个任务写入一条
+    运行记录，排队时间从调用本函数开始计算。
+    """
+    submitted = time.perf_counter()
+    writer = PrefixedWriter(stream, max((len(name) for name, _ in commands), default=0))
+
+    def record(name, command, started_at, start, elapsed, returncode, meter):
+        if telemetry and returncode is not SKIPPED:
+            args = [command.script] + list(command.args) if isinstance(command, ScriptJob) else command
+            record_run(name, args, started_at, elapsed, returncode, meter, start - submitted, source=source)
+
+    if executor is None:
+        # asyncio 导入较慢，只在实际运行脚本时加载
+        from .runner import TaskRunner
+        if runner is None:
+            with TaskRunner(env) as own_runner:
+                return _run_on_runner(commands, jobs, env, fail_fast, writer, timeout, timeouts or {}, own_runner,
+                                      record)
+        return _run_on_runner(commands, jobs, env, fail_fast, writer, timeout, timeouts or {}, runner, record)
+
+    failed = threading.Event()
+
+    def worker(name, command):
+        if fail_fast and failed.is_set():
+            return BatchResult(name, SKIPPED, 0.0)
+        started_at = time.time()
+        start = time.perf_counter()
+        meter = OutputMeter()
+        returncode = _run_one(name, command, executor, writer, meter)
+        elapsed = time.perf_counter() - start
+        if returncode != 0:
+            failed.set()
+        record(name, command, started_at, start, elapsed, returncode, meter)
+        return BatchResult(name, returncode, elapsed)
+
+    if jobs <= 1:
+        return [worker(name, command) for name, command in commands]
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        futures = [pool.submit(worker, name, command) for name, command in commands]
+        return [future.result() for future in futures]
+
+
+def _run_on_runner(commands, jobs, env, fail_fast, writer, timeout, timeouts, runner, record):
+    """通过 TaskRunner 运行命令：先提交 jobs 个，每结束一个再提交下一个"""
+    results = [BatchResult(name, SKIPPED, 0.0) for name, _ in commands]
+    pending = deque(enumerate(commands))
+    lock = threading.Lock()
+    state = {'running': 0, 'stop': False}
+    finished = threading.Event()
+
+    def submit_next():
+        # 调用方持有 lock
+        index, (name, command) = pending.popleft()
+        limit = timeouts.get(name, timeout)
+        decoder = StreamDecoder()
+        meter = OutputMeter()
+        started_at = time.time()
+        start = time.perf_counter()
+
+        def on_output(raw):
+            meter.add(len(raw))
+            writer.write_line(name, decoder.decode(raw))
+
+        def on_finished(result):
+            results[index] = BatchResult(name, result.returncode, result.elapsed)
+            try:
+                tail = decoder.flush()
+                if tail:
+                    writer.write_line(name, tail)
+                if result.status == TIMEOUT:
+                    writer.write_line(name, f'[TIMEOUT] 运行超过 {limit:g} 秒，已终止')
+                elif result.status == CANCELLED and result.returncode is not None:
+                    writer.write_line(name, '[CANCELLED] 已取消')
+                record(name, command, started_at, start, result.elapsed, result.returncode, meter)
+            finally:
+                # 输出失败 (例如管道已关闭) 也要继续调度，否则 finished 永远不会被设置
+                with lock:
+                    state['running'] -= 1
+                    if result.status == CANCELLED or (fail_fast and result.returncode != 0):
+                        state['stop'] = True
+                    if pending and not state['stop']:
+                        submit_next()
+                    elif not state['running']:
+                        finished.set()
+
+        state['running'] += 1
+        runner.submit(name, command, on_output, on_finished, timeout=limit, env=env)
+
+    with lock:
+        for _ in range(min(max(1, jobs), len(pending))):
+            submit_next()
+        if not state['running']:
+            finished.set()
+    # 分段等待，Windows 上 Ctrl+C 才能及时进入信号处理函数
+    while not finished.wait(0.2):
+        pass
+    return results
+
+
+def aggregate_exit_code(results):
+    """全部成功返回 0，否则返回按输入顺序第一个失败任务的退出码。"""
+    for result in results:
+        if result.returncode:
+            return result.returncode
+    return 0
+
+
+def format_summary(results):
+    """生成汇总表文本。"""
+    width = max([len(r.name) for r in results] + [4])
+    lines = [
+        '=' * 50,
+        f"{'脚本':<{width - 2}}  结果      退出码  耗时",
+    ]
+    for r in results:
+        if r.returncode is SKIPPED:
+            status, code, elapsed = '⏭ 跳过', '-', '-'
+        else:
+            status = '✅ 成功' if r.returncode == 0 else '❌ 失败'
+            code, elapsed = str(r.returncode), f'{r.elapsed:.1f}s'
+        lines.append(f'{r.name:<{width}}  {status:<8}{code:>6}  {elapsed}')
+    ok = sum(1 for r in results if r.returncode == 0)
+    lines.append(f'共 {len(results)} 个脚本，成功 {ok} 个')
+    return '\n'.join(lines)
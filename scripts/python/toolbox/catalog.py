@@ -0,0 +1,113 @@
+# toolbox - Windows 工具箱核心模块
+# 脚本目录模块：流式生成带元数据的脚本记录，输出 json / jsonl / tsv 供自动化使用
+
+import os
+import re
+import json
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from .utils import get_scripts_dir, get_cache_dir, parse_script_metadata, sha256_file
+from .metadata_cache import MetadataCache
+from .discovery import discover_scripts
+
+# 字段顺序即输出顺序，新增字段只能追加在末尾
+ScriptRecord = namedtuple(
+    'ScriptRecord',
+    ['name', 'path', 'title', 'description', 'extension', 'mtime', 'size', 'hash'],
+)
+
+LIST_FORMATS = ('text', 'json', 'jsonl', 'tsv')
+
+
+def make_matcher(text=None, pattern=None):
+    """返回按标题和描述过滤记录的函数。
+
+    text: 不区分大小写的子串，同时匹配脚本名；pattern: 正则表达式。
+    两者都为空时返回 None。正则无效时抛出 re.error。
+    """
+    regex = re.compile(pattern, re.IGNORECASE) if pattern else None
+    needle = text.lower() if text else None
+    if regex is None and needle is None:
+        return None
+
+    def match(name, title, description):
+        if needle is not None and not any(needle in s.lower() for s in (name, title, description)):
+            return False
+        if regex is not None and not (regex.search(title) or regex.search(description)):
+            return False
+        return True
+
+    return match
+
+
+def iter_script_records(match=None, use_cache=True, workers=None, max_depth=1, include=None, exclude=None):
+    """按发现顺序逐个产出 ScriptRecord，不排序，首条记录无需等待整个目录解析完毕。
+
+    标题、描述和内容摘要都保存在元数据索引中，未变化的文件不会被重新打开；
+    match(name, title, description) 为 False 的脚本被跳过。workers 大于 1 时
+    并发解析未命中缓存的脚本，产出顺序不变。生成器结束时写回索引。
+    """
+    scripts_dir = get_scripts_dir()
+    cache = MetadataCache.load(os.path.join(get_cache_dir(), 'metadata.json')) if use_cache else None
+    entries = discover_scripts(scripts_dir, max_depth=max_depth, include=include, exclude=exclude)
+
+    def load(entry):
+        st = entry.stat()
+        meta = cache.get(entry.path, st.st_mtime_ns, st.st_size) if cache is not None else None
+        if meta is None or 'sha256' not in meta:
+            title, desc = (meta['title'], meta['description']) if meta else parse_script_metadata(entry.path)
+            meta = {'title': title, 'description': desc, 'sha256': sha256_file(entry.path)}
+            if cache is not None:
+                cache.put(entry.path, st.st_mtime_ns, st.st_size, meta)
+        stem, ext = os.path.splitext(entry.name)
+        return ScriptRecord(stem, entry.path, meta['title'], meta['description'], ext.lower(),
+                            st.st_mtime, st.st_size, meta['sha256'])
+
+    executor = ThreadPoolExecutor(max_workers=workers) if workers and workers > 1 else None
+    try:
+        records = executor.map(load, entries) if executor else map(load, entries)
+        for record in records:
+            if match is None or match(record.name, record.title, record.description):
+                yield record
+        if cache is not None:
+            cache.prune(scripts_dir)
+    finally:
+        if executor:
+            executor.shutdown(cancel_futures=True)
+        if cache is not None:
+            cache.save()
+
+
+def _tsv_field(value):
+    return str(value).replace('\\', '\\\\').replace('\t', '\\t').replace('\n', '\\n').replace('\r', '\\r')
+
+
+def write_records(records, fmt, stream, fields=ScriptRecord._fields):
+    """把 namedtuple 记录按 json / jsonl / tsv 格式逐条写入 stream 并立即刷新，返回写出的条数。
+
+    json 输出一个数组，jsonl 每行一个对象，tsv 首行为字段名，字段中的
+    制表符、换行和反斜杠按 \\t、\\n、\\\\ 转义。JSON 只包含 ASCII 字符，
+    不受控制台代码页影响。
+    """
+    count = 0
+    if fmt == 'tsv':
+        stream.write('\t'.join(fields) + '\n')
+    elif fmt == 'json':
+        stream.write('[')
+    for record in records:
+        if fmt == 'tsv':
+            line = '\t'.join(_tsv_field(value) for value in record) + '\n'
+        else:
+            line = json.dumps(record._asdict())
+            if fmt == 'json':
+                line = ('\n  ' if count == 0 else ',\n  ') + line
+            else:
+                line += '\n'
+        stream.write(line)
+        stream.flush()
+        count += 1
+    if fmt == 'json':
+        stream.write('\n]\n' if count else ']\n')
+    stream.flush()
+    return count
@@ -2,10 +2,43 @@
 # 命令行接口模块
 
 import os
-import subprocess
+import sys
+import json
+import re
+import time
 import argparse
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
 
-from .utils import scan_scripts, get_tmp_dir, cleanup_tmp_dir
+from .utils import (
+    scan_scripts, parse_script_header, get_scripts_dir, get_tmp_dir, get_cache_dir, cleanup_tmp_dir
+)
+from .discovery import build_name_index, normalize_script_name, suggest_names
+from .batch import BatchResult, SKIPPED, run_batch, aggregate_exit_code, format_summary
+from .planner import PlanError, build_plan, format_plan
+from .download_cache import DownloadError, open_download_cache, cache_environment
+from .downloader import DEFAULT_CONNECTIONS, DownloadFailed, download, format_progress
+from .releases import ReleaseError, find_assets, open_release_resolver
+from .catalog import LIST_FORMATS, iter_script_records, make_matcher, write_records
+from .executor import DEFAULT_MAX_JOBS, EXECUTOR_KINDS, ScriptJob, create_executor
+from .telemetry import ScriptStats, format_stats, get_telemetry_path, read_runs, summarize_runs
+from .result_cache import open_result_cache
+
+# 计划中声明了 reboot-after 时，所有阶段成功后运行的重启脚本
+REBOOT_SCRIPT = 'restart-system'
+
+
+def _int_at_least(minimum):
+    """argparse 的 type：不小于 minimum 的整数"""
+    def convert(value):
+        try:
+            number = int(value)
+        except ValueError:
+            raise argparse.ArgumentTypeError(f'无效的整数: {value}') from None
+        if number < minimum:
+            raise argparse.ArgumentTypeError(f'必须大于或等于 {minimum}: {value}')
+        return number
+    return convert
 
 
 def parse_arguments():
@@ -17,9 +50,25 @@ def parse_arguments():
 示例:
   main.py                      # 启动 GUI 界面
   main.py --list               # 列出所有可用脚本
+  main.py --list --scan-workers 8
+  main.py --list --format jsonl --grep "WSL|终端"
+  main.py --stats              # 按脚本汇总历次运行耗时 (p50 / p95)
+  main.py --profile            # 用 cProfile 剖析启动和事件循环，退出时输出 pstats 与计时直方图
+  main.py --max-parallel 4     # GUI 中最多同时运行 4 个任务
   main.py --run Install-PowerShell7
   main.py --run Install-WindowsTerminal --silent
   main.py --run Enable-UTF8Support --headless
+  main.py --run Install-PowerShell7,Install-WindowsTerminal --jobs 2 --headless
+  main.py --manifest provision.txt --fail-fast
+  main.py --manifest provision.txt --timeout 1800   # 单个脚本超过 30 分钟即终止
+  main.py --manifest provision.txt --executor host --recycle-after 10
+  main.py --run Install-WSL2,Install-WindowsTerminal --plan
+  main.py --cache-fetch URL --output FILE [--sha256 HEX]
+  main.py --download URL OUT --connections 8
+  main.py --release microsoft/WSL --asset "x64\\.msi$"
+  main.py --daemon             # 常驻守护进程，之后的 --list / --run 直接转发给它
+  main.py --run Install-WSL2 --detach    # 提交后立即返回作业编号
+  main.py --status / --logs 3 / --cancel 3 / --stop-daemon
 """
     )
     parser.add_argument(
@@ -27,10 +76,73 @@ def parse_arguments():
         action='store_true',
         help='列出所有可用的脚本'
     )
+    parser.add_argument(
+        '--stats',
+        action='store_true',
+        help='按脚本汇总运行记录中的耗时分位数 (p50 / p95)，按总耗时排序'
+    )
+    parser.add_argument(
+        '--format',
+        choices=LIST_FORMATS,
+        default='text',
+        help='--list / --stats 的输出格式：text (默认) 或供自动化使用的 json / jsonl / tsv (按发现顺序流式输出)'
+    )
+    parser.add_argument(
+        '--filter',
+        metavar='TEXT',
+        help='--list 只输出脚本名、标题或描述包含 TEXT 的脚本，--stats 只统计名称包含 TEXT 的脚本 (不区分大小写)'
+    )
+    parser.add_argument(
+        '--grep',
+        metavar='REGEX',
+        help='--list 只输出标题或描述匹配正则的脚本 (不区分大小写)'
+    )
     parser.add_argument(
         '--run', '-r',
         metavar='SCRIPT',
-        help='运行指定的脚本 (无需 .ps1 扩展名)'
+        help='运行指定的脚本 (无需 .ps1 扩展名)，多个脚本用逗号分隔'
+    )
+    parser.add_argument(
+        '--manifest',
+        metavar='FILE',
+        help='从清单文件读取要运行的脚本 (每行一个，# 开头为注释)'
+    )
+    parser.add_argument(
+        '--jobs', '-j',
+        type=_int_at_least(0),
+        default=1,
+        metavar='N',
+        help='批量运行时每个阶段同时执行的脚本数 (默认 1，按顺序串行执行；0 表示不限制)'
+    )
+    parser.add_argument(
+        '--executor',
+        choices=EXECUTOR_KINDS,
+        default='process',
+        help='批量运行的执行后端：process 每个脚本启动新的 PowerShell (默认)，host 复用常驻的 PowerShell 工作进程'
+    )
+    parser.add_argument(
+        '--recycle-after',
+        type=int,
+        default=DEFAULT_MAX_JOBS,
+        metavar='N',
+        help=f'--executor host 时每个工作进程运行 N 个脚本后替换 (默认 {DEFAULT_MAX_JOBS}，脚本失败时立即替换)'
+    )
+    parser.add_argument(
+        '--plan',
+        action='store_true',
+        help='只打印按依赖关系分阶段的执行计划，不运行脚本'
+    )
+    parser.add_argument(
+        '--timeout',
+        type=float,
+        metavar='SECONDS',
+        help='单个脚本的最长运行时间 (秒)，超时后终止该脚本及其子进程；默认使用脚本头部的 timeout 声明，'
+             '未声明时不限制 (--executor host 时不生效)'
+    )
+    parser.add_argument(
+        '--fail-fast',
+        action='store_true',
+        help='批量运行时某个脚本失败后不再启动后续脚本'
     )
     parser.add_argument(
         '--headless',
@@ -45,58 +157,224 @@ def parse_arguments():
     parser.add_argument(
         '--force', '-f',
         action='store_true',
-        help='强制执行 (跳过版本检查等)'
+        help='强制执行 (跳过版本检查和运行结果缓存等)'
+    )
+    parser.add_argument(
+        '--scan-workers',
+        type=int,
+        default=1,
+        metavar='N',
+        help='并发解析脚本元数据的线程数 (默认 1，适用于网络共享目录)'
+    )
+    parser.add_argument(
+        '--max-parallel',
+        type=_int_at_least(1),
+        default=2,
+        metavar='N',
+        help='GUI 中同时运行的任务数上限，其余任务排队等待 (默认 2)'
+    )
+    parser.add_argument(
+        '--download',
+        nargs=2,
+        metavar=('URL', 'OUT'),
+        help='多连接分块下载文件，支持断点续传 (供脚本调用)'
+    )
+    parser.add_argument(
+        '--connections',
+        type=int,
+        default=DEFAULT_CONNECTIONS,
+        metavar='N',
+        help=f'--download / --cache-fetch 的并发连接数 (默认 {DEFAULT_CONNECTIONS})'
+    )
+    parser.add_argument(
+        '--cache-fetch',
+        metavar='URL',
+        help='通过持久化下载缓存获取文件 (供脚本调用，需配合 --output)'
+    )
+    parser.add_argument(
+        '--output', '-o',
+        metavar='FILE',
+        help='--cache-fetch 的输出文件路径'
+    )
+    parser.add_argument(
+        '--sha256',
+        metavar='HEX',
+        help='--cache-fetch 下载内容的期望 SHA-256'
+    )
+    parser.add_argument(
+        '--release',
+        metavar='OWNER/REPO',
+        help='输出仓库最新 Release 的 JSON (带缓存与 ETag 重新验证，供脚本调用)'
+    )
+    parser.add_argument(
+        '--asset',
+        metavar='REGEX',
+        help='--release 只输出名称匹配正则的资源下载地址'
+    )
+    parser.add_argument(
+        '--offline',
+        action='store_true',
+        help='--release 不访问网络，只使用缓存 (可能已过期)'
+    )
+    parser.add_argument(
+        '--profile',
+        nargs='?',
+        const='',
+        metavar='FILE',
+        help='用 cProfile 剖析本次运行并记录计时区间，退出时写出 pstats 文件 (默认 cache/profile 下) 和直方图'
     )
     parser.add_argument(
         '--no-admin',
         action='store_true',
         help='跳过管理员权限检查 (用于已提权环境)'
     )
+    parser.add_argument(
+        '--daemon',
+        action='store_true',
+        help='以守护进程运行：常驻并持有脚本索引和调度器，之后的 --list / --run 经本地套接字转发给它'
+    )
+    parser.add_argument(
+        '--no-daemon',
+        action='store_true',
+        help='即使守护进程在运行也在本地处理本次命令'
+    )
+    parser.add_argument(
+        '--detach',
+        action='store_true',
+        help='--run 交给守护进程后立即返回，只输出作业编号'
+    )
+    parser.add_argument(
+        '--status',
+        nargs='?',
+        type=int,
+        const=0,
+        metavar='JOB',
+        help='显示守护进程中的作业状态 (默认全部作业)'
+    )
+    parser.add_argument(
+        '--logs',
+        type=int,
+        metavar='JOB',
+        help='输出守护进程中作业的日志，作业结束前持续跟随'
+    )
+    parser.add_argument(
+        '--cancel',
+        type=int,
+        metavar='JOB',
+        help='取消守护进程中的作业'
+    )
+    parser.add_argument(
+        '--stop-daemon',
+        action='store_true',
+        help='停止守护进程 (运行中的脚本将被终止)'
+    )
     return parser.parse_args()
 
 
-def list_scripts():
-    """列出所有可用脚本"""
-    scripts = scan_scripts()
+def list_scripts(scan_workers=None, fmt='text', filter_text=None, grep=None, stream=None, records=None,
+                 errors=None):
+    """列出所有可用脚本，返回退出码。
+
+    records 不为空时使用已加载的 ScriptRecord 列表而不扫描目录 (守护进程)；errors 为错误信息的输出流。
+    """
+    stream = stream or sys.stdout
+    try:
+        match = make_matcher(filter_text, grep)
+    except re.error as e:
+        print(f"[ERROR] 无效的正则表达式 {grep}: {e}", file=errors or sys.stderr)
+        return 1
+
+    if fmt != 'text':
+        if records is None:
+            records = iter_script_records(match, workers=scan_workers)
+        elif match is not None:
+            records = (r for r in records if match(r.name, r.title, r.description))
+        write_records(records, fmt, stream)
+        return 0
+
+    if records is None:
+        scripts = scan_scripts(workers=scan_workers)
+    else:
+        scripts = sorted(((r.path, r.title, r.description) for r in records), key=lambda x: (x[1], x[0]))
+    if match is not None:
+        scripts = [(path, title, desc) for path, title, desc in scripts
+                   if match(os.path.splitext(os.path.basename(path))[0], title, desc)]
     if not scripts:
-        print("未找到可用脚本。")
-        return
+        print("未找到可用脚本。", file=stream)
+        return 0
     
-    print("可用脚本列表:")
-    print("=" * 50)
+    print("可用脚本列表:", file=stream)
+    print("=" * 50, file=stream)
     for path, title, desc in scripts:
         basename = os.path.splitext(os.path.basename(path))[0]
-        print(f"  {basename}")
-        print(f"    标题: {title}")
+        print(f"  {basename}", file=stream)
+        print(f"    标题: {title}", file=stream)
         if desc:
-            print(f"    描述: {desc}")
-        print()
+            print(f"    描述: {desc}", file=stream)
+        print(file=stream)
+    return 0
 
 
-def run_script_headless(script_name, headless=False, silent=False, force=False, no_admin=False):
-    """在无头模式下运行指定脚本"""
-    scripts = scan_scripts()
-    
-    # 查找匹配的脚本
-    target_script = None
-    script_name_lower = script_name.lower()
-    
-    for path, title, desc in scripts:
-        basename = os.path.splitext(os.path.basename(path))[0]
-        if basename.lower() == script_name_lower:
-            target_script = path
-            break
-    
-    if not target_script:
-        print(f"[ERROR] 未找到脚本: {script_name}")
-        print("使用 --list 查看可用脚本列表。")
-        return 1
-    
-    if not silent:
-        print(f"运行脚本: {os.path.basename(target_script)}")
-        print("=" * 50)
-    
-    # 构建 PowerShell 命令
+def default_profile_path():
+    """--profile 未指定文件时的输出路径: cache/profile/toolbox-时间戳.prof"""
+    profile_dir = os.path.join(get_cache_dir(), 'profile')
+    os.makedirs(profile_dir, exist_ok=True)
+    return os.path.join(profile_dir, f"toolbox-{time.strftime('%Y%m%d-%H%M%S')}.prof")
+
+
+def split_script_names(value):
+    """拆分逗号分隔的脚本名列表，忽略空项。"""
+    return [name.strip() for name in (value or '').split(',') if name.strip()]
+
+
+def read_manifest(path):
+    """读取清单文件中的脚本名，每行一个（也可逗号分隔），# 之后为注释。"""
+    names = []
+    with open(path, 'r', encoding='utf-8-sig') as f:
+        for line in f:
+            names.extend(split_script_names(line.split('#', 1)[0]))
+    return names
+
+
+def resolve_scripts(names, index=None, stream=None):
+    """将脚本名解析为 [(名称, 路径), ...]；任一脚本不存在时向 stream (默认标准输出) 打印建议并返回 None。"""
+    # 仅凭目录项构建名称索引，无需解析脚本元数据
+    if index is None:
+        index = build_name_index(get_scripts_dir())
+    resolved = []
+    missing = False
+    for name in names:
+        target_script = index.get(normalize_script_name(name))
+        if target_script:
+            resolved.append((name, target_script))
+            continue
+        missing = True
+        print(f"[ERROR] 未找到脚本: {name}", file=stream)
+        suggestions = suggest_names(name, index)
+        if suggestions:
+            print(f"您是不是要找: {', '.join(suggestions)}", file=stream)
+    if missing:
+        print("使用 --list 查看可用脚本列表。", file=stream)
+        return None
+    return resolved
+
+
+def build_script_args(headless=False, silent=False, force=False, no_admin=False):
+    """构建传给脚本的开关参数"""
+    args = []
+    if headless:
+        args.append('-Headless')
+    if silent:
+        args.append('-Silent')
+    if force:
+        args.append('-Force')
+    if no_admin:
+        args.append('-NoAdmin')
+    return args
+
+
+def build_script_command(target_script, headless=False, silent=False, force=False, no_admin=False):
+    """构建运行脚本的 PowerShell 命令行"""
     ps_args = [
         'powershell.exe',
         '-NoProfile',
@@ -105,26 +383,160 @@ def run_script_headless(script_name, headless=False, silent=False, force=False,
     ]
     
     # 添加脚本参数
-    if headless:
-        ps_args.append('-Headless')
-    if silent:
-        ps_args.append('-Silent')
-    if force:
-        ps_args.append('-Force')
-    if no_admin:
-        ps_args.append('-NoAdmin')
-    
-    # 设置环境变量
+    ps_args.extend(build_script_args(headless, silent, force, no_admin))
+    return ps_args
+
+
+def script_timeout(path, timeout=None, directives=None):
+    """脚本的最长运行秒数：命令行指定的 timeout 优先，否则取脚本头部的 timeout 指令 (已解析时经 directives 传入)"""
+    if timeout is not None:
+        return timeout
+    if directives is None:
+        directives = parse_script_header(path)[2]
+    return directives.timeout
+
+
+def find_cached_runs(cache, paths, args, workers=1, directives=None):
+    """返回 {脚本路径: CachedRun}，只包含目标状态已由之前的成功运行满足的脚本；探测命令并发运行。
+    directives 为 {脚本路径: ScriptDirectives} 时不再解析脚本头部"""
+    def lookup(path):
+        return cache.lookup(path, args, directives[path] if directives else parse_script_header(path)[2])
+
+    if workers > 1 and len(paths) > 1:
+        with ThreadPoolExecutor(max_workers=min(workers, len(paths))) as pool:
+            hits = list(pool.map(lookup, paths))
+    else:
+        hits = [lookup(path) for path in paths]
+    return {path: hit for path, hit in zip(paths, hits) if hit}
+
+
+def format_cached_run(hit):
+    """缓存命中时的提示文本"""
+    return f"[缓存] 目标状态已满足 (上次成功: {datetime.fromtimestamp(hit.finished):%Y-%m-%d %H:%M})，跳过。使用 --force 强制运行"
+
+
+def build_script_env():
+    """构建脚本运行环境变量"""
     env = os.environ.copy()
     env['TOOLBOX_TMP_DIR'] = get_tmp_dir()
+    env.update(cache_environment())
+    return env
+
+
+def _print_progress(progress):
+    """打印下载进度；控制台中原地刷新，被脚本捕获时逐行输出"""
+    if sys.stdout.isatty():
+        print(f"\r[下载] {format_progress(progress)}", end='', flush=True)
+    else:
+        print(f"[下载] {format_progress(progress)}", flush=True)
+
+
+def _progress_options():
+    return {'progress': _print_progress, 'progress_interval': 0.5 if sys.stdout.isatty() else 2.0}
+
+
+def download_file(url, out, connections=DEFAULT_CONNECTIONS):
+    """多连接下载 url 到 out，供脚本调用"""
+    try:
+        download(url, out, connections=connections, **_progress_options())
+    except (DownloadFailed, OSError) as e:
+        print(f"\n[ERROR] {e}")
+        return 1
+    if sys.stdout.isatty():
+        print()
+    return 0
+
+
+def cache_fetch(url, output, sha256=None, connections=DEFAULT_CONNECTIONS):
+    """通过下载缓存获取 URL 并复制到 output，供脚本调用"""
+    if not output:
+        print("[ERROR] --cache-fetch 需要指定 --output")
+        return 1
+    cache = open_download_cache()
+    try:
+        cache.fetch(url, output, expected_sha256=sha256, connections=connections, **_progress_options())
+    except (DownloadError, OSError) as e:
+        print(f"\n[ERROR] {e}")
+        return 1
+    if cache.misses and sys.stdout.isatty():
+        print()
+    print(f"[缓存] {'命中' if cache.hits else '已下载'}: {url}")
+    return 0
+
+
+def release_info(spec, asset=None, offline=False):
+    """输出 owner/repo 最新 Release 的 JSON，或匹配 asset 的资源下载地址，供脚本调用"""
+    owner, _, repo = spec.partition('/')
+    if not owner or not repo:
+        print(f"[ERROR] 仓库格式应为 OWNER/REPO: {spec}", file=sys.stderr)
+        return 1
+    if asset is not None:
+        # 在访问网络之前检查正则，与 --grep 的处理一致
+        try:
+            re.compile(asset)
+        except re.error as e:
+            print(f"[ERROR] 无效的正则表达式 {asset}: {e}", file=sys.stderr)
+            return 1
+    resolver = open_release_resolver(offline=offline or None)
+    try:
+        release = resolver.latest(owner, repo)
+    except ReleaseError as e:
+        print(f"[ERROR] {e}", file=sys.stderr)
+        return 1
+
+    if asset is None:
+        # 只输出 ASCII，避免脚本按控制台代码页解码时出现乱码
+        print(json.dumps(release))
+        return 0
+    assets = find_assets(release, asset)
+    if not assets:
+        print(f"[ERROR] {release.get('tag_name', '')} 中没有匹配 {asset} 的资源", file=sys.stderr)
+        return 1
+    for item in assets:
+        print(item['browser_download_url'])
+    return 0
+
+
+def run_script_headless(script_name, headless=False, silent=False, force=False, no_admin=False, timeout=None):
+    """在无头模式下运行指定脚本，输出逐行转发到控制台；Ctrl+C 时终止脚本并返回
+
+    脚本声明了 probe / cache-ttl 指令时，之前的成功运行仍有效则直接返回 0；force 为 True 时忽略缓存。
+    """
+    resolved = resolve_scripts([script_name])
+    if not resolved:
+        return 1
+    target_script = resolved[0][1]
+    directives = parse_script_header(target_script)[2]
+    return _run_single_script(target_script, directives, headless, silent, force, no_admin, timeout)
+
+
+def _run_single_script(target_script, directives, headless=False, silent=False, force=False, no_admin=False,
+                       timeout=None):
+    """run_script_headless 的主体：脚本路径和头部指令已由调用方解析 (run_scripts_batch 复用执行计划中的结果)"""
+    name = os.path.splitext(os.path.basename(target_script))[0]
+    
+    # 缓存键不含 -Force，强制运行的成功结果同样会刷新缓存
+    cache = open_result_cache()
+    cache_args = build_script_args(headless, silent, False, no_admin)
+    if cache is not None and not force:
+        hit = cache.lookup(target_script, cache_args, directives)
+        if hit:
+            print(f"{name}: {format_cached_run(hit)}")
+            return 0
     
+    if not silent:
+        print(f"运行脚本: {os.path.basename(target_script)}")
+        print("=" * 50)
+    
+    command = build_script_command(target_script, headless, silent, force, no_admin)
+    from .runner import TaskRunner, cancel_on_interrupt
     try:
-        # 运行脚本
-        result = subprocess.run(
-            ps_args,
-            env=env,
-            shell=False
-        )
+        with TaskRunner(build_script_env()) as runner, cancel_on_interrupt(runner):
+            result = run_batch([(name, command)], timeout=script_timeout(target_script, timeout, directives),
+                               runner=runner, telemetry=True, source='cli')[0]
+        if cache is not None:
+            cache.record(target_script, cache_args, directives, result.returncode)
+            cache.save()
         return result.returncode
     except Exception as e:
         print(f"[ERROR] 执行脚本时发生错误: {e}")
@@ -133,3 +545,160 @@ def run_script_headless(script_name, headless=False, silent=False, force=False,
         # 无头模式下清理临时目录
         if headless:
             cleanup_tmp_dir()
+
+
+def show_stats(fmt='text', filter_text=None, stream=None):
+    """按脚本汇总遥测记录中的耗时 (p50 / p95 / 最长 / 总计)，返回退出码"""
+    stream = stream or sys.stdout
+    path = get_telemetry_path()
+    if path is None:
+        print("[ERROR] 遥测已禁用 (TOOLBOX_TELEMETRY)", file=sys.stderr)
+        return 1
+    runs = read_runs(path)
+    if filter_text:
+        runs = (event for event in runs if filter_text.lower() in event['script'].lower())
+    stats = summarize_runs(runs)
+    if fmt == 'text':
+        print(format_stats(stats), file=stream)
+    else:
+        write_records(stats, fmt, stream, fields=ScriptStats._fields)
+    return 0
+
+
+def plan_scripts(script_names, index=None, stream=None, directives=None):
+    """解析脚本名并按头部依赖指令生成执行计划，返回 (Plan, 名称索引)，失败时向 stream 打印原因并返回 None。
+
+    传入字典 directives 时写入计划中每个脚本的 {规范化名称: ScriptDirectives}，调用方无需再解析脚本头部。
+    """
+    if index is None:
+        index = build_name_index(get_scripts_dir())
+    if resolve_scripts(script_names, index, stream) is None:
+        return None
+
+    def lookup(key):
+        path = index.get(key)
+        if path is None:
+            return None
+        header = parse_script_header(path)[2]
+        if directives is not None:
+            directives[key] = header
+        return header._replace(
+            requires=tuple(normalize_script_name(n) for n in header.requires),
+            conflicts=tuple(normalize_script_name(n) for n in header.conflicts),
+            after=tuple(normalize_script_name(n) for n in header.after),
+        )
+
+    try:
+        plan = build_plan([normalize_script_name(name) for name in script_names], lookup, REBOOT_SCRIPT)
+    except PlanError as e:
+        print(f"[ERROR] {e}", file=stream)
+        return None
+    return plan, index
+
+
+def run_scripts_batch(script_names, jobs=1, headless=False, silent=False, force=False, no_admin=False,
+                      fail_fast=False, dry_run=False, executor='process', max_jobs=DEFAULT_MAX_JOBS, timeout=None):
+    """按依赖计划分阶段运行脚本，输出带脚本名前缀，结束后打印汇总表并返回聚合退出码
+
+    requires 声明的脚本会自动加入计划；依赖的脚本失败时跳过后续依赖它的脚本。
+    dry_run 为 True 时只打印执行计划。executor='host' 时脚本交给常驻工作进程池
+    运行，工作进程在 max_jobs 个任务后替换。timeout 为单个脚本的最长运行秒数，
+    未指定时使用脚本头部的 timeout 指令。目标状态已由之前的成功运行满足的脚本
+    (见 probe / cache-ttl 指令) 直接记为成功，force 为 True 时忽略缓存。
+    Ctrl+C 时终止运行中的脚本，跳过其余脚本并照常打印汇总。
+    """
+    headers = {}
+    planned = plan_scripts(script_names, directives=headers)
+    if planned is None:
+        return 1
+    plan, index = planned
+    
+    def display(key):
+        return os.path.splitext(os.path.basename(index[key]))[0]
+    
+    if dry_run:
+        print(format_plan(plan, REBOOT_SCRIPT if REBOOT_SCRIPT in index else None, display))
+        return 0
+    
+    scripts = [name for stage in plan.stages for name in stage]
+    if len(scripts) == 1 and not plan.reboot and executor == 'process':
+        # 单个无依赖的脚本直接在当前控制台运行，复用计划中已解析的路径和头部指令
+        return _run_single_script(index[scripts[0]], headers[scripts[0]], headless, silent, force, no_admin, timeout)
+    
+    if not silent:
+        mode = "串行" if jobs == 1 else (f"并发 {jobs}" if jobs else "阶段内全部并发")
+        print(f"批量运行 {len(scripts)} 个脚本，共 {len(plan.stages)} 个阶段 ({mode})")
+        print("=" * 50)
+    
+    env = build_script_env()
+    width = jobs or max(len(stage) for stage in plan.stages)
+    pool = create_executor('host', env, size=width, max_jobs=max_jobs) if executor == 'host' else None
+    flags = build_script_args(headless, silent, force, no_admin)
+    cache = open_result_cache()
+    cache_args = build_script_args(headless, silent, False, no_admin)
+    results = []
+    failed = set()
+    cached = set()
+    from .runner import TaskRunner, cancel_on_interrupt
+    runner = TaskRunner(env)
+    try:
+        with cancel_on_interrupt(runner) as interrupted:
+            for stage in plan.stages:
+                runnable = []
+                for name in stage:
+                    if interrupted.is_set() or (fail_fast and failed) or plan.requires[name] & failed:
+                        results.append(BatchResult(display(name), SKIPPED, 0.0))
+                        failed.add(name)
+                    else:
+                        runnable.append(name)
+                if cache is not None and not force:
+                    hits = find_cached_runs(cache, [index[name] for name in runnable], cache_args, width,
+                                            {index[name]: headers[name] for name in runnable})
+                    for name in runnable:
+                        if index[name] in hits:
+                            print(f"[{display(name)}] {format_cached_run(hits[index[name]])}")
+                            results.append(BatchResult(display(name), 0, 0.0))
+                    cached.update(name for name in runnable if index[name] in hits)
+                    runnable = [name for name in runnable if name not in cached]
+                if not runnable:
+                    continue
+                if pool is not None:
+                    commands = [(display(name), ScriptJob(index[name], flags)) for name in runnable]
+                else:
+                    commands = [
+                        (display(name), build_script_command(index[name], headless, silent, force, no_admin))
+                        for name in runnable
+                    ]
+                timeouts = {display(name): script_timeout(index[name], timeout, headers[name]) for name in runnable}
+                stage_results = run_batch(commands, jobs=jobs or len(commands), env=env, fail_fast=fail_fast,
+                                          telemetry=True, executor=pool, runner=runner, timeouts=timeouts)
+                for name, result in zip(runnable, stage_results):
+                    results.append(result)
+                    if result.returncode != 0:
+                        failed.add(name)
+                    if cache is not None and result.returncode is not SKIPPED:
+                        cache.record(index[name], cache_args, headers[name], result.returncode)
+    finally:
+        runner.close()
+        if cache is not None:
+            cache.save()
+        if pool is not None:
+            pool.close()
+        # 无头模式下清理临时目录
+        if headless:
+            cleanup_tmp_dir()
+    
+    print(format_summary(results))
+    exit_code = aggregate_exit_code(results)
+    
+    if plan.reboot:
+        if failed:
+            print("[INFO] 存在未成功的脚本，已跳过重启。")
+        elif not any(headers[name].reboot_after for name in scripts if name not in cached):
+            print("[INFO] 需要重启的脚本均已满足目标状态，已跳过重启。")
+        elif REBOOT_SCRIPT in index:
+            print(f"所有脚本已完成，正在通过 {display(REBOOT_SCRIPT)} 重启计算机...")
+            run_batch([(display(REBOOT_SCRIPT), build_script_command(index[REBOOT_SCRIPT]))], env=env)
+        else:
+            print("[INFO] 需要重启计算机以完成安装。")
+    return exit_code
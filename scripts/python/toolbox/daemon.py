@@ -0,0 +1,636 @@
+# toolbox - Windows 工具箱核心模块
+# 守护进程模块：常驻 (已提权) 进程持有脚本索引、结果缓存和调度器，经本地套接字响应 JSON 行请求
+
+import os
+import sys
+import json
+import hmac
+import time
+import errno
+import socket
+import hashlib
+import secrets
+import tempfile
+import threading
+import subprocess
+import socketserver
+from io import StringIO
+from concurrent.futures import ThreadPoolExecutor
+
+from .utils import parse_script_header, get_scripts_dir, cleanup_tmp_dir
+from .discovery import build_name_index
+from .watcher import PollingWatcher
+from .catalog import LIST_FORMATS, iter_script_records
+from .scheduler import QUEUED, RUNNING, DONE, FAILED, CANCELLED, TIMEOUT, FINISHED_STATES, TaskScheduler
+from .decoder import StreamDecoder
+from .batch import BatchResult, SKIPPED, aggregate_exit_code, format_summary
+from .telemetry import OutputMeter, record_run
+from .result_cache import open_result_cache
+from .executor import ExecutorError
+from .runner import CANCELLED_EXIT_CODE, TaskRunner
+from .cli import (
+    REBOOT_SCRIPT, build_script_args, build_script_command, build_script_env, format_cached_run, list_scripts,
+    plan_scripts,
+)
+from .daemon_client import (
+    MAX_MESSAGE, PROTOCOL_VERSION, DaemonClient, DaemonError, encode_message, get_state_path, read_state,
+)
+
+# 任务在 QUEUED 之前的状态：所在阶段尚未开始
+WAITING = 'waiting'
+# 依赖失败、fail_fast 或作业取消而未运行
+SKIPPED_STATE = 'skipped'
+# 目标状态已由之前的成功运行满足 (结果缓存命中)
+CACHED = 'cached'
+
+_FINAL_STATES = FINISHED_STATES + (SKIPPED_STATE, CACHED)
+
+# 同时运行的脚本数，与 GUI 的 --max-parallel 默认值一致
+DEFAULT_MAX_PARALLEL = 2
+
+# 保留的已结束作业数
+JOB_HISTORY = 50
+
+# 每个作业保留的输出行数，超出时丢弃最早的行
+JOB_LOG_LINES = 20000
+
+# 跟随输出的请求等待新输出的间隔，守护进程停止时最迟这么久后返回
+_FOLLOW_WAIT = 1.0
+
+
+class RequestError(ValueError):
+    """无效请求，错误信息原样返回给客户端"""
+
+
+class _Task:
+    """作业中的一个脚本"""
+
+    def __init__(self, job, key, path):
+        self.job = job
+        self.key = key
+        self.path = path
+        self.name = os.path.splitext(os.path.basename(path))[0]
+        self.state = WAITING
+        self.returncode = None
+        self.elapsed = 0.0
+        self.handle = None
+        self.cancel_requested = False
+        self.queued_at = None
+
+    def to_dict(self):
+        return {'script': self.name, 'state': self.state, 'returncode': self.returncode,
+                'elapsed': round(self.elapsed, 3)}
+
+
+class _Job:
+    """一次 run 请求：按计划分阶段运行的一组脚本"""
+
+    def __init__(self, job_id, plan, index, options):
+        self.id = job_id
+        self.plan = plan
+        self.options = options
+        self.stages = [[_Task(self, key, index[key]) for key in stage] for stage in plan.stages]
+        self.tasks = [task for stage in self.stages for task in stage]
+        # 与 --run 相同：声明了 reboot-after 的脚本都成功后运行重启脚本
+        self.reboot = None
+        if plan.reboot and REBOOT_SCRIPT in index and all(task.key != REBOOT_SCRIPT for task in self.tasks):
+            self.reboot = _Task(self, REBOOT_SCRIPT, index[REBOOT_SCRIPT])
+            self.stages.append([self.reboot])
+            self.tasks.append(self.reboot)
+        self.stage = -1
+        self.failed = set()
+        self.cached = set()
+        self.cancel_requested = False
+        self.state = RUNNING
+        self.returncode = None
+        self.summary = None
+        self.submitted = time.time()
+        self.lines = []
+        self.dropped = 0
+
+    def to_dict(self):
+        return {'id': self.id, 'state': self.state, 'returncode': self.returncode, 'submitted': self.submitted,
+                'tasks': [task.to_dict() for task in self.tasks]}
+
+
+class Daemon:
+    """守护进程核心：名称索引、作业与调度，和传输层无关。
+
+    脚本目录有变化时 (只比较 mtime / size) 在下一个请求前重建索引。作业的各阶段
+    依次运行，阶段内的脚本交给共享的 TaskScheduler，全局最多同时运行 max_parallel 个；
+    依赖失败时跳过后续依赖它的脚本，结果缓存与 --run 相同。守护进程已提权，脚本总是
+    以 -NoAdmin 运行。command_builder 与 build_script_command 的签名相同，测试时可替换。
+    """
+
+    def __init__(self, max_parallel=DEFAULT_MAX_PARALLEL, command_builder=build_script_command, env=None):
+        self.scripts_dir = get_scripts_dir()
+        self.command_builder = command_builder
+        self.env = build_script_env() if env is None else env
+        self.runner = TaskRunner(self.env)
+        self.result_cache = open_result_cache()
+        self.started = time.time()
+        self._lock = threading.RLock()
+        self._changed = threading.Condition(self._lock)
+        self._index_lock = threading.Lock()
+        self._watcher = PollingWatcher(self.scripts_dir)
+        self._index = None
+        self._records = None
+        self._scheduler = TaskScheduler(max_parallel, on_start=self._on_start)
+        # 结果缓存的探测命令可能耗时数秒，不在调度器回调 (持有锁) 中运行
+        self._launcher = ThreadPoolExecutor(max_workers=max_parallel, thread_name_prefix='toolbox-launch')
+        self._jobs = {}
+        self._next_id = 1
+        self._closed = False
+        self._headless = False
+        self._refresh()
+
+    # ---- 脚本索引 ----
+
+    def _refresh(self):
+        """脚本目录有变化时重建名称索引和元数据记录，返回 (索引, 记录列表)"""
+        with self._index_lock:
+            diff = self._watcher.poll()
+            if self._index is None or diff.added or diff.removed or diff.changed:
+                self._index = build_name_index(self.scripts_dir)
+                self._records = list(iter_script_records())
+            return self._index, self._records
+
+    # ---- 请求 ----
+
+    def dispatch(self, request):
+        """处理一个请求，逐条产出响应消息；请求无效时抛出 RequestError"""
+        op = request.get('op')
+        handler = {
+            'ping': self.ping,
+            'list': self.list,
+            'run': self.run,
+            'status': self.status,
+            'cancel': self.cancel,
+        }.get(op)
+        if op == 'logs':
+            yield from self.logs(_job_id(request.get('job')), bool(request.get('follow', True)))
+        elif handler is not None:
+            fields = {k: v for k, v in request.items() if k not in ('v', 'token', 'op')}
+            try:
+                yield handler(**fields)
+            except TypeError as e:
+                raise RequestError(f'无效的参数: {e}') from e
+        else:
+            raise RequestError(f'未知的操作: {op}')
+
+    def ping(self):
+        index, _ = self._refresh()
+        with self._lock:
+            active = sum(1 for job in self._jobs.values() if job.state == RUNNING)
+        return {'ok': True, 'pid': os.getpid(), 'version': PROTOCOL_VERSION, 'started': self.started,
+                'scripts': len(index), 'active': active}
+
+    def list(self, format='text', filter=None, grep=None):
+        if format not in LIST_FORMATS:
+            raise RequestError(f'无效的格式: {format} (可选: {", ".join(LIST_FORMATS)})')
+        _, records = self._refresh()
+        out = StringIO()
+        err = StringIO()
+        if list_scripts(fmt=format, filter_text=filter, grep=grep, stream=out, records=records, errors=err):
+            raise RequestError(err.getvalue().strip().removeprefix('[ERROR] '))
+        return {'ok': True, 'output': out.getvalue()}
+
+    def run(self, scripts, headless=False, silent=False, force=False, timeout=None, fail_fast=False):
+        if not isinstance(scripts, list) or not scripts or not all(isinstance(name, str) for name in scripts):
+            raise RequestError('scripts 必须是非空的脚本名列表')
+        if timeout is not None and (not isinstance(timeout, (int, float)) or timeout <= 0):
+            raise RequestError(f'无效的超时: {timeout}')
+        index, _ = self._refresh()
+        out = StringIO()
+        planned = plan_scripts(scripts, index, out)
+        if planned is None:
+            raise RequestError(out.getvalue().rstrip().removeprefix('[ERROR] '))
+        plan, index = planned
+        options = {'headless': bool(headless), 'silent': bool(silent), 'force': bool(force), 'timeout': timeout,
+                   'fail_fast': bool(fail_fast)}
+        with self._lock:
+            if self._closed:
+                raise RequestError('守护进程正在停止')
+            job = _Job(self._next_id, plan, index, options)
+            self._headless = self._headless or job.options['headless']
+            self._next_id += 1
+            self._jobs[job.id] = job
+            self._prune_history()
+            self._advance(job)
+            return {'ok': True, 'job': job.to_dict()}
+
+    def status(self, job=None):
+        with self._lock:
+            jobs = [self._get_job(job)] if job is not None else list(self._jobs.values())
+            response = {'ok': True, 'jobs': [j.to_dict() for j in jobs]}
+        response['daemon'] = {k: v for k, v in self.ping().items() if k != 'ok'}
+        return response
+
+    def cancel(self, job):
+        """取消作业：排队中的脚本不再启动，运行中的脚本终止进程树，其余阶段跳过"""
+        with self._lock:
+            target = self._get_job(job)
+            if target.state == RUNNING:
+                self._cancel_job(target)
+            return {'ok': True, 'job': target.to_dict()}
+
+    def logs(self, job, follow=True):
+        """产出 job 事件、作业至今的全部输出行，follow 为 True 时继续产出新输出直到作业结束，最后产出 end 事件"""
+        with self._lock:
+            target = self._get_job(job)
+            yield {'ok': True, 'event': 'job', 'job': target.to_dict()}
+        position = 0
+        while True:
+            with self._changed:
+                while (follow and target.state == RUNNING and not self._closed
+                       and position >= target.dropped + len(target.lines)):
+                    self._changed.wait(_FOLLOW_WAIT)
+                start = max(position, target.dropped)
+                lines = target.lines[start - target.dropped:]
+                position = target.dropped + len(target.lines)
+                finished = target.state != RUNNING or not follow or self._closed
+                end = {'ok': True, 'event': 'end', 'state': target.state, 'returncode': target.returncode,
+                       'summary': target.summary}
+            for script, text in lines:
+                yield {'ok': True, 'event': 'output', 'script': script, 'text': text}
+            if finished:
+                yield end
+                return
+
+    # ---- 作业调度 (调用方持有 self._lock) ----
+
+    def _get_job(self, job_id):
+        job = self._jobs.get(_job_id(job_id))
+        if job is None:
+            raise RequestError(f'作业不存在: {job_id}')
+        return job
+
+    def _prune_history(self):
+        finished = [job_id for job_id, job in self._jobs.items() if job.state != RUNNING]
+        for job_id in finished[:max(0, len(finished) - JOB_HISTORY)]:
+            del self._jobs[job_id]
+
+    def _append(self, job, script, text):
+        for line in text.splitlines() or ['']:
+            job.lines.append((script, line.rstrip('\r')))
+        overflow = len(job.lines) - JOB_LOG_LINES
+        if overflow > 0:
+            del job.lines[:overflow]
+            job.dropped += overflow
+        self._changed.notify_all()
+
+    def _advance(self, job):
+        """当前阶段全部结束后启动下一阶段，没有剩余阶段时结束作业"""
+        while job.stage < 0 or all(task.state in _FINAL_STATES for task in job.stages[job.stage]):
+            job.stage += 1
+            if job.stage >= len(job.stages):
+                self._finish_job(job)
+                return
+            for task in job.stages[job.stage]:
+                if task is job.reboot:
+                    skip = bool(job.failed) or job.cancel_requested or not any(
+                        parse_script_header(t.path)[2].reboot_after for t in job.tasks if t.key not in job.cached)
+                else:
+                    skip = (job.cancel_requested or (job.options['fail_fast'] and job.failed)
+                            or bool(job.plan.requires.get(task.key, set()) & job.failed))
+                if skip:
+                    task.state = SKIPPED_STATE
+                    job.failed.add(task.key)
+                else:
+                    task.state = QUEUED
+                    task.queued_at = time.perf_counter()
+                    self._scheduler.submit((job.id, task.key), task)
+
+    def _finish_job(self, job):
+        results = [BatchResult(task.name, SKIPPED if task.state == SKIPPED_STATE else task.returncode, task.elapsed)
+                   for task in job.tasks]
+        job.returncode = aggregate_exit_code(results)
+        if job.cancel_requested:
+            job.state = CANCELLED
+            job.returncode = job.returncode or CANCELLED_EXIT_CODE
+        else:
+            job.state = FAILED if job.returncode else DONE
+        job.summary = format_summary(results) if len(results) > 1 else None
+        if self.result_cache is not None:
+            self.result_cache.save()
+        self._changed.notify_all()
+
+    def _cancel_job(self, job):
+        job.cancel_requested = True
+        for task in job.tasks:
+            if task.state == QUEUED:
+                self._scheduler.cancel((job.id, task.key))
+                self._task_done(task, CANCELLED, None)
+            elif task.state == RUNNING:
+                task.cancel_requested = True
+                if task.handle is not None:
+                    task.handle.cancel()
+        self._changed.notify_all()
+
+    def _task_done(self, task, state, returncode, elapsed=0.0):
+        job = task.job
+        task.state = state
+        task.returncode = returncode
+        task.elapsed = elapsed
+        task.handle = None
+        if self._scheduler.get((job.id, task.key)) is not None:
+            self._scheduler.finish((job.id, task.key), state in (DONE, CACHED))
+        if state not in (DONE, CACHED):
+            job.failed.add(task.key)
+        if state == CANCELLED:
+            # 与 --run 的 Ctrl+C 一致：一个脚本被取消时跳过作业中其余的脚本
+            job.cancel_requested = True
+        self._advance(job)
+        self._changed.notify_all()
+
+    def _on_start(self, scheduled):
+        # TaskScheduler 回调，调用方持有 self._lock
+        scheduled.payload.state = RUNNING
+        self._launcher.submit(self._launch, scheduled.payload)
+
+    # ---- 启动与结束 (启动线程 / 运行器线程) ----
+
+    def _launch(self, task):
+        job = task.job
+        options = job.options
+        directives = parse_script_header(task.path)[2]
+        # 缓存键不含 -Force，与 --run 相同
+        cache_args = build_script_args(options['headless'], options['silent'], False, True)
+        hit = None
+        if self.result_cache is not None and not options['force'] and task is not job.reboot:
+            hit = self.result_cache.lookup(task.path, cache_args, directives)
+        with self._lock:
+            if task.cancel_requested or self._closed:
+                self._task_done(task, CANCELLED, None)
+                return
+            if hit:
+                self._append(job, task.name, format_cached_run(hit))
+                job.cached.add(task.key)
+                self._task_done(task, CACHED, 0)
+                return
+            command = self.command_builder(task.path, options['headless'], options['silent'], options['force'], True)
+            limit = options['timeout'] if options['timeout'] is not None else directives.timeout
+            decoder = StreamDecoder()
+            meter = OutputMeter()
+            started_at = time.time()
+            start = time.perf_counter()
+
+            def on_output(raw):
+                meter.add(len(raw))
+                text = decoder.decode(raw)
+                with self._lock:
+                    self._append(job, task.name, text)
+
+            def on_finished(result):
+                tail = decoder.flush()
+                record_run(task.name, command, started_at, result.elapsed, result.returncode, meter,
+                           queue_wait=start - task.queued_at, source='daemon')
+                if self.result_cache is not None and result.returncode is not None:
+                    self.result_cache.record(task.path, cache_args, directives, result.returncode)
+                with self._lock:
+                    if tail:
+                        self._append(job, task.name, tail)
+                    if result.status == TIMEOUT:
+                        self._append(job, task.name, f'[TIMEOUT] 运行超过 {limit:g} 秒，已终止')
+                    elif result.status == CANCELLED and result.returncode is not None:
+                        self._append(job, task.name, '[CANCELLED] 已取消')
+                    self._task_done(task, result.status, result.returncode, result.elapsed)
+
+            try:
+                task.handle = self.runner.submit(f'{job.id}:{task.name}', command, on_output, on_finished,
+                                                 timeout=limit)
+            except ExecutorError as e:
+                self._append(job, task.name, f'[ERROR] {e}')
+                self._task_done(task, FAILED, 1)
+
+    def close(self):
+        """取消所有作业并停止运行器；运行中的脚本终止进程树"""
+        with self._lock:
+            self._closed = True
+            for job in self._jobs.values():
+                if job.state == RUNNING:
+                    self._cancel_job(job)
+        self._launcher.shutdown(wait=True)
+        # 运行器的结束回调需要获取 self._lock，不能在持有锁时关闭
+        self.runner.close()
+        with self._lock:
+            if self.result_cache is not None:
+                self.result_cache.save()
+            self._changed.notify_all()
+        # 与 --run 相同：运行过无头模式的脚本时清理临时目录
+        if self._headless:
+            cleanup_tmp_dir()
+
+
+def _job_id(value):
+    if isinstance(value, bool) or not isinstance(value, int):
+        raise RequestError(f'无效的作业编号: {value}')
+    return value
+
+
+# ---------------------------------------------------------------------------
+# 传输层
+# ---------------------------------------------------------------------------
+
+class _Handler(socketserver.StreamRequestHandler):
+    """每个连接一个请求：读取一行 JSON，写回一条或多条 JSON 行"""
+
+    def handle(self):
+        server = self.server
+        try:
+            line = self.rfile.readline(MAX_MESSAGE + 1)
+            if len(line) > MAX_MESSAGE:
+                raise RequestError('请求过大')
+            try:
+                request = json.loads(line)
+            except ValueError as e:
+                raise RequestError(f'无效的 JSON: {e}') from e
+            if not isinstance(request, dict):
+                raise RequestError('请求必须是 JSON 对象')
+            if not hmac.compare_digest(str(request.get('token', '')).encode(), server.token.encode()):
+                raise RequestError('令牌无效')
+            if request.get('v') != PROTOCOL_VERSION:
+                raise RequestError(f'协议版本不符: {request.get("v")} (守护进程为 {PROTOCOL_VERSION})')
+            if request.get('op') == 'shutdown':
+                self._write({'ok': True})
+                server.owner.shutdown()
+                return
+            for message in server.daemon.dispatch(request):
+                self._write(message)
+        except OSError:
+            # 客户端断开连接 (例如跟随输出时按下 Ctrl+C)
+            pass
+        except RequestError as e:
+            self._write({'ok': False, 'error': str(e)})
+        except Exception as e:
+            self._write({'ok': False, 'error': f'守护进程内部错误: {e}'})
+            raise
+
+    def _write(self, message):
+        self.wfile.write(encode_message(message))
+        self.wfile.flush()
+
+
+class _TCPServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    daemon_threads = True
+    allow_reuse_address = False
+
+
+if hasattr(socketserver, 'UnixStreamServer'):
+    class _UnixServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+        daemon_threads = True
+
+
+def _is_running(state):
+    try:
+        DaemonClient(state, timeout=1).request('ping')
+    except DaemonError:
+        return False
+    return True
+
+
+def _socket_path(state_path):
+    """状态文件旁的 .sock 文件；路径超过 AF_UNIX 的长度限制时改用临时目录"""
+    path = os.path.splitext(os.path.abspath(state_path))[0] + '.sock'
+    if len(os.fsencode(path)) < 100:
+        return path
+    digest = hashlib.sha256(os.fsencode(path)).hexdigest()[:16]
+    return os.path.join(tempfile.gettempdir(), f'toolbox-{digest}.sock')
+
+
+def _restrict_to_owner(path):
+    """Windows 上 mode 位不限制其他用户读取：移除继承的 ACL，只授予当前用户 (按 SID) 完全控制"""
+    try:
+        whoami = subprocess.run(['whoami', '/user', '/fo', 'csv', '/nh'], capture_output=True, text=True,
+                                errors='replace', check=True)
+        sid = whoami.stdout.strip().rsplit(',', 1)[1].strip('"')
+        subprocess.run(['icacls', path, '/inheritance:r', '/grant:r', f'*{sid}:F'],
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+    except (OSError, IndexError, subprocess.SubprocessError) as e:
+        raise DaemonError(f'无法限制状态文件的访问权限: {e}') from e
+
+
+def _write_state(path, state):
+    """原子写入状态文件，令牌只对当前用户可见：POSIX 上权限为 0600，Windows 上先把空文件的
+    ACL 限制为当前用户 (_restrict_to_owner) 再写入令牌"""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = f'{path}.tmp'
+    # 不复用残留的临时文件：它可能带有其他用户的 ACL
+    try:
+        os.remove(tmp_path)
+    except OSError:
+        pass
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    if sys.platform == 'win32':
+        os.close(fd)
+        try:
+            _restrict_to_owner(tmp_path)
+        except DaemonError:
+            os.remove(tmp_path)
+            raise
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_TRUNC)
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        json.dump(state, f)
+    os.replace(tmp_path, path)
+
+
+class DaemonServer:
+    """在本地套接字上为 Daemon 提供 JSON 行协议服务，同一状态文件只允许一个实例。
+
+    有 AF_UNIX 时监听状态文件旁的 .sock 文件 (权限 0600)；Windows 上的 CPython 不支持
+    AF_UNIX，改为监听 127.0.0.1 的随机端口。地址和随机令牌写入只有当前用户可读的状态
+    文件，每个请求都须携带令牌。已有实例在运行时抛出 DaemonError。
+
+    令牌区分的是用户而不是权限级别：当前用户的任何进程 (包括未提权的) 都能读取令牌，
+    经守护进程以管理员身份运行脚本目录中的脚本。
+    """
+
+    def __init__(self, daemon, state_path=None):
+        self.daemon = daemon
+        self.state_path = state_path or get_state_path()
+        existing = read_state(self.state_path)
+        if existing is not None and _is_running(existing):
+            raise DaemonError(f'守护进程已在运行 (pid {existing.get("pid")})')
+        self.token = secrets.token_hex(32)
+        self.socket_path = None
+        if hasattr(socket, 'AF_UNIX'):
+            self.socket_path = _socket_path(self.state_path)
+            self._server = self._bind_unix(self.socket_path)
+            address = self.socket_path
+        else:
+            self._server = _TCPServer(('127.0.0.1', 0), _Handler)
+            address = list(self._server.server_address)
+        self._server.daemon = daemon
+        self._server.token = self.token
+        self._server.owner = self
+        self.state = {'pid': os.getpid(), 'version': PROTOCOL_VERSION, 'family': 'unix' if self.socket_path else 'tcp',
+                      'address': address, 'token': self.token}
+        _write_state(self.state_path, self.state)
+
+    def _bind_unix(self, path):
+        try:
+            server = _UnixServer(path, _Handler)
+        except OSError as e:
+            if e.errno != errno.EADDRINUSE:
+                raise
+            # 套接字文件仍在：能连上说明另一个实例正在监听，否则是上次异常退出留下的
+            probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                probe.connect(path)
+            except OSError:
+                os.unlink(path)
+            else:
+                raise DaemonError(f'守护进程已在监听 {path}') from e
+            finally:
+                probe.close()
+            server = _UnixServer(path, _Handler)
+        os.chmod(path, 0o600)
+        return server
+
+    @property
+    def address(self):
+        return self.state['address']
+
+    def serve_forever(self):
+        self._server.serve_forever(poll_interval=0.5)
+
+    def shutdown(self):
+        """请求停止 serve_forever (可在处理请求的线程中调用)"""
+        threading.Thread(target=self._server.shutdown, daemon=True).start()
+
+    def close(self):
+        """关闭监听套接字、停止守护进程并删除状态文件"""
+        self._server.server_close()
+        self.daemon.close()
+        state = read_state(self.state_path)
+        if state is not None and state.get('token') == self.token:
+            try:
+                os.remove(self.state_path)
+            except OSError:
+                pass
+        if self.socket_path:
+            try:
+                os.unlink(self.socket_path)
+            except OSError:
+                pass
+
+
+def run_daemon(max_parallel=DEFAULT_MAX_PARALLEL, state_path=None):
+    """在前台运行守护进程，直到收到 shutdown 请求 (--stop-daemon) 或 Ctrl+C，返回退出码"""
+    daemon = Daemon(max_parallel)
+    try:
+        server = DaemonServer(daemon, state_path)
+    except (DaemonError, OSError) as e:
+        daemon.close()
+        print(f"[ERROR] {e}")
+        return 1
+    print(f"[守护进程] 已启动 (pid {os.getpid()})，监听 {server.address}，脚本 {daemon.ping()['scripts']} 个")
+    print("[守护进程] 使用 --stop-daemon 或 Ctrl+C 停止")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+    print("[守护进程] 已停止")
+    return 0
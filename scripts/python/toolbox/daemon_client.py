@@ -0,0 +1,301 @@
+# toolbox - Windows 工具箱核心模块
+# 守护进程客户端模块：经本地套接字以 JSON 行协议访问 --daemon 进程。
+# 只依赖标准库，转发请求时不导入工具箱的其余模块，也无需扫描脚本或提权
+
+import os
+import sys
+import json
+import signal
+import socket
+import argparse
+import threading
+
+# 守护进程状态文件 (地址、令牌、pid) 的路径；未设置时为 cache/daemon.json
+DAEMON_ENV = 'TOOLBOX_DAEMON'
+
+# 请求与响应中的 v 字段，不兼容的修改时递增
+PROTOCOL_VERSION = 1
+
+# 连接和普通请求的超时秒数；跟随输出时不限时
+REQUEST_TIMEOUT = 5
+
+# 跟随输出时套接字的轮询间隔，保证 Windows 上 Ctrl+C 能及时打断等待
+_POLL_INTERVAL = 0.2
+
+# 单条请求的最大字节数
+MAX_MESSAGE = 1024 * 1024
+
+
+class DaemonError(Exception):
+    """守护进程返回错误"""
+
+
+class DaemonUnavailable(DaemonError):
+    """无法连接守护进程 (未运行、状态文件过期) 或连接中断"""
+
+
+def get_state_path():
+    """状态文件路径。目录与 utils.get_cache_dir 相同，但不导入 utils"""
+    value = os.environ.get(DAEMON_ENV)
+    if value:
+        return value
+    if hasattr(sys, '_MEIPASS'):
+        base_dir = sys._MEIPASS
+    else:
+        base_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+    return os.path.join(base_dir, 'cache', 'daemon.json')
+
+
+def read_state(path=None):
+    """读取状态文件，缺失或损坏时返回 None"""
+    try:
+        with open(path or get_state_path(), 'r', encoding='utf-8') as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if isinstance(state, dict) and 'address' in state and 'token' in state:
+        return state
+    return None
+
+
+def encode_message(message):
+    """一条消息编码为一行 JSON (仅含 ASCII 字符)"""
+    return (json.dumps(message) + '\n').encode('ascii')
+
+
+def _connect(state, timeout):
+    if state.get('family') == 'unix':
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        address = state['address']
+    else:
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        address = tuple(state['address'])
+    sock.settimeout(timeout)
+    try:
+        sock.connect(address)
+    except OSError:
+        sock.close()
+        raise
+    return sock
+
+
+def _read_messages(sock, poll=False):
+    """逐条产出连接上收到的消息，对端关闭连接时结束。poll 为 True 时读取超时后继续等待"""
+    buffer = b''
+    while True:
+        try:
+            chunk = sock.recv(64 * 1024)
+        except socket.timeout:
+            if poll:
+                continue
+            raise
+        if not chunk:
+            return
+        *lines, buffer = (buffer + chunk).split(b'\n')
+        for line in lines:
+            if line.strip():
+                yield json.loads(line)
+
+
+class DaemonClient:
+    """守护进程客户端，每个请求使用一个新连接。
+
+    request() 返回单条响应；stream() 逐条产出响应 (logs 请求)，不限时。
+    守护进程返回 ok=false 时抛出 DaemonError，无法连接时抛出 DaemonUnavailable。
+    """
+
+    def __init__(self, state, timeout=REQUEST_TIMEOUT):
+        self.state = state
+        self.timeout = timeout
+
+    @classmethod
+    def open(cls, path=None, timeout=REQUEST_TIMEOUT):
+        """状态文件存在时返回客户端，否则返回 None (不检查守护进程是否仍在运行)"""
+        state = read_state(path)
+        return cls(state, timeout) if state is not None else None
+
+    def _send(self, op, fields):
+        message = dict(fields, v=PROTOCOL_VERSION, token=self.state['token'], op=op)
+        try:
+            sock = _connect(self.state, self.timeout)
+            sock.sendall(encode_message(message))
+        except OSError as e:
+            raise DaemonUnavailable(f'无法连接守护进程: {e}') from e
+        return sock
+
+    def _messages(self, sock, poll):
+        try:
+            for message in _read_messages(sock, poll):
+                if not message.get('ok', True):
+                    raise DaemonError(message.get('error') or '守护进程返回了未知错误')
+                yield message
+        except (OSError, ValueError) as e:
+            raise DaemonUnavailable(f'与守护进程的连接中断: {e}') from e
+
+    def request(self, op, **fields):
+        with self._send(op, fields) as sock:
+            for message in self._messages(sock, poll=False):
+                return message
+        raise DaemonUnavailable('守护进程未返回响应')
+
+    def stream(self, op, **fields):
+        with self._send(op, fields) as sock:
+            sock.settimeout(_POLL_INTERVAL)
+            yield from self._messages(sock, poll=True)
+
+
+# ---------------------------------------------------------------------------
+# 命令行转发：与 cli.parse_arguments 中同名的参数保持一致
+# ---------------------------------------------------------------------------
+
+class _ForwardParser(argparse.ArgumentParser):
+    def error(self, message):
+        raise ValueError(message)
+
+
+def _forward_parser():
+    parser = _ForwardParser(add_help=False, allow_abbrev=False)
+    parser.add_argument('--list', '-l', action='store_true')
+    parser.add_argument('--format', default='text')
+    parser.add_argument('--filter')
+    parser.add_argument('--grep')
+    parser.add_argument('--run', '-r')
+    parser.add_argument('--headless', action='store_true')
+    parser.add_argument('--silent', '-s', action='store_true')
+    parser.add_argument('--force', '-f', action='store_true')
+    parser.add_argument('--timeout', type=float)
+    parser.add_argument('--fail-fast', action='store_true')
+    parser.add_argument('--detach', action='store_true')
+    # 守护进程已提权，--no-admin 没有意义但允许出现
+    parser.add_argument('--no-admin', action='store_true')
+    parser.add_argument('--status', nargs='?', type=int, const=0)
+    parser.add_argument('--logs', type=int)
+    parser.add_argument('--cancel', type=int)
+    parser.add_argument('--stop-daemon', action='store_true')
+    return parser
+
+
+def forward_to_daemon(argv, state_path=None, stream=None):
+    """守护进程在运行且 argv 可由它处理时转发请求并返回退出码，否则返回 None 交由本地处理。
+
+    可转发 --list、--run (--headless / --silent / --force / --timeout / --fail-fast / --detach)
+    以及只能由守护进程处理的 --status / --logs / --cancel / --stop-daemon；--plan、--manifest、
+    --jobs 等其余参数在本地处理。--daemon 和 --no-daemon 总是在本地处理。
+    """
+    if '--daemon' in argv or '--no-daemon' in argv:
+        return None
+    state = read_state(state_path)
+    if state is None:
+        return None
+    try:
+        args, rest = _forward_parser().parse_known_args(argv)
+    except ValueError:
+        return None
+    if rest or not (args.list or args.run or args.status is not None or args.logs or args.cancel or args.stop_daemon):
+        return None
+
+    stream = stream or sys.stdout
+    client = DaemonClient(state)
+    try:
+        if args.list:
+            return _list(client, args, stream)
+        if args.run:
+            return _run(client, args, stream)
+        if args.logs:
+            return _follow(client, args.logs, stream)
+        if args.cancel:
+            client.request('cancel', job=args.cancel)
+            print(f"[守护进程] 已请求取消作业 {args.cancel}", file=stream)
+            return 0
+        if args.stop_daemon:
+            client.request('shutdown')
+            print("[守护进程] 正在停止", file=stream)
+            return 0
+        return _status(client, args, stream)
+    except DaemonUnavailable:
+        # 状态文件过期 (守护进程已退出)：由本地处理。作业提交之后的连接中断由 _follow 报告，不会走到这里
+        return None
+    except DaemonError as e:
+        print(f"[ERROR] {e}", file=sys.stderr)
+        return 1
+
+
+def _list(client, args, stream):
+    response = client.request('list', format=args.format, filter=args.filter, grep=args.grep)
+    stream.write(response['output'])
+    stream.flush()
+    return 0
+
+
+def _run(client, args, stream):
+    names = [name.strip() for name in args.run.split(',') if name.strip()]
+    response = client.request('run', scripts=names, headless=args.headless, silent=args.silent, force=args.force,
+                              timeout=args.timeout, fail_fast=args.fail_fast)
+    job = response['job']
+    if args.detach:
+        # 只输出作业编号，供编排脚本之后使用 --logs / --status / --cancel
+        print(job['id'], file=stream)
+        return 0
+    if not args.silent:
+        print(f"[守护进程] 作业 {job['id']}: {', '.join(task['script'] for task in job['tasks'])}", file=stream)
+    return _follow(client, job['id'], stream, accepted=True)
+
+
+def _follow(client, job_id, stream, accepted=False):
+    """跟随作业输出直到结束，返回作业的退出码。第一次 Ctrl+C 取消作业，第二次立即退出。
+
+    作业已被守护进程接受 (accepted 为 True 或已收到消息) 后连接中断时报告错误并返回 1，
+    而不是抛出 DaemonUnavailable 交由本地处理：否则同一批脚本会在本地再运行一次。
+    """
+    interrupted = threading.Event()
+
+    def handler(signum, frame):
+        if interrupted.is_set():
+            raise KeyboardInterrupt
+        interrupted.set()
+        print('\n[INFO] 正在取消守护进程中的作业... (再按一次 Ctrl+C 立即退出)', file=sys.stderr, flush=True)
+        try:
+            client.request('cancel', job=job_id)
+        except DaemonError:
+            pass
+
+    previous = None
+    if threading.current_thread() is threading.main_thread():
+        previous = signal.signal(signal.SIGINT, handler)
+    try:
+        width = 0
+        for message in client.stream('logs', job=job_id, follow=True):
+            accepted = True
+            event = message.get('event')
+            if event == 'job':
+                width = max((len(task['script']) for task in message['job']['tasks']), default=0)
+            elif event == 'output':
+                stream.write(f"[{message['script']:<{width}}] {message['text']}\n")
+                stream.flush()
+            elif event == 'end':
+                if message.get('summary'):
+                    print(message['summary'], file=stream)
+                return message['returncode']
+        raise DaemonUnavailable('守护进程在作业结束前关闭了连接')
+    except DaemonUnavailable as e:
+        if not accepted:
+            raise
+        print(f"[ERROR] {e}，作业 {job_id} 可能仍在守护进程中运行 (使用 --status 查看)", file=sys.stderr)
+        return 1
+    finally:
+        if previous is not None:
+            signal.signal(signal.SIGINT, previous)
+
+
+def _status(client, args, stream):
+    response = client.request('status', job=args.status or None)
+    if args.format != 'text':
+        print(json.dumps(response['jobs'], indent=2 if args.format == 'json' else None), file=stream)
+        return 0
+    daemon = response['daemon']
+    print(f"守护进程 pid {daemon['pid']}，脚本 {daemon['scripts']} 个，运行中作业 {daemon['active']} 个", file=stream)
+    for job in response['jobs']:
+        code = '-' if job['returncode'] is None else job['returncode']
+        tasks = ', '.join(f"{task['script']} ({task['state']})" for task in job['tasks'])
+        print(f"  {job['id']:>4}  {job['state']:<10}{code!s:>4}  {tasks}", file=stream)
+    return 0
@@ -0,0 +1,83 @@
+# toolbox - Windows 工具箱核心模块
+# 子进程输出的增量解码模块：跨读取边界保留不完整的多字节序列
+
+import sys
+import codecs
+import locale
+
+_UTF8_BOM = codecs.BOM_UTF8
+
+
+def detect_console_encoding():
+    """返回控制台输出代码页对应的编码名，无法获取时返回系统首选编码。"""
+    if sys.platform == 'win32':
+        try:
+            import ctypes
+            codepage = ctypes.windll.kernel32.GetConsoleOutputCP()
+            if codepage:
+                name = 'utf-8' if codepage == 65001 else f'cp{codepage}'
+                codecs.lookup(name)
+                return name
+        except (AttributeError, OSError, LookupError):
+            pass
+    return locale.getpreferredencoding(False) or 'utf-8'
+
+
+class StreamDecoder:
+    """按进程维护的增量解码器。
+
+    编码只判定一次：显式指定时直接使用；否则在出现第一个非 ASCII 字节
+    时检查是否为合法 UTF-8，不是则使用 fallback（默认取控制台代码页）。
+    判定前的纯 ASCII 输出在任何候选编码下结果一致，可直接解码。
+    """
+
+    def __init__(self, encoding=None, fallback=None, errors='replace'):
+        self.errors = errors
+        self.fallback = fallback
+        self.encoding = None
+        self._decoder = None
+        self._head = b''
+        if encoding:
+            self._set_encoding(encoding)
+
+    def _set_encoding(self, encoding):
+        self.encoding = codecs.lookup(encoding).name
+        self._decoder = codecs.getincrementaldecoder(encoding)(errors=self.errors)
+
+    def _detect(self, data, final):
+        """在首次出现非 ASCII 字节时确定编码并解码；仍无法判定时暂存字节。"""
+        if data.startswith(_UTF8_BOM):
+            self._set_encoding('utf-8')
+            return self._decoder.decode(data[len(_UTF8_BOM):], final)
+        # BOM 可能被拆在两次读取之间
+        if data and not final and len(data) < len(_UTF8_BOM) and _UTF8_BOM.startswith(data):
+            self._head = data
+            return ''
+        if data.isascii():
+            return data.decode('ascii')
+
+        try:
+            text = codecs.getincrementaldecoder('utf-8')().decode(data, final)
+        except UnicodeDecodeError:
+            self._set_encoding(self.fallback or detect_console_encoding())
+            return self._decoder.decode(data, final)
+
+        if text.isascii() and not final:
+            # 非 ASCII 字节只有结尾一个被截断的序列，无法区分 UTF-8 与双字节编码，等待后续数据
+            first = next(i for i, b in enumerate(data) if b >= 0x80)
+            self._head = data[first:]
+            return data[:first].decode('ascii')
+        self._set_encoding('utf-8')
+        return self._decoder.decode(data, final)
+
+    def decode(self, data, final=False):
+        """解码一段字节；不完整的尾部序列保留到下次调用（final=True 时输出替换字符）。"""
+        if self._decoder is None:
+            data = self._head + data
+            self._head = b''
+            return self._detect(data, final)
+        return self._decoder.decode(data, final)
+
+    def flush(self):
+        """结束流，返回缓冲中剩余的字符。"""
+        return self.decode(b'', final=True)
@@ -0,0 +1,104 @@
+# toolbox - Windows 工具箱核心模块
+# 脚本发现模块：单次 os.scandir 遍历
+
+import os
+import difflib
+import fnmatch
+
+# 支持的脚本扩展名，按同名文件的保留优先级排序
+SCRIPT_EXTENSIONS = ('.ps1', '.bat', '.cmd')
+
+_EXT_RANK = {ext: rank for rank, ext in enumerate(SCRIPT_EXTENSIONS)}
+
+
+def _matches(rel_path, name, patterns):
+    """rel_path 或文件名匹配任一 glob 模式即返回 True。"""
+    return any(fnmatch.fnmatch(rel_path, p) or fnmatch.fnmatch(name, p) for p in patterns)
+
+
+def discover_scripts(root, max_depth=1, include=None, exclude=None):
+    """单次遍历 root，返回去重后的脚本 os.DirEntry 列表。
+
+    同一目录下同名的脚本按 .ps1 > .bat > .cmd 只保留一个，优先级直接
+    由遍历时的分组字典判断，不额外调用 stat。
+
+    max_depth: 最大子目录深度，0 表示仅扫描 root 本身，None 表示不限制。
+    include / exclude: 相对于 root 的 glob 模式列表（也匹配文件名），
+    exclude 同时作用于目录以剪枝整个子树。
+    """
+    root = os.path.abspath(root)
+    include = list(include or ())
+    exclude = list(exclude or ())
+
+    # (目录, 小写文件名主干) -> DirEntry
+    groups = {}
+    stack = [(root, '', 0)]
+    while stack:
+        dirpath, rel_dir, depth = stack.pop()
+        try:
+            it = os.scandir(dirpath)
+        except OSError:
+            continue
+        with it:
+            for entry in it:
+                # 与 glob 一致，忽略隐藏文件和目录
+                if entry.name.startswith('.'):
+                    continue
+                rel_path = f'{rel_dir}/{entry.name}' if rel_dir else entry.name
+                if exclude and _matches(rel_path, entry.name, exclude):
+                    continue
+                try:
+                    is_dir = entry.is_dir()
+                except OSError:
+                    continue
+                if is_dir:
+                    if max_depth is None or depth < max_depth:
+                        stack.append((entry.path, rel_path, depth + 1))
+                    continue
+
+                stem, ext = os.path.splitext(entry.name)
+                rank = _EXT_RANK.get(ext.lower())
+                if rank is None:
+                    continue
+                if include and not _matches(rel_path, entry.name, include):
+                    continue
+
+                key = (dirpath, stem.lower())
+                current = groups.get(key)
+                if current is None or rank < _EXT_RANK[os.path.splitext(current.name)[1].lower()]:
+                    groups[key] = entry
+
+    return list(groups.values())
+
+
+def build_name_index(root, **kwargs):
+    """构建 小写文件名主干 -> 脚本路径 的索引，只读取目录项，不打开任何文件。
+
+    不同目录下出现同名脚本时保留路径排序靠前的一个。kwargs 透传给 discover_scripts。
+    """
+    index = {}
+    for path in sorted(entry.path for entry in discover_scripts(root, **kwargs)):
+        index.setdefault(os.path.splitext(os.path.basename(path))[0].lower(), path)
+    return index
+
+
+def normalize_script_name(name):
+    """将用户输入的脚本名规范化为索引键（去掉目录、已知扩展名并转小写）。"""
+    stem, ext = os.path.splitext(os.path.basename(name.strip()))
+    if ext.lower() not in _EXT_RANK:
+        stem = os.path.basename(name.strip())
+    return stem.lower()
+
+
+def suggest_names(name, index, limit=5):
+    """为未命中的脚本名给出候选：先按前缀/子串匹配，再用 difflib 模糊匹配。"""
+    key = normalize_script_name(name)
+    if not key:
+        return []
+    names = sorted(index)
+    suggestions = [n for n in names if n.startswith(key)]
+    suggestions += [n for n in names if key in n and n not in suggestions]
+    for match in difflib.get_close_matches(key, names, n=limit, cutoff=0.5):
+        if match not in suggestions:
+            suggestions.append(match)
+    return [os.path.splitext(os.path.basename(index[n]))[0] for n in suggestions[:limit]]
@@ -0,0 +1,258 @@
+# toolbox - Windows 工具箱核心模块
+# 持久化下载缓存模块：按 SHA-256 内容寻址，URL 索引 + LRU 容量上限
+
+import os
+import sys
+import json
+import time
+import shutil
+import hashlib
+import threading
+import contextlib
+
+from .utils import get_base_dir, get_cache_dir, sha256_file
+from .downloader import DownloadFailed, download
+
+# 脚本通过以下环境变量找到缓存目录和取用缓存的命令行助手
+CACHE_DIR_ENV = 'TOOLBOX_CACHE_DIR'
+CACHE_MAX_MB_ENV = 'TOOLBOX_CACHE_MAX_MB'
+PYTHON_ENV = 'TOOLBOX_PYTHON'
+MAIN_ENV = 'TOOLBOX_MAIN'
+
+DOWNLOAD_CACHE_VERSION = 1
+DEFAULT_MAX_BYTES = 4 * 1024 ** 3
+
+# 索引锁超时与判定为残留锁的时间（秒）
+LOCK_TIMEOUT = 90
+LOCK_STALE = 60
+
+
+class DownloadError(Exception):
+    """下载失败或内容校验不通过"""
+
+
+@contextlib.contextmanager
+def _lock_file(path, timeout=LOCK_TIMEOUT, heartbeat=False):
+    """以 O_EXCL 创建锁文件实现跨进程互斥，超过 LOCK_STALE 秒未更新的锁视为残留。
+
+    timeout 为 None 时一直等待。heartbeat 为 True 时持有期间定期刷新锁文件的 mtime，
+    耗时较长的下载不会被其他进程当作残留锁删除。
+    """
+    deadline = None if timeout is None else time.monotonic() + timeout
+    while True:
+        try:
+            fd = os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            break
+        except FileExistsError:
+            try:
+                if time.time() - os.path.getmtime(path) > LOCK_STALE:
+                    os.remove(path)
+                    continue
+            except OSError:
+                continue
+            if deadline is not None and time.monotonic() > deadline:
+                raise DownloadError(f'等待下载缓存锁超时: {path}')
+            time.sleep(0.05)
+    os.close(fd)
+    stop = threading.Event()
+    if heartbeat:
+        def touch():
+            while not stop.wait(LOCK_STALE / 4):
+                with contextlib.suppress(OSError):
+                    os.utime(path)
+
+        threading.Thread(target=touch, name='toolbox-cache-lock', daemon=True).start()
+    try:
+        yield
+    finally:
+        stop.set()
+        with contextlib.suppress(OSError):
+            os.remove(path)
+
+
+class DownloadCache:
+    """内容寻址的下载缓存。
+
+    文件按 SHA-256 存放在 objects/<前两位>/<摘要> 下，index.json 记录
+    URL -> 摘要 的映射和每个对象的大小、最近使用时间。复用前重新计算摘要，
+    损坏的对象会被丢弃并重新下载。总大小超过 max_bytes 时按最近最少使用淘汰。
+    多个脚本可能同时使用缓存：索引的读写在索引锁保护下进行，同一 URL 的下载
+    和加入缓存在该 URL 的锁文件保护下进行，后到者等待并复用先到者的结果。
+    """
+
+    def __init__(self, root, max_bytes=DEFAULT_MAX_BYTES):
+        self.root = os.path.abspath(root)
+        self.max_bytes = max_bytes
+        self.index_path = os.path.join(self.root, 'index.json')
+        self._lock_path = os.path.join(self.root, 'index.lock')
+        # 本实例的命中与下载次数
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(self.root, exist_ok=True)
+
+    def object_path(self, sha256):
+        return os.path.join(self.root, 'objects', sha256[:2], sha256)
+
+    @contextlib.contextmanager
+    def _locked(self):
+        """获取索引锁并产出当前索引，正常退出时写回。"""
+        with _lock_file(self._lock_path):
+            index = self._load_index()
+            yield index
+            self._save_index(index)
+
+    def _url_tmp_path(self, url):
+        """URL 的下载临时文件路径 (不含扩展名)，同一 URL 中断后再次获取时续传"""
+        tmp_dir = os.path.join(self.root, 'tmp')
+        os.makedirs(tmp_dir, exist_ok=True)
+        return os.path.join(tmp_dir, hashlib.sha256(url.encode('utf-8')).hexdigest()[:32])
+
+    def _load_index(self):
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            data = None
+        if not isinstance(data, dict) or data.get('version') != DOWNLOAD_CACHE_VERSION:
+            data = {'version': DOWNLOAD_CACHE_VERSION, 'urls': {}, 'objects': {}}
+        return data
+
+    def _save_index(self, index):
+        tmp_path = f'{self.index_path}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(index, f, ensure_ascii=False)
+        os.replace(tmp_path, self.index_path)
+
+    def _forget(self, index, sha256):
+        """从索引和磁盘上移除一个对象。"""
+        index['objects'].pop(sha256, None)
+        for url in [u for u, h in index['urls'].items() if h == sha256]:
+            del index['urls'][url]
+        with contextlib.suppress(OSError):
+            os.remove(self.object_path(sha256))
+
+    def total_size(self):
+        with self._locked() as index:
+            return sum(obj['size'] for obj in index['objects'].values())
+
+    def lookup(self, url):
+        """返回 URL 对应的已缓存文件路径；未缓存或校验失败时返回 None。"""
+        with self._locked() as index:
+            sha256 = index['urls'].get(url)
+        if sha256 is None:
+            return None
+
+        # 校验在锁外进行，避免大文件阻塞其他脚本
+        path = self.object_path(sha256)
+        try:
+            valid = sha256_file(path) == sha256
+        except OSError:
+            valid = False
+
+        with self._locked() as index:
+            if not valid:
+                self._forget(index, sha256)
+                return None
+            if sha256 not in index['objects']:
+                return None
+            index['objects'][sha256]['used'] = time.time()
+        return path
+
+    def add_file(self, path, url=None, keep=False, sha256=None):
+        """将文件移入缓存（keep=True 时复制），返回其 SHA-256。已知摘要时可通过 sha256 传入。"""
+        sha256 = sha256 or sha256_file(path)
+        target = self.object_path(sha256)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        if keep:
+            shutil.copyfile(path, target)
+        else:
+            os.replace(path, target)
+        with self._locked() as index:
+            index['objects'][sha256] = {'size': os.path.getsize(target), 'used': time.time()}
+            if url:
+                index['urls'][url] = sha256
+            self._evict(index, protect=sha256)
+        return sha256
+
+    def _evict(self, index, protect=None):
+        """按最近使用时间淘汰对象，直到总大小不超过上限。"""
+        objects = index['objects']
+        total = sum(obj['size'] for obj in objects.values())
+        for sha256 in sorted(objects, key=lambda h: objects[h]['used']):
+            if total <= self.max_bytes:
+                break
+            if sha256 == protect:
+                continue
+            total -= objects[sha256]['size']
+            self._forget(index, sha256)
+
+    def _download(self, url, expected_sha256=None, **options):
+        """多连接下载到缓存目录下的临时文件，返回 (临时路径, 摘要)。
+
+        临时文件名由 URL 决定，中断后再次获取同一 URL 会续传；调用方须持有该 URL 的锁。
+        options 透传给 download。
+        """
+        tmp_path = self._url_tmp_path(url)
+        try:
+            # 给出期望摘要时由 download 校验 (没有 ETag / Last-Modified 的服务器也可续传)
+            download(url, tmp_path, sha256=expected_sha256, **options)
+        except DownloadFailed as e:
+            raise DownloadError(str(e)) from e
+        return tmp_path, expected_sha256.lower() if expected_sha256 else sha256_file(tmp_path)
+
+    def _lookup_expected(self, url, expected_sha256=None):
+        """lookup，指定了期望摘要时摘要不符的缓存对象视为未命中"""
+        path = self.lookup(url)
+        if path is not None and expected_sha256 and os.path.basename(path) != expected_sha256.lower():
+            return None
+        return path
+
+    def fetch(self, url, dest=None, expected_sha256=None, **options):
+        """取得 URL 对应的文件：命中缓存时直接复用，否则下载并加入缓存。
+
+        dest 不为空时复制到 dest 并返回 dest，否则返回缓存中的路径。
+        options（connections、retries、progress 等）透传给 download。
+        """
+        path = self._lookup_expected(url, expected_sha256)
+        if path is None:
+            # 同一 URL 同时只有一个下载 (跨线程和进程)；等待期间其他下载者可能已将其加入缓存
+            with _lock_file(f'{self._url_tmp_path(url)}.lock', timeout=None, heartbeat=True):
+                path = self._lookup_expected(url, expected_sha256)
+                if path is None:
+                    self.misses += 1
+                    tmp_path, sha256 = self._download(url, expected_sha256, **options)
+                    path = self.object_path(self.add_file(tmp_path, url, sha256=sha256))
+                else:
+                    self.hits += 1
+        else:
+            self.hits += 1
+        if dest:
+            os.makedirs(os.path.dirname(os.path.abspath(dest)), exist_ok=True)
+            shutil.copyfile(path, dest)
+            return dest
+        return path
+
+
+def get_download_cache_dir():
+    """下载缓存目录：优先使用 TOOLBOX_CACHE_DIR，否则为 cache/downloads"""
+    return os.environ.get(CACHE_DIR_ENV) or os.path.join(get_cache_dir(), 'downloads')
+
+
+def open_download_cache(max_bytes=None):
+    """按环境变量配置打开下载缓存（TOOLBOX_CACHE_MAX_MB 设置容量上限）"""
+    if max_bytes is None:
+        try:
+            max_bytes = int(os.environ[CACHE_MAX_MB_ENV]) * 1024 ** 2
+        except (KeyError, ValueError):
+            max_bytes = DEFAULT_MAX_BYTES
+    return DownloadCache(get_download_cache_dir(), max_bytes)
+
+
+def cache_environment():
+    """返回传递给脚本的缓存相关环境变量，脚本据此调用 main.py --cache-fetch"""
+    frozen = getattr(sys, 'frozen', False)
+    return {
+        CACHE_DIR_ENV: get_download_cache_dir(),
+        PYTHON_ENV: sys.executable,
+        MAIN_ENV: '' if frozen else os.path.join(get_base_dir(), 'main.py'),
+    }
@@ -0,0 +1,268 @@
+# toolbox - Windows 工具箱核心模块
+# 多连接下载模块：HTTP Range 分块并发下载、断点续传、指数退避重试
+
+import os
+import json
+import time
+import random
+import hashlib
+import threading
+import http.client
+import urllib.error
+import urllib.request
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+DEFAULT_CONNECTIONS = 4
+DEFAULT_CHUNK_SIZE = 4 * 1024 * 1024
+DEFAULT_RETRIES = 5
+BLOCK_SIZE = 64 * 1024
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+
+# 这些状态码视为暂时性错误，可以重试
+RETRY_STATUS = (408, 429, 500, 502, 503, 504)
+
+Progress = namedtuple('Progress', ['done', 'total', 'elapsed'])
+
+
+class DownloadFailed(Exception):
+    """下载在重试后仍然失败"""
+
+
+def backoff_delays(retries, base=0.5, cap=30.0, rng=random):
+    """产出 retries 个指数退避等待时间（full jitter：在 [0, min(cap, base * 2^n)] 中均匀取值）。"""
+    for attempt in range(retries):
+        yield rng.uniform(0, min(cap, base * 2 ** attempt))
+
+
+def _is_retryable(error):
+    if isinstance(error, urllib.error.HTTPError):
+        return error.code in RETRY_STATUS
+    return isinstance(error, (OSError, http.client.HTTPException))
+
+
+class _Request:
+    """带重试的 HTTP 请求，所有分块共用退避策略"""
+
+    def __init__(self, url, retries, timeout, sleep, rng):
+        self.url = url
+        self.retries = retries
+        self.timeout = timeout
+        self.sleep = sleep
+        self.rng = rng
+
+    def open(self, start=None, end=None):
+        headers = {'User-Agent': USER_AGENT}
+        if start is not None:
+            headers['Range'] = f'bytes={start}-{"" if end is None else end}'
+        request = urllib.request.Request(self.url, headers=headers)
+        return urllib.request.urlopen(request, timeout=self.timeout)
+
+    def run(self, action):
+        """执行 action()，暂时性错误按指数退避重试。"""
+        delays = backoff_delays(self.retries, rng=self.rng)
+        while True:
+            try:
+                return action()
+            except Exception as e:
+                if not _is_retryable(e):
+                    raise DownloadFailed(f'下载失败: {self.url}: {e}') from e
+                delay = next(delays, None)
+                if delay is None:
+                    raise DownloadFailed(f'下载失败 (已重试 {self.retries} 次): {self.url}: {e}') from e
+                self.sleep(delay)
+
+
+class _ProgressTracker:
+    def __init__(self, total, callback, interval):
+        self.done = 0
+        self.total = total
+        self._callback = callback
+        self._interval = interval
+        self._start = time.monotonic()
+        self._last = 0.0
+        self._lock = threading.Lock()
+
+    def add(self, n, force=False):
+        with self._lock:
+            self.done += n
+            now = time.monotonic()
+            if self._callback is None or (not force and now - self._last < self._interval):
+                return
+            self._last = now
+            progress = Progress(self.done, self.total, now - self._start)
+        self._callback(progress)
+
+
+def _parse_total(content_range):
+    """解析 'bytes 0-0/12345'，未知长度返回 None。"""
+    try:
+        total = content_range.rsplit('/', 1)[1]
+    except (AttributeError, IndexError):
+        return None
+    return int(total) if total.isdigit() else None
+
+
+class _PartState:
+    """断点续传状态：与 .part 文件并列保存的 .part.json，记录已完成的分块"""
+
+    def __init__(self, path, url, size, validator, chunk_size):
+        self.path = path
+        self.meta = {'url': url, 'size': size, 'validator': validator, 'chunk_size': chunk_size}
+        self.done = set()
+        self._lock = threading.Lock()
+
+    def load(self):
+        """读取已有的续传状态，与本次下载不匹配时忽略。"""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if isinstance(data, dict) and all(data.get(k) == v for k, v in self.meta.items()):
+            self.done = set(data.get('done', ()))
+
+    def mark_done(self, index):
+        with self._lock:
+            self.done.add(index)
+            tmp_path = f'{self.path}.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(dict(self.meta, done=sorted(self.done)), f)
+            os.replace(tmp_path, self.path)
+
+    def remove(self):
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+
+def _verify(path, url, sha256):
+    """校验 path 的 SHA-256，不符时删除文件并抛出 DownloadFailed"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(BLOCK_SIZE * 16), b''):
+            digest.update(block)
+    if digest.hexdigest() != sha256.lower():
+        os.remove(path)
+        raise DownloadFailed(f'SHA-256 校验失败: {url} (期望 {sha256}，实际 {digest.hexdigest()})')
+
+
+def download(url, out, connections=DEFAULT_CONNECTIONS, chunk_size=DEFAULT_CHUNK_SIZE,
+             retries=DEFAULT_RETRIES, timeout=60, progress=None, progress_interval=0.5,
+             sleep=time.sleep, rng=random, sha256=None):
+    """下载 url 到 out，返回文件大小。
+
+    服务器支持 Range 时按 chunk_size 分块、最多 connections 个连接并发下载，
+    已完成的分块记录在 out.part.json 中，中断后再次调用会跳过这些分块；
+    否则退化为单连接下载。每个请求遇到暂时性错误时按带抖动的指数退避重试。
+    续传要求服务器提供 ETag / Last-Modified 以确认远端文件未变，两者都没有时
+    从头下载，除非给出了 sha256 (下载完成后校验，不符时删除并抛出 DownloadFailed)。
+    progress(Progress) 至多每 progress_interval 秒回调一次，结束时必定回调。
+    """
+    part_path = f'{out}.part'
+    request = _Request(url, retries, timeout, sleep, rng)
+    os.makedirs(os.path.dirname(os.path.abspath(out)) or '.', exist_ok=True)
+
+    # 用 0-0 的 Range 请求探测总长度和 Range 支持；不支持时直接沿用该响应单连接下载
+    def probe():
+        try:
+            return request.open(0, 0)
+        except urllib.error.HTTPError as e:
+            # 空文件不满足任何 Range，按普通请求下载
+            if e.code != 416:
+                raise
+            return request.open()
+
+    response = request.run(probe)
+    with response:
+        total = _parse_total(response.headers.get('Content-Range')) if response.status == 206 else None
+        validator = response.headers.get('ETag') or response.headers.get('Last-Modified')
+        if total is None:
+            length = response.headers.get('Content-Length')
+            tracker = _ProgressTracker(int(length) if length and length.isdigit() else None, progress,
+                                       progress_interval)
+            size = _download_single(request, response if response.status == 200 else None, part_path, tracker)
+            tracker.add(0, force=True)
+            if sha256:
+                _verify(part_path, url, sha256)
+            os.replace(part_path, out)
+            return size
+
+    tracker = _ProgressTracker(total, progress, progress_interval)
+    state = _PartState(f'{part_path}.json', url, total, validator, chunk_size)
+    chunks = [(i, start, min(start + chunk_size, total) - 1) for i, start in enumerate(range(0, total, chunk_size))]
+    # 没有校验器时无法确认 .part 中的内容与远端一致，只有下载后会校验摘要才续传
+    resumable = validator is not None or sha256
+    if resumable and os.path.exists(part_path) and os.path.getsize(part_path) == total:
+        state.load()
+    else:
+        state.remove()
+        with open(part_path, 'wb') as f:
+            f.truncate(total)
+    tracker.add(sum(end - start + 1 for i, start, end in chunks if i in state.done))
+
+    def fetch_chunk(chunk):
+        index, start, end = chunk
+        offset = start
+
+        def attempt():
+            nonlocal offset
+            with request.open(offset, end) as resp, open(part_path, 'r+b') as f:
+                if resp.status != 206:
+                    raise DownloadFailed(f'服务器未按 Range 返回数据: {url}')
+                f.seek(offset)
+                while offset <= end:
+                    block = resp.read(min(BLOCK_SIZE, end - offset + 1))
+                    if not block:
+                        raise http.client.IncompleteRead(b'', end - offset + 1)
+                    f.write(block)
+                    offset += len(block)
+                    tracker.add(len(block))
+
+        request.run(attempt)
+        state.mark_done(index)
+
+    pending = [chunk for chunk in chunks if chunk[0] not in state.done]
+    if pending:
+        with ThreadPoolExecutor(max_workers=max(1, min(connections, len(pending)))) as executor:
+            for _ in executor.map(fetch_chunk, pending):
+                pass
+
+    tracker.add(0, force=True)
+    state.remove()
+    if sha256:
+        _verify(part_path, url, sha256)
+    os.replace(part_path, out)
+    return total
+
+
+def _download_single(request, response, part_path, tracker):
+    """单连接下载到 part_path；response 为已打开的完整响应时直接读取。"""
+    size = 0
+
+    def attempt():
+        nonlocal response, size
+        resp = response or request.open()
+        response = None
+        # 重试时从头下载，撤销上一次尝试计入的进度
+        tracker.add(-size)
+        size = 0
+        with resp, open(part_path, 'wb') as f:
+            for block in iter(lambda: resp.read(BLOCK_SIZE), b''):
+                f.write(block)
+                size += len(block)
+                tracker.add(len(block))
+
+    request.run(attempt)
+    return size
+
+
+def format_progress(progress):
+    """生成进度文本，例如 '45.2% 12.3/27.2 MB 5.1 MB/s'。"""
+    mb = 1024 * 1024
+    speed = progress.done / progress.elapsed / mb if progress.elapsed > 0 else 0.0
+    if progress.total:
+        return (f'{progress.done * 100 / progress.total:5.1f}% '
+                f'{progress.done / mb:.1f}/{progress.total / mb:.1f} MB {speed:.1f} MB/s')
+    return f'{progress.done / mb:.1f} MB {speed:.1f} MB/s'
@@ -0,0 +1,323 @@
+# toolbox - Windows 工具箱核心模块
+# 脚本执行后端模块：每次新建进程，或复用常驻的 shell 工作进程池
+
+import os
+import sys
+import uuid
+import base64
+import threading
+import subprocess
+from collections import namedtuple
+
+# 批量运行时交给执行后端的任务：脚本路径和参数列表
+ScriptJob = namedtuple('ScriptJob', ['script', 'args'])
+
+# 工作进程运行多少个任务后被替换，避免脚本残留的状态在任务之间累积
+DEFAULT_MAX_JOBS = 20
+
+# 关闭工作进程时等待其自行退出的秒数
+CLOSE_TIMEOUT = 5
+
+EXECUTOR_KINDS = ('process', 'host')
+
+
+class ExecutorError(Exception):
+    """执行后端无法运行任务 (进程启动失败、工作进程意外退出等)"""
+
+
+class Executor:
+    """执行后端基类。run(command, on_output) 运行一个任务，每行输出 (bytes) 回调一次，返回退出码。"""
+
+    def run(self, command, on_output):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+
+class ProcessExecutor(Executor):
+    """每个任务启动一个新进程。
+
+    command 为 argv 列表；为 ScriptJob 时通过 argv_builder(job) 转换为 argv。
+    """
+
+    def __init__(self, env=None, argv_builder=None):
+        self.env = env
+        self.argv_builder = argv_builder
+
+    def run(self, command, on_output):
+        argv = self.argv_builder(command) if isinstance(command, ScriptJob) else command
+        try:
+            process = subprocess.Popen(argv, env=self.env, shell=False,
+                                       stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+        except OSError as e:
+            raise ExecutorError(f'执行脚本时发生错误: {e}') from e
+        with process.stdout:
+            for raw in iter(process.stdout.readline, b''):
+                on_output(raw)
+        return process.wait()
+
+
+# ---------------------------------------------------------------------------
+# 常驻工作进程协议 (按行分帧，UTF-8)
+#
+#   工作进程 -> 工具箱  R                       就绪
+#   工具箱 -> 工作进程  J<TAB>令牌<TAB>脚本<TAB>参数...   运行一个任务
+#   工作进程 -> 工具箱  O <一行输出>            任务输出
+#   工作进程 -> 工具箱  E 令牌 退出码           任务结束
+#   工具箱 -> 工作进程  Q                       退出
+#
+# 任务字段不能包含制表符或换行。令牌每个任务随机生成，脚本输出无法伪造结束帧。
+# ---------------------------------------------------------------------------
+
+_SH_HOST = r'''
+tab=$(printf '\t')
+rc_file=$(mktemp)
+trap 'rm -f "$rc_file"' EXIT
+printf 'R\n'
+while IFS= read -r line; do
+    [ "$line" = Q ] && break
+    set -f
+    IFS=$tab
+    set -- $line
+    unset IFS
+    set +f
+    token=$2
+    script=$3
+    shift 3
+    { sh "$script" "$@" </dev/null 2>&1; echo $? >"$rc_file"; } |
+        while IFS= read -r out || [ -n "$out" ]; do printf 'O %s\n' "$out"; done
+    printf 'E %s %s\n' "$token" "$(cat "$rc_file")"
+done
+'''
+
+_POWERSHELL_HOST = r'''
+$ErrorActionPreference = 'Continue'
+[Console]::InputEncoding = New-Object System.Text.UTF8Encoding $false
+[Console]::OutputEncoding = New-Object System.Text.UTF8Encoding $false
+$out = [Console]::Out
+$out.WriteLine('R'); $out.Flush()
+while ($null -ne ($line = [Console]::In.ReadLine())) {
+    if ($line -eq 'Q') { break }
+    $parts = $line.Split("`t")
+    $token = $parts[1]
+    $named = @{}
+    $positional = @()
+    foreach ($arg in ($parts | Select-Object -Skip 3)) {
+        if ($arg -match '^-(\w+)$') { $named[$Matches[1]] = $true } else { $positional += $arg }
+    }
+    $global:LASTEXITCODE = 0
+    $code = 0
+    try {
+        & $parts[2] @named @positional *>&1 | ForEach-Object {
+            foreach ($text in ("$_" -split "\r?\n")) { $out.WriteLine("O $text") }
+            $out.Flush()
+        }
+        $code = $global:LASTEXITCODE
+    }
+    catch {
+        $out.WriteLine("O $($_.Exception.Message)")
+        $code = 1
+    }
+    $out.WriteLine("E $token $code"); $out.Flush()
+}
+'''
+
+
+def _encoded_command(script):
+    return base64.b64encode(script.encode('utf-16-le')).decode('ascii')
+
+
+# name: 后端名称；host_argv: 启动常驻工作进程的命令行；process_argv(job): 新建进程运行任务的命令行；
+# extensions: 工作进程可以运行的脚本扩展名，其余脚本退回到新建进程
+HostBackend = namedtuple('HostBackend', ['name', 'host_argv', 'process_argv', 'extensions'])
+
+POWERSHELL_BACKEND = HostBackend(
+    'powershell',
+    ['powershell.exe', '-NoProfile', '-NoLogo', '-NonInteractive', '-ExecutionPolicy', 'Bypass',
+     '-EncodedCommand', _encoded_command(_POWERSHELL_HOST)],
+    lambda job: ['powershell.exe', '-NoProfile', '-ExecutionPolicy', 'Bypass', '-File', job.script] + list(job.args),
+    ('.ps1',),
+)
+
+# 用于在 Linux 上测试进程池和协议的替身后端
+SH_BACKEND = HostBackend(
+    'sh',
+    ['/bin/sh', '-c', _SH_HOST],
+    lambda job: ['/bin/sh', job.script] + list(job.args),
+    ('.sh',),
+)
+
+
+def default_backend():
+    return POWERSHELL_BACKEND if sys.platform == 'win32' else SH_BACKEND
+
+
+class WorkerLost(ExecutorError):
+    """工作进程在任务结束前退出"""
+
+
+class _Worker:
+    """一个常驻工作进程"""
+
+    def __init__(self, argv, env):
+        try:
+            self.process = subprocess.Popen(argv, env=env, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                            stderr=subprocess.STDOUT)
+        except OSError as e:
+            raise ExecutorError(f'无法启动工作进程: {e}') from e
+        self.jobs = 0
+        ready = self.process.stdout.readline()
+        if ready.rstrip() != b'R':
+            self.kill()
+            raise ExecutorError(f'工作进程启动失败: {ready.decode("utf-8", "replace").strip()}')
+
+    def run(self, job, on_output):
+        fields = ['J', uuid.uuid4().hex, job.script] + list(job.args)
+        if any(('\t' in f) or ('\n' in f) or ('\r' in f) for f in fields):
+            raise ExecutorError(f'脚本路径或参数中不能包含制表符或换行: {job}')
+        end = f'E {fields[1]} '.encode('ascii')
+        self.jobs += 1
+        try:
+            self.process.stdin.write(('\t'.join(fields) + '\n').encode('utf-8'))
+            self.process.stdin.flush()
+        except OSError as e:
+            raise WorkerLost(f'工作进程已退出: {e}') from e
+        for line in iter(self.process.stdout.readline, b''):
+            if line.startswith(b'O '):
+                on_output(line[2:])
+            elif line.startswith(end):
+                try:
+                    return int(line[len(end):])
+                except ValueError:
+                    return 1
+            else:
+                # 协议之外的输出 (例如工作进程自身的错误信息) 原样转发
+                on_output(line)
+        raise WorkerLost('工作进程在任务结束前退出')
+
+    def close(self, timeout=CLOSE_TIMEOUT):
+        try:
+            self.process.stdin.write(b'Q\n')
+            self.process.stdin.close()
+            self.process.wait(timeout)
+        except (OSError, ValueError, subprocess.TimeoutExpired):
+            pass
+        self.kill()
+
+    def kill(self):
+        """结束工作进程 (已退出时不做任何事) 并关闭管道"""
+        try:
+            if self.process.poll() is None:
+                self.process.kill()
+                self.process.wait()
+        except OSError:
+            pass
+        for pipe in (self.process.stdin, self.process.stdout):
+            try:
+                pipe.close()
+            except OSError:
+                pass
+
+
+class WorkerPool(Executor):
+    """常驻工作进程池。
+
+    最多 size 个工作进程，按需启动，空闲时保留以供下一个任务复用，省去解释器
+    冷启动的时间 (脚本仍各自导入 Common.ps1)。工作进程运行 max_jobs 个任务后、任务失败后或
+    意外退出后被替换。扩展名不在 backend.extensions 中的脚本以及 argv 列表形式
+    的命令交给 fallback (默认为新建进程) 执行。
+    """
+
+    def __init__(self, backend=None, size=1, max_jobs=DEFAULT_MAX_JOBS, env=None, fallback=None,
+                 recycle_on_failure=True):
+        self.backend = backend or default_backend()
+        self.size = max(1, size)
+        self.max_jobs = max_jobs
+        self.env = env
+        self.recycle_on_failure = recycle_on_failure
+        self.fallback = fallback or ProcessExecutor(env, self.backend.process_argv)
+        # 累计启动的工作进程数
+        self.spawned = 0
+        self._idle = []
+        self._live = 0
+        self._closed = False
+        self._cond = threading.Condition()
+
+    def _acquire(self):
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise ExecutorError('工作进程池已关闭')
+                if self._idle:
+                    return self._idle.pop()
+                if self._live < self.size:
+                    self._live += 1
+                    self.spawned += 1
+                    break
+                self._cond.wait()
+        try:
+            return _Worker(self.backend.host_argv, self.env)
+        except BaseException:
+            self._discard(None)
+            raise
+
+    def _discard(self, worker):
+        with self._cond:
+            self._live -= 1
+            self._cond.notify()
+        if worker is not None:
+            worker.close()
+
+    def _release(self, worker):
+        with self._cond:
+            if not self._closed:
+                self._idle.append(worker)
+                self._cond.notify()
+                return
+        self._discard(worker)
+
+    def run(self, command, on_output):
+        if not isinstance(command, ScriptJob) or \
+                os.path.splitext(command.script)[1].lower() not in self.backend.extensions:
+            return self.fallback.run(command, on_output)
+
+        worker = self._acquire()
+        code = None
+        try:
+            code = worker.run(command, on_output)
+        finally:
+            if code is None:
+                # 任务未正常结束 (工作进程退出、on_output 抛出异常等)，协议状态未知，不再复用
+                worker.kill()
+                self._discard(worker)
+            elif worker.jobs >= self.max_jobs or (code != 0 and self.recycle_on_failure):
+                self._discard(worker)
+            else:
+                self._release(worker)
+        return code
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._cond.notify_all()
+        for worker in idle:
+            self._discard(worker)
+
+
+def create_executor(kind='process', env=None, size=1, max_jobs=DEFAULT_MAX_JOBS, backend=None):
+    """按名称创建执行后端：process 每次新建进程，host 使用常驻工作进程池"""
+    backend = backend or default_backend()
+    if kind == 'host':
+        return WorkerPool(backend, size=size, max_jobs=max_jobs, env=env)
+    if kind == 'process':
+        return ProcessExecutor(env, backend.process_argv)
+    raise ValueError(f'未知的执行后端: {kind}')
@@ -2,17 +2,23 @@
 # 主窗口、工具卡片、工具列表界面
 
 import os
-from PySide6.QtCore import Qt, QProcess, Signal
+from PySide6.QtCore import Qt, Signal, QTimer, QFileSystemWatcher
 from PySide6.QtWidgets import QApplication, QWidget, QHBoxLayout, QVBoxLayout
 
 from qfluentwidgets import (
     setTheme, Theme, FluentWindow, SubtitleLabel, CaptionLabel,
     PrimaryPushButton, FluentIcon as FIF, CardWidget, IconWidget,
-    BodyLabel, InfoBar, SmoothScrollArea, NavigationItemPosition
+    BodyLabel, InfoBar, NavigationItemPosition
 )
 
-from ..utils import scan_scripts, cleanup_tmp_dir
+from ..utils import scan_scripts, parse_script_metadata, get_scripts_dir, cleanup_tmp_dir
+from ..watcher import PollingWatcher
+from ..scheduler import TaskScheduler, QUEUED, CANCELLED
+from ..runner import stop_all
+from ..telemetry import record_run
+from ..profiling import timed
 from .widgets import TaskInterface
+from .tool_list import ToolListModel, ToolListView
 
 
 class ToolCard(CardWidget):
@@ -59,45 +65,104 @@ class ToolCard(CardWidget):
 
 
 class ToolsInterface(QWidget):
-    """工具列表界面，展示所有可用脚本"""
+    """工具列表界面，展示所有可用脚本（虚拟化列表，只绘制可见行）"""
     task_created = Signal(object)
 
-    def __init__(self, parent=None):
+    POLL_INTERVAL = 2000
+    DEBOUNCE_INTERVAL = 300
+
+    @timed('ToolsInterface.__init__')
+    def __init__(self, parent=None, scan_workers=None):
         super().__init__(parent)
         self.setObjectName("ToolsInterface")
+        self._task_counters = {}
 
-        main_layout = QVBoxLayout(self)
-        scroll = SmoothScrollArea(self)
-        scroll.setWidgetResizable(True)
-        scroll.setStyleSheet("QScrollArea { border: none; background: transparent; }")
-
-        content = QWidget()
-        layout = QVBoxLayout(content)
-        layout.setContentsMargins(30, 20, 30, 30)
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(30, 20, 30, 18)
         layout.setSpacing(12)
-        layout.setAlignment(Qt.AlignTop)
 
         layout.addWidget(SubtitleLabel('工具列表', self))
         layout.addWidget(CaptionLabel('点击运行按钮启动工具，支持并发执行多个任务', self))
 
-        for path, title, desc in scan_scripts():
-            card = ToolCard(path, title, desc, content)
-            card.task_created.connect(lambda t: self.task_created.emit(t))
-            layout.addWidget(card)
+        self.model = ToolListModel(scan_scripts(workers=scan_workers), self)
+        self.view = ToolListView(self.model, self)
+        self.view.run_requested.connect(self._run)
+        layout.addWidget(self.view)
 
-        scroll.setWidget(content)
-        main_layout.addWidget(scroll)
+        self._setup_watcher()
+
+    def _run(self, script_path, title):
+        """与 ToolCard._run 一致：为脚本创建任务并通过 task_created 发出"""
+        if not os.path.exists(script_path):
+            InfoBar.error('错误', f'脚本不存在: {script_path}', parent=self.window())
+            return
+        counter = self._task_counters.get(script_path, 0) + 1
+        self._task_counters[script_path] = counter
+        task = TaskInterface(f'{title}_{counter}', title, script_path)
+        self.task_created.emit(task)
+
+    def _setup_watcher(self):
+        """优先使用 QFileSystemWatcher，监听失败时回退到定时轮询。"""
+        self._watcher = PollingWatcher(get_scripts_dir())
+
+        self._debounce = QTimer(self)
+        self._debounce.setSingleShot(True)
+        self._debounce.setInterval(self.DEBOUNCE_INTERVAL)
+        self._debounce.timeout.connect(self.refresh)
+
+        self._fs_watcher = QFileSystemWatcher(self)
+        self._fs_watcher.directoryChanged.connect(self._debounce.start)
+        self._fs_watcher.fileChanged.connect(self._debounce.start)
+        self._sync_watch_paths()
+
+        self._poll_timer = None
+        if not self._fs_watcher.directories():
+            self._poll_timer = QTimer(self)
+            self._poll_timer.setInterval(self.POLL_INTERVAL)
+            self._poll_timer.timeout.connect(self.refresh)
+            self._poll_timer.start()
+
+    def _sync_watch_paths(self):
+        wanted = set(self._watcher.directories()) | set(self._watcher.snapshot)
+        watched = set(self._fs_watcher.directories()) | set(self._fs_watcher.files())
+        if watched - wanted:
+            self._fs_watcher.removePaths(list(watched - wanted))
+        if wanted - watched:
+            self._fs_watcher.addPaths(sorted(wanted - watched))
+
+    def refresh(self):
+        """增量刷新：只插入、删除或更新发生变化的脚本行。"""
+        diff = self._watcher.poll()
+        if not (diff.added or diff.removed or diff.changed):
+            return diff
+
+        for path in diff.removed + diff.changed:
+            self.model.remove_script(path)
+        for path in diff.added + diff.changed:
+            title, desc = parse_script_metadata(path)
+            self.model.insert_script(path, title, desc)
+
+        self._sync_watch_paths()
+        return diff
 
 
 class Window(FluentWindow):
     """主窗口"""
-    def __init__(self):
+
+    DEFAULT_MAX_PARALLEL = 2
+    # 关闭窗口时等待运行中的任务退出的共同期限 (秒)，到期后强制结束进程树
+    SHUTDOWN_TIMEOUT = 3
+
+    @timed('Window.__init__')
+    def __init__(self, scan_workers=None, max_parallel=None):
         super().__init__()
         setTheme(Theme.AUTO)
         self._task_count = 0
         self._running_tasks = []
+        self.scheduler = TaskScheduler(max_parallel or self.DEFAULT_MAX_PARALLEL,
+                                       on_start=self._start_task, on_state=self._on_task_state)
 
-        self.tools = ToolsInterface(self)
+        self.tools = ToolsInterface(self, scan_workers=scan_workers)
         self.tools.task_created.connect(self._add_task)
 
         self.addSubInterface(self.tools, FIF.HOME, '工具')
@@ -112,18 +177,55 @@ class Window(FluentWindow):
 
     def closeEvent(self, event):
         """Clean up tmp directory on normal close."""
-        for task in self._running_tasks:
-            if task.process.state() == QProcess.Running:
-                task.process.terminate()
-                task.process.waitForFinished(2000)
+        # 先取消排队任务，避免终止运行中的任务时启动新任务
+        self.scheduler.cancel_all()
+        # 同时终止全部任务的进程树，在共同的期限内等待
+        stop_all([task.handle for task in self._running_tasks if task.is_running()], self.SHUTDOWN_TIMEOUT)
+        for task in list(self._running_tasks):
+            task.terminal.close_log()
 
         cleanup_tmp_dir()
         super().closeEvent(event)
 
     def _add_task(self, task):
         self._task_count += 1
-        self._running_tasks.append(task)
         task.setParent(self)
+        task.task_finished.connect(lambda _id, success, task=task: self._on_task_finished(task, success))
+        task.cancel_requested.connect(lambda _id, task=task: self._cancel_task(task))
         self.addSubInterface(task, FIF.PLAY, f'任务 {self._task_count}', NavigationItemPosition.SCROLL)
         self.switchTo(task)
+        self.scheduler.submit(task, task)
+
+    def _start_task(self, scheduled):
+        """调度器分配到运行名额时启动任务"""
+        task = scheduled.payload
+        self._running_tasks.append(task)
         task.start()
+
+    def _cancel_task(self, task):
+        """取消任务：排队中的直接移出队列，运行中的终止进程树后按正常结束流程处理"""
+        scheduled = self.scheduler.get(task)
+        if scheduled is None:
+            return
+        self.scheduler.cancel(task)
+        if scheduled.state != CANCELLED:
+            task.cancel()
+
+    def _on_task_state(self, scheduled):
+        task = scheduled.payload
+        if scheduled.state == QUEUED:
+            task.statusLabel.setText('排队中...')
+        elif scheduled.state == CANCELLED and scheduled.started_at is None:
+            task.set_cancelled()
+
+    def _on_task_finished(self, task, success):
+        """任务结束：释放运行名额并回收运行句柄"""
+        scheduled = self.scheduler.finish(task, success)
+        if task in self._running_tasks:
+            self._running_tasks.remove(task)
+        task.statusLabel.setText(f'{task.statusLabel.text()} ({scheduled.elapsed:.1f}s)')
+        task.release_process()
+        if task.started_at is not None:
+            script = os.path.splitext(os.path.basename(task.script_path))[0]
+            record_run(script, task.command, task.started_at, scheduled.elapsed, task.exit_code,
+                       task.meter, scheduled.wait_time, source='gui')
@@ -0,0 +1,223 @@
+# toolbox.gui.tool_list - 虚拟化工具列表
+# 基于 QAbstractListModel + 委托绘制卡片，只为可见行绘制，不为每个脚本创建控件
+
+import bisect
+from PySide6.QtCore import Qt, QAbstractListModel, QModelIndex, QRect, QRectF, QSize, Signal
+from PySide6.QtGui import QColor, QFont, QPainter
+from PySide6.QtWidgets import QStyledItemDelegate
+
+from qfluentwidgets import (
+    FluentIcon as FIF, ListView, ThemeColor, isDarkTheme, getFont, drawIcon
+)
+
+
+class ToolListModel(QAbstractListModel):
+    """脚本列表模型，按 (标题, 路径) 排序，与 scan_scripts 的输出顺序一致"""
+
+    PathRole = Qt.UserRole + 1
+    TitleRole = Qt.UserRole + 2
+    DescriptionRole = Qt.UserRole + 3
+
+    def __init__(self, scripts=(), parent=None):
+        super().__init__(parent)
+        self._rows = sorted(((title, path, desc) for path, title, desc in scripts))
+        self._keys = [(title, path) for title, path, _ in self._rows]
+        self._titles = {path: title for title, path, _ in self._rows}
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or not 0 <= index.row() < len(self._rows):
+            return None
+        title, path, desc = self._rows[index.row()]
+        if role in (Qt.DisplayRole, self.TitleRole):
+            return title
+        if role == self.PathRole:
+            return path
+        if role in (Qt.ToolTipRole, self.DescriptionRole):
+            return desc
+        return None
+
+    def script_at(self, row):
+        """返回第 row 行的 (路径, 标题, 描述)。"""
+        title, path, desc = self._rows[row]
+        return path, title, desc
+
+    def paths(self):
+        return list(self._titles)
+
+    def insert_script(self, path, title, desc):
+        """按排序位置插入一个脚本，返回所在行号。"""
+        row = bisect.bisect_left(self._keys, (title, path))
+        self.beginInsertRows(QModelIndex(), row, row)
+        self._rows.insert(row, (title, path, desc))
+        self._keys.insert(row, (title, path))
+        self._titles[path] = title
+        self.endInsertRows()
+        return row
+
+    def remove_script(self, path):
+        """移除一个脚本，不存在时返回 False。"""
+        title = self._titles.pop(path, None)
+        if title is None:
+            return False
+        row = bisect.bisect_left(self._keys, (title, path))
+        self.beginRemoveRows(QModelIndex(), row, row)
+        del self._rows[row]
+        del self._keys[row]
+        self.endRemoveRows()
+        return True
+
+
+class ToolCardDelegate(QStyledItemDelegate):
+    """以 ToolCard 的外观绘制每一行"""
+
+    SPACING = 12
+    MARGIN_H = 20
+    BUTTON_SIZE = QSize(80, 30)
+    ICON_SIZE = 16
+    RADIUS = 5
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.hover_row = -1
+        self.hover_button = False
+        self.pressed_row = -1
+        self._title_font = getFont(20, QFont.DemiBold)
+        self._body_font = getFont(14)
+
+    def sizeHint(self, option, index):
+        has_desc = bool(index.data(ToolListModel.DescriptionRole))
+        return QSize(option.rect.width(), (80 if has_desc else 60) + self.SPACING)
+
+    def card_rect(self, rect):
+        return rect.adjusted(0, 0, 0, -self.SPACING)
+
+    def button_rect(self, rect):
+        card = self.card_rect(rect)
+        size = self.BUTTON_SIZE
+        return QRect(card.right() - self.MARGIN_H - size.width() + 1,
+                     card.center().y() - size.height() // 2, size.width(), size.height())
+
+    def paint(self, painter, option, index):
+        painter.save()
+        painter.setRenderHints(QPainter.Antialiasing | QPainter.TextAntialiasing | QPainter.SmoothPixmapTransform)
+        is_dark = isDarkTheme()
+        row = index.row()
+        card = self.card_rect(option.rect)
+
+        # 卡片背景与边框，与 CardWidget 的配色一致
+        hover = row == self.hover_row
+        alpha = (21 if hover else 13) if is_dark else (64 if hover else 170)
+        border = QColor(255, 255, 255, 13) if is_dark and hover else QColor(0, 0, 0, 20 if is_dark else 15)
+        painter.setPen(border)
+        painter.setBrush(QColor(255, 255, 255, alpha))
+        painter.drawRoundedRect(QRectF(card).adjusted(0.5, 0.5, -0.5, -0.5), self.RADIUS, self.RADIUS)
+
+        # 图标
+        x = card.left() + self.MARGIN_H
+        icon_rect = QRect(x, card.center().y() - self.ICON_SIZE // 2, self.ICON_SIZE, self.ICON_SIZE)
+        drawIcon(FIF.COMMAND_PROMPT, painter, icon_rect)
+        x = icon_rect.right() + 16
+
+        # 标题与描述
+        button = self.button_rect(option.rect)
+        text_width = max(0, button.left() - 15 - x)
+        title = index.data(ToolListModel.TitleRole) or ''
+        desc = index.data(ToolListModel.DescriptionRole) or ''
+        text_color = QColor(255, 255, 255) if is_dark else QColor(0, 0, 0)
+
+        painter.setFont(self._title_font)
+        title_height = painter.fontMetrics().height()
+        desc_height = 0
+        if desc:
+            painter.setFont(self._body_font)
+            desc_height = painter.fontMetrics().height() + 4
+        top = card.center().y() - (title_height + desc_height) // 2
+
+        painter.setFont(self._title_font)
+        painter.setPen(text_color)
+        painter.drawText(QRect(x, top, text_width, title_height), Qt.AlignLeft | Qt.AlignVCenter,
+                         painter.fontMetrics().elidedText(title, Qt.ElideRight, text_width))
+        if desc:
+            painter.setFont(self._body_font)
+            painter.setPen(QColor(Qt.gray))
+            painter.drawText(QRect(x, top + title_height + 4, text_width, desc_height - 4),
+                             Qt.AlignLeft | Qt.AlignVCenter,
+                             painter.fontMetrics().elidedText(desc, Qt.ElideRight, text_width))
+
+        # “运行” 按钮，与 PrimaryPushButton 的主题色一致
+        if row == self.pressed_row:
+            color = ThemeColor.LIGHT_3.color() if is_dark else ThemeColor.DARK_2.color()
+        elif hover and self.hover_button:
+            color = ThemeColor.LIGHT_1.color() if is_dark else ThemeColor.DARK_1.color()
+        else:
+            color = ThemeColor.PRIMARY.color()
+        painter.setPen(Qt.NoPen)
+        painter.setBrush(color)
+        painter.drawRoundedRect(QRectF(button), self.RADIUS, self.RADIUS)
+        painter.setPen(QColor(0, 0, 0) if is_dark else QColor(255, 255, 255))
+        painter.setFont(self._body_font)
+        painter.drawText(button, Qt.AlignCenter, '运行')
+
+        painter.restore()
+
+
+class ToolListView(ListView):
+    """只绘制可见行的工具列表视图，点击行内 “运行” 按钮时发出 run_requested(路径, 标题)"""
+
+    run_requested = Signal(str, str)
+
+    def __init__(self, model, parent=None):
+        super().__init__(parent)
+        self.card_delegate = ToolCardDelegate(self)
+        self.setItemDelegate(self.card_delegate)
+        self.setModel(model)
+        self.setSelectionMode(ListView.SelectionMode.NoSelection)
+        self.setVerticalScrollMode(ListView.ScrollMode.ScrollPerPixel)
+        self.setUniformItemSizes(False)
+        self.setMouseTracking(True)
+        self.setStyleSheet("QListView { border: none; background: transparent; }")
+
+    def _button_hit(self, pos):
+        """返回位于 “运行” 按钮上的行索引，否则返回无效索引。"""
+        index = self.indexAt(pos)
+        if index.isValid() and self.card_delegate.button_rect(self.visualRect(index)).contains(pos):
+            return index
+        return QModelIndex()
+
+    def _set_hover(self, row, on_button):
+        delegate = self.card_delegate
+        if (delegate.hover_row, delegate.hover_button) != (row, on_button):
+            delegate.hover_row = row
+            delegate.hover_button = on_button
+            self.viewport().update()
+
+    def mouseMoveEvent(self, e):
+        super().mouseMoveEvent(e)
+        pos = e.position().toPoint()
+        self._set_hover(self.indexAt(pos).row(), self._button_hit(pos).isValid())
+
+    def leaveEvent(self, e):
+        super().leaveEvent(e)
+        self._set_hover(-1, False)
+
+    def mousePressEvent(self, e):
+        index = self._button_hit(e.position().toPoint())
+        if e.button() == Qt.LeftButton and index.isValid():
+            self.card_delegate.pressed_row = index.row()
+            self.viewport().update()
+            return
+        super().mousePressEvent(e)
+
+    def mouseReleaseEvent(self, e):
+        pressed_row = self.card_delegate.pressed_row
+        if pressed_row < 0:
+            super().mouseReleaseEvent(e)
+            return
+        self.card_delegate.pressed_row = -1
+        self.viewport().update()
+        index = self._button_hit(e.position().toPoint())
+        if e.button() == Qt.LeftButton and index.isValid() and index.row() == pressed_row:
+            self.run_requested.emit(index.data(ToolListModel.PathRole), index.data(ToolListModel.TitleRole))
@@ -1,16 +1,28 @@
 # toolbox.gui.widgets - GUI 基础控件
 # 终端文本控件和任务界面
 
+import os
+import re
+import time
+import tempfile
+import subprocess
+from collections import deque
 from datetime import datetime
-from PySide6.QtCore import Qt, QProcess, Signal, QProcessEnvironment
+from PySide6.QtCore import Qt, Signal, QTimer
 from PySide6.QtGui import QTextCursor, QColor, QTextCharFormat
-from PySide6.QtWidgets import QApplication, QWidget, QHBoxLayout, QVBoxLayout, QTextEdit
+from PySide6.QtWidgets import QApplication, QWidget, QHBoxLayout, QVBoxLayout, QTextEdit, QFileDialog
 
 from qfluentwidgets import (
     SubtitleLabel, CaptionLabel, PushButton, FluentIcon as FIF, InfoBar
 )
 
-from ..utils import get_tmp_dir
+from ..utils import get_tmp_dir, parse_script_header
+from ..decoder import StreamDecoder
+from ..telemetry import OutputMeter
+from ..profiling import timed
+from ..download_cache import cache_environment
+from ..runner import default_runner
+from ..scheduler import DONE, TIMEOUT, CANCELLED
 
 
 class TerminalTextEdit(QTextEdit):
@@ -21,7 +33,15 @@ class TerminalTextEdit(QTextEdit):
         '35': '#cba6f7', '36': '#94e2d5', '91': '#f38ba8', '92': '#a6e3a1',
     }
 
-    def __init__(self, parent=None):
+    DEFAULT_COLOR = '#cdd6f4'
+    # 输出缓冲的刷新间隔（毫秒），约 30 Hz；每帧最多写入的字符数，避免单次刷新卡住界面
+    FLUSH_INTERVAL = 33
+    FLUSH_MAX_CHARS = 64 * 1024
+    # 文档保留的最大行数（0 表示不限制）；未写入文档的缓冲上限，超出部分只保留在日志文件中
+    DEFAULT_SCROLLBACK = 5000
+    PENDING_MAX_CHARS = 4 * 1024 * 1024
+
+    def __init__(self, parent=None, scrollback=None):
         super().__init__(parent)
         self.setReadOnly(True)
         self.setStyleSheet("""
@@ -35,26 +55,146 @@ class TerminalTextEdit(QTextEdit):
                 padding: 12px;
             }
         """)
+        self._formats = {}
+        self._pending = deque()
+        self._pending_chars = 0
+        self._log_file = None
+        self.log_path = None
+        self.set_scrollback(self.DEFAULT_SCROLLBACK if scrollback is None else scrollback)
+        self._flush_timer = QTimer(self)
+        self._flush_timer.setSingleShot(True)
+        self._flush_timer.setInterval(self.FLUSH_INTERVAL)
+        self._flush_timer.timeout.connect(self._flush_step)
 
-    def append_text(self, text, color=None):
-        cursor = self.textCursor()
+    def _format(self, color):
+        """按颜色缓存 QTextCharFormat，避免每段输出重复创建"""
+        color = color or self.DEFAULT_COLOR
+        fmt = self._formats.get(color)
+        if fmt is None:
+            fmt = QTextCharFormat()
+            fmt.setForeground(QColor(color))
+            self._formats[color] = fmt
+        return fmt
+
+    def set_scrollback(self, lines):
+        """设置文档保留的最大行数，旧输出会被裁剪（完整日志见 log_path）"""
+        self.scrollback = max(0, int(lines))
+        self.document().setMaximumBlockCount(self.scrollback)
+
+    def open_log(self, path):
+        """将之后的全部输出同步写入日志文件"""
+        self.close_log()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._log_file = open(path, 'w', encoding='utf-8')
+        self.log_path = path
+
+    def close_log(self):
+        if self._log_file is not None:
+            self._log_file.close()
+            self._log_file = None
+
+    def log_text(self):
+        """返回完整日志：有日志文件时从磁盘读取，否则返回文档内容"""
+        if self.log_path and os.path.exists(self.log_path):
+            if self._log_file is not None:
+                self._log_file.flush()
+            with open(self.log_path, 'r', encoding='utf-8', errors='replace') as f:
+                return f.read()
+        self.flush()
+        return self.toPlainText()
+
+    def queue_text(self, text, color=None):
+        """缓冲一段输出，由定时器按固定频率批量写入文档"""
+        if not text:
+            return
+        if self._log_file is not None:
+            self._log_file.write(text)
+        if self._pending and self._pending[-1][1] == color:
+            self._pending[-1][0].append(text)
+        else:
+            self._pending.append(([text], color))
+        self._pending_chars += len(text)
+        if self.scrollback and self._pending_chars > self.PENDING_MAX_CHARS:
+            self._drop_pending(self._pending_chars - self.PENDING_MAX_CHARS)
+        if not self._flush_timer.isActive():
+            self._flush_timer.start()
+
+    def _drop_pending(self, excess):
+        """丢弃缓冲区头部的 excess 个字符（它们终将被滚动裁剪，完整内容已在日志文件中）"""
+        while self._pending and excess > 0:
+            chunks, color = self._pending[0]
+            text = ''.join(chunks)
+            if len(text) > excess:
+                chunks[:] = [text[excess:]]
+                self._pending_chars -= excess
+                return
+            self._pending.popleft()
+            self._pending_chars -= len(text)
+            excess -= len(text)
+
+    def _take_pending(self, max_chars):
+        """从缓冲区取出至多 max_chars 个字符，返回 [(文本, 颜色)]"""
+        batch = []
+        while self._pending and (max_chars is None or max_chars > 0):
+            chunks, color = self._pending[0]
+            text = ''.join(chunks)
+            if max_chars is not None and len(text) > max_chars:
+                chunks[:] = [text[max_chars:]]
+                text = text[:max_chars]
+            else:
+                self._pending.popleft()
+            batch.append((text, color))
+            self._pending_chars -= len(text)
+            if max_chars is not None:
+                max_chars -= len(text)
+        return batch
+
+    def _flush_step(self):
+        """定时器回调：每次最多写入 FLUSH_MAX_CHARS 个字符，剩余部分留到下一帧"""
+        self.flush(self.FLUSH_MAX_CHARS)
+        if self._pending:
+            self._flush_timer.start()
+
+    @timed('TerminalTextEdit.flush')
+    def flush(self, max_chars=None):
+        """将缓冲的输出写入文档，每次刷新只滚动一次"""
+        self._flush_timer.stop()
+        batch = self._take_pending(max_chars)
+        if not batch:
+            return
+
+        scrollbar = self.verticalScrollBar()
+        at_bottom = scrollbar.value() >= scrollbar.maximum()
+        cursor = QTextCursor(self.document())
         cursor.movePosition(QTextCursor.End)
-        fmt = QTextCharFormat()
-        fmt.setForeground(QColor(color or '#cdd6f4'))
-        cursor.insertText(text, fmt)
-        self.setTextCursor(cursor)
-        self.ensureCursorVisible()
+        cursor.beginEditBlock()
+        for text, color in batch:
+            cursor.insertText(text, self._format(color))
+        cursor.endEditBlock()
+        if at_bottom:
+            scrollbar.setValue(scrollbar.maximum())
+
+    def append_text(self, text, color=None):
+        """立即写入一段文本（先写出缓冲中的输出以保持顺序）"""
+        self.queue_text(text, color)
+        self.flush()
 
 
 class TaskInterface(QWidget):
     """任务执行界面，显示脚本运行输出"""
     task_finished = Signal(str, bool)
+    # 用户点击取消；由窗口决定取消排队中的任务还是终止运行中的任务
+    cancel_requested = Signal(str)
+    # 任务运行器线程中的回调经由信号排队到 GUI 线程
+    _output_received = Signal(bytes)
+    _result_received = Signal(object)
 
-    def __init__(self, task_id, title, script_path, parent=None):
+    def __init__(self, task_id, title, script_path, parent=None, runner=None):
         super().__init__(parent)
         self.task_id = task_id
         self.title = title
         self.script_path = script_path
+        self.runner = runner or default_runner()
         self.setObjectName(task_id)
 
         layout = QVBoxLayout(self)
@@ -69,9 +209,19 @@ class TaskInterface(QWidget):
         self.copyBtn.setFixedWidth(85)
         self.copyBtn.clicked.connect(self._copy_log)
 
+        self.exportBtn = PushButton(FIF.SAVE, '导出', self)
+        self.exportBtn.setFixedWidth(85)
+        self.exportBtn.clicked.connect(self._export_log)
+
+        self.cancelBtn = PushButton(FIF.CLOSE, '取消', self)
+        self.cancelBtn.setFixedWidth(85)
+        self.cancelBtn.clicked.connect(lambda: self.cancel_requested.emit(self.task_id))
+
         header.addWidget(self.titleLabel)
         header.addStretch()
+        header.addWidget(self.cancelBtn)
         header.addWidget(self.copyBtn)
+        header.addWidget(self.exportBtn)
         header.addSpacing(15)
         header.addWidget(self.statusLabel)
         layout.addLayout(header)
@@ -81,46 +231,115 @@ class TaskInterface(QWidget):
         layout.addWidget(self.terminal)
 
         # Process
-        self.process = QProcess(self)
-        self.process.setProcessChannelMode(QProcess.MergedChannels)
-        self.process.readyReadStandardOutput.connect(self._on_output)
-        self.process.finished.connect(self._on_finished)
+        self._decoder = StreamDecoder()
+        # 遥测：输出统计、启动时间 (time.time())、实际命令行与退出码
+        self.meter = OutputMeter()
+        self.started_at = None
+        self.command = []
+        self.exit_code = None
+        self.timeout = None
+        self.handle = None
+        self._output_received.connect(self._on_output)
+        self._result_received.connect(self._on_finished)
+
+    def _open_log(self):
+        """在 tmp/logs 下为本次运行创建日志文件"""
+        log_dir = os.path.join(get_tmp_dir(), 'logs')
+        os.makedirs(log_dir, exist_ok=True)
+        safe_id = re.sub(r'[\\/:*?"<>|\s]+', '_', self.task_id)
+        fd, path = tempfile.mkstemp(prefix=f'{safe_id}_', suffix='.log', dir=log_dir)
+        os.close(fd)
+        self.terminal.open_log(path)
 
     def start(self):
         self.statusLabel.setText('运行中...')
+        self.meter = OutputMeter()
+        self.started_at = time.time()
+        self._open_log()
         self.terminal.append_text(f'[{datetime.now():%H:%M:%S}] 启动: {self.title}\n\n', '#89b4fa')
 
-        env = QProcessEnvironment.systemEnvironment()
-        env.insert('TOOLBOX_TMP_DIR', get_tmp_dir())
-        self.process.setProcessEnvironment(env)
+        env = os.environ.copy()
+        env['TOOLBOX_TMP_DIR'] = get_tmp_dir()
+        env.update(cache_environment())
 
+        self.command = self.build_command()
+        # 脚本头部的 timeout 指令为硬超时，到期后终止整个进程树
+        self.timeout = parse_script_header(self.script_path)[2].timeout
+        if self.timeout:
+            self.terminal.append_text(f'最长运行 {self.timeout:g} 秒\n', '#6c7086')
+        # 原样转发输出块，换行和缓冲由终端控件处理；GUI 下脚本没有可交互的标准输入
+        self.handle = self.runner.submit(self.task_id, self.command, on_output=self._output_received.emit,
+                                         on_finished=self._result_received.emit, timeout=self.timeout, env=env,
+                                         stdin=subprocess.DEVNULL, line_buffered=False)
+
+    def build_command(self):
+        """运行脚本的命令行"""
         if self.script_path.lower().endswith('.ps1'):
-            self.process.start('powershell', ['-NoProfile', '-ExecutionPolicy', 'Bypass', '-File', self.script_path])
-        else:
-            self.process.start('cmd', ['/c', 'chcp 65001 >nul &&', self.script_path])
-
-    def _on_output(self):
-        data = self.process.readAllStandardOutput().data()
-        try:
-            text = data.decode('utf-8')
-        except:
-            text = data.decode('gbk', errors='replace')
-        self.terminal.append_text(text)
-
-    def _on_finished(self, exit_code, exit_status):
-        if exit_code == 0:
+            return ['powershell', '-NoProfile', '-ExecutionPolicy', 'Bypass', '-File', self.script_path]
+        return ['cmd', '/c', 'chcp 65001 >nul &&', self.script_path]
+
+    def is_running(self):
+        return self.handle is not None and not self.handle.done()
+
+    def cancel(self):
+        """终止运行中的任务 (整个进程树)，结束后照常触发 task_finished"""
+        if self.is_running():
+            self.statusLabel.setText('正在取消...')
+            self.cancelBtn.setEnabled(False)
+            self.handle.cancel()
+
+    def set_cancelled(self):
+        """排队中的任务被取消"""
+        self.statusLabel.setText('已取消')
+        self.cancelBtn.setEnabled(False)
+
+    @timed('TaskInterface._on_output')
+    def _on_output(self, data):
+        self.meter.add(len(data))
+        self.terminal.queue_text(self._decoder.decode(data))
+
+    def _on_finished(self, result):
+        self.cancelBtn.setEnabled(False)
+        self.terminal.queue_text(self._decoder.flush())
+        self.exit_code = result.returncode
+        if result.status == DONE:
             self.statusLabel.setText('✅ 完成')
             self.terminal.append_text(f'\n[{datetime.now():%H:%M:%S}] ✅ 成功\n', '#a6e3a1')
+        elif result.status == TIMEOUT:
+            self.statusLabel.setText('⏱ 超时')
+            self.terminal.append_text(f'\n[{datetime.now():%H:%M:%S}] ⏱ 超过 {self.timeout:g} 秒，已终止\n', '#fab387')
+        elif result.status == CANCELLED:
+            self.statusLabel.setText('已取消')
+            self.terminal.append_text(f'\n[{datetime.now():%H:%M:%S}] 已取消\n', '#fab387')
         else:
             self.statusLabel.setText('❌ 失败')
-            self.terminal.append_text(f'\n[{datetime.now():%H:%M:%S}] ❌ 失败 (code={exit_code})\n', '#f38ba8')
-        self.task_finished.emit(self.task_id, exit_code == 0)
+            self.terminal.append_text(f'\n[{datetime.now():%H:%M:%S}] ❌ 失败 (code={result.returncode})\n', '#f38ba8')
+        self.terminal.close_log()
+        self.task_finished.emit(self.task_id, result.status == DONE)
+
+    def release_process(self):
+        """任务结束后释放运行句柄，避免长时间运行时累积"""
+        if self.handle is not None and self.handle.done():
+            self.handle = None
 
     def _copy_log(self):
         """将终端日志复制到剪贴板。"""
-        log_text = self.terminal.toPlainText()
+        log_text = self.terminal.log_text()
         if log_text:
             QApplication.clipboard().setText(log_text)
             InfoBar.success('成功', '日志已复制到剪贴板', duration=2000, parent=self.window())
         else:
             InfoBar.warning('提示', '当前日志为空', duration=2000, parent=self.window())
+
+    def _export_log(self):
+        """将完整日志导出为文本文件。"""
+        log_text = self.terminal.log_text()
+        if not log_text:
+            InfoBar.warning('提示', '当前日志为空', duration=2000, parent=self.window())
+            return
+        path, _ = QFileDialog.getSaveFileName(self, '导出日志', f'{self.task_id}.log', '日志文件 (*.log *.txt)')
+        if not path:
+            return
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(log_text)
+        InfoBar.success('成功', f'日志已导出到 {path}', duration=2000, parent=self.window())
@@ -0,0 +1,170 @@
+# toolbox - Windows 工具箱核心模块
+# 脚本头部注释解析模块：按扩展名注册注释语法，限量读取文件头
+
+import os
+import re
+from collections import namedtuple
+
+# 文件头最多读取的行数与字符数，避免读入内嵌大体积载荷的脚本全文
+HEADER_MAX_LINES = 20
+HEADER_MAX_CHARS = 16 * 1024
+
+# 头部注释中的依赖指令，例如 "# requires: Install-PowerShell7, Enable-UTF8Support"；
+# timeout 为最长运行秒数 ("# timeout: 30m")，None 表示不限制；
+# probe 为判断目标状态是否已满足的探测命令，cache-ttl 为成功结果的缓存有效期 (秒)
+ScriptDirectives = namedtuple('ScriptDirectives', ['requires', 'conflicts', 'after', 'reboot_after', 'timeout',
+                                                   'probe', 'cache_ttl'])
+NO_DIRECTIVES = ScriptDirectives((), (), (), False, None, None, None)
+
+_DIRECTIVE_RE = re.compile(r'^(requires|conflicts|after|reboot-after|timeout|probe|cache-ttl)\s*:\s*(.*)$',
+                           re.IGNORECASE)
+_FALSE_VALUES = ('false', 'no', '0', 'off')
+
+_DURATION_RE = re.compile(r'^(\d+(?:\.\d+)?)\s*(s|sec|m|min|h|d)?$', re.IGNORECASE)
+_DURATION_UNITS = {'s': 1, 'sec': 1, 'm': 60, 'min': 60, 'h': 3600, 'd': 86400}
+
+
+class CommentSyntax:
+    """一种脚本语言的注释语法。
+
+    prefixes: 行注释前缀（大小写不敏感）
+    block: 块注释的 (开始, 结束) 标记，例如 PowerShell 的 ('<#', '#>')
+    ignore: 需要跳过的特殊行前缀，例如 shebang '#!'
+    """
+
+    def __init__(self, prefixes=(), block=None, ignore=()):
+        self.prefixes = tuple(p.upper() for p in prefixes)
+        self.block = block
+        self.ignore = tuple(ignore)
+
+    def comments(self, lines):
+        """逐行产出注释文本（已去除注释标记和首尾空白，可能为空串）。"""
+        in_block = False
+        for line in lines:
+            stripped = line.strip()
+            if in_block:
+                end = self.block[1]
+                if end in stripped:
+                    stripped = stripped.split(end, 1)[0]
+                    in_block = False
+                # 跳过 .SYNOPSIS / .DESCRIPTION 等帮助关键字
+                if not stripped.startswith('.'):
+                    yield stripped.strip()
+                continue
+
+            if any(stripped.startswith(p) for p in self.ignore):
+                continue
+            if self.block and stripped.startswith(self.block[0]):
+                start, end = self.block
+                rest = stripped[len(start):]
+                if end in rest:
+                    rest = rest.split(end, 1)[0]
+                else:
+                    in_block = True
+                yield rest.strip()
+                continue
+
+            upper = stripped.upper()
+            for prefix in self.prefixes:
+                if upper.startswith(prefix):
+                    yield stripped[len(prefix):].strip()
+                    break
+
+
+_DEFAULT_SYNTAX = CommentSyntax(prefixes=('::', 'REM ', '#'), ignore=('#!',))
+
+_SYNTAX_REGISTRY = {
+    '.ps1': CommentSyntax(prefixes=('#',), block=('<#', '#>'), ignore=('#!',)),
+    '.bat': CommentSyntax(prefixes=('::', 'REM ')),
+    '.cmd': CommentSyntax(prefixes=('::', 'REM ')),
+}
+
+
+def register_comment_syntax(ext, syntax):
+    """为扩展名（如 '.sh'）注册注释语法，覆盖已有的注册。"""
+    _SYNTAX_REGISTRY[ext.lower()] = syntax
+
+
+def get_comment_syntax(filepath):
+    """返回文件对应的注释语法，未注册的扩展名使用通用语法。"""
+    return _SYNTAX_REGISTRY.get(os.path.splitext(filepath)[1].lower(), _DEFAULT_SYNTAX)
+
+
+def iter_header_lines(f, max_lines=HEADER_MAX_LINES, max_chars=HEADER_MAX_CHARS):
+    """从文本文件对象中惰性读取至多 max_lines 行、max_chars 个字符。"""
+    budget = max_chars
+    for _ in range(max_lines):
+        if budget <= 0:
+            return
+        line = f.readline(budget)
+        if not line:
+            return
+        budget -= len(line)
+        yield line
+
+
+def read_header_comments(filepath, limit=2, max_lines=HEADER_MAX_LINES, max_chars=HEADER_MAX_CHARS):
+    """读取文件头部的有效注释，凑够 limit 条后立即停止读取。
+
+    空注释、以 '=' 开头的分隔线和依赖指令会被跳过。
+    """
+    syntax = get_comment_syntax(filepath)
+    comments = []
+    with open(filepath, 'r', encoding='utf-8', errors='ignore') as f:
+        for text in syntax.comments(iter_header_lines(f, max_lines, max_chars)):
+            if text and not text.startswith('=') and not _DIRECTIVE_RE.match(text):
+                comments.append(text)
+                if len(comments) >= limit:
+                    break
+    return comments
+
+
+def parse_duration(text):
+    """解析 "90"、"90s"、"30m"、"1.5h"、"7d" 形式的时长，返回秒数；无法解析或为 0 时返回 None。"""
+    m = _DURATION_RE.match(text.strip())
+    if not m:
+        return None
+    seconds = float(m.group(1)) * _DURATION_UNITS[(m.group(2) or 's').lower()]
+    return seconds or None
+
+
+def parse_directive(text):
+    """解析一条注释文本中的依赖指令，返回 (字段名, 值) 或 None。"""
+    m = _DIRECTIVE_RE.match(text)
+    if not m:
+        return None
+    # 允许在指令后用 # 追加说明
+    key, value = m.group(1).lower(), m.group(2).split('#', 1)[0].strip()
+    if key == 'reboot-after':
+        return 'reboot_after', value.lower() not in _FALSE_VALUES
+    if key == 'timeout':
+        return 'timeout', parse_duration(value)
+    if key == 'cache-ttl':
+        return 'cache_ttl', parse_duration(value)
+    if key == 'probe':
+        return 'probe', value or None
+    return key, tuple(name.strip() for name in value.split(',') if name.strip())
+
+
+def read_script_header(filepath, limit=2, max_lines=HEADER_MAX_LINES, max_chars=HEADER_MAX_CHARS):
+    """读取文件头部的有效注释和依赖指令，返回 (注释列表, ScriptDirectives)。
+
+    指令可以出现在标题、描述之间或紧随其后；凑够 limit 条注释后，
+    遇到第一条非指令注释即停止读取。
+    """
+    syntax = get_comment_syntax(filepath)
+    comments = []
+    fields = {}
+    with open(filepath, 'r', encoding='utf-8', errors='ignore') as f:
+        for text in syntax.comments(iter_header_lines(f, max_lines, max_chars)):
+            if not text or text.startswith('='):
+                continue
+            directive = parse_directive(text)
+            if directive:
+                key, value = directive
+                fields[key] = fields.get(key, ()) + value if isinstance(value, tuple) else value
+            elif len(comments) < limit:
+                comments.append(text)
+            else:
+                break
+    return comments, NO_DIRECTIVES._replace(**fields)
@@ -0,0 +1,84 @@
+# toolbox - Windows 工具箱核心模块
+# 脚本元数据持久化缓存模块
+
+import os
+import json
+
+# 解析规则变化时递增此版本号，旧缓存将整体失效
+METADATA_CACHE_VERSION = 3
+
+
+class MetadataCache:
+    """以 (绝对路径, mtime, size) 为键的脚本元数据磁盘索引。
+
+    未变化的文件直接命中缓存，不会被重新打开解析。
+    """
+
+    def __init__(self, path, version=METADATA_CACHE_VERSION):
+        self.path = path
+        self.version = version
+        self._entries = {}
+        self._seen = set()
+        self._dirty = False
+
+    @classmethod
+    def load(cls, path, version=METADATA_CACHE_VERSION):
+        """从磁盘加载缓存，文件缺失、损坏或版本不符时返回空缓存。"""
+        cache = cls(path, version)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return cache
+
+        if isinstance(data, dict) and data.get('version') == version:
+            entries = data.get('entries')
+            if isinstance(entries, dict):
+                cache._entries = entries
+        else:
+            # 版本不符，下次保存时覆盖
+            cache._dirty = True
+        return cache
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, filepath, mtime_ns, size):
+        """命中时返回缓存的元数据字典，否则返回 None。"""
+        key = os.path.abspath(filepath)
+        self._seen.add(key)
+        entry = self._entries.get(key)
+        if entry and entry.get('mtime') == mtime_ns and entry.get('size') == size:
+            return entry.get('meta')
+        return None
+
+    def put(self, filepath, mtime_ns, size, meta):
+        """写入一条元数据记录。"""
+        key = os.path.abspath(filepath)
+        self._seen.add(key)
+        self._entries[key] = {'mtime': mtime_ns, 'size': size, 'meta': meta}
+        self._dirty = True
+
+    def prune(self, root=None):
+        """移除本轮扫描中未出现的文件记录，指定 root 时仅清理该目录下的记录。"""
+        prefix = os.path.join(os.path.abspath(root), '') if root else ''
+        stale = [key for key in self._entries if key.startswith(prefix) and key not in self._seen]
+        for key in stale:
+            del self._entries[key]
+        if stale:
+            self._dirty = True
+
+    def save(self):
+        """原子写回磁盘，无变化时跳过。成功或无需写入时返回 True。"""
+        if not self._dirty:
+            return True
+        tmp_path = f'{self.path}.tmp'
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'version': self.version, 'entries': self._entries}, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+        except OSError:
+            return False
+        self._dirty = False
+        return True
@@ -0,0 +1,103 @@
+# toolbox - Windows 工具箱核心模块
+# 执行计划模块：按 requires / conflicts / after / reboot-after 指令拓扑排序并分阶段（纯 Python）
+
+from collections import namedtuple
+
+# stages: 阶段列表，同一阶段内的脚本可以并行执行
+# added: 因 requires 被自动加入计划的脚本
+# requires: {脚本: 计划内直接依赖的脚本集合}，用于在依赖失败时跳过后续脚本
+# reboot: 计划结束后是否需要重启
+Plan = namedtuple('Plan', ['stages', 'added', 'requires', 'reboot'])
+
+
+class PlanError(ValueError):
+    """依赖缺失、循环依赖等无法生成计划的错误"""
+
+
+def build_plan(names, lookup, reboot_script=None):
+    """为 names 生成分阶段执行计划。
+
+    lookup(name) 返回该脚本的 ScriptDirectives，未知脚本返回 None。名称需由调用方
+    预先规范化。requires 会递归加入计划并排在前面；after 只在双方都在计划中时
+    约束顺序；互相冲突的脚本不会出现在同一阶段；reboot-after 的脚本之后不能再
+    有依赖它的脚本。reboot_script 出现在 names 中时不参与分阶段，只设置 reboot。
+    """
+    order = []
+    directives = {}
+    pending = list(dict.fromkeys(names))
+    requested = set(pending)
+    while pending:
+        name = pending.pop(0)
+        if name in directives:
+            continue
+        info = lookup(name)
+        if info is None:
+            raise PlanError(f'未找到脚本: {name}')
+        directives[name] = info
+        order.append(name)
+        pending.extend(dep for dep in info.requires if dep not in directives)
+
+    reboot = reboot_script in directives
+    if reboot:
+        order.remove(reboot_script)
+        del directives[reboot_script]
+    rank = {name: i for i, name in enumerate(order)}
+
+    # 依赖边：preds[n] 中的脚本必须在 n 之前完成
+    preds = {name: set() for name in order}
+    requires = {name: set() for name in order}
+    conflicts = {name: set() for name in order}
+    for name in order:
+        info = directives[name]
+        reboot = reboot or info.reboot_after
+        for dep in info.requires:
+            if dep == reboot_script:
+                raise PlanError(f'{name} 依赖重启，请在重启后单独运行')
+            if directives[dep].reboot_after:
+                raise PlanError(f'{name} 依赖 {dep}，但 {dep} 完成后需要重启，请在重启后单独运行 {name}')
+            preds[name].add(dep)
+            requires[name].add(dep)
+        for dep in info.after:
+            # 软依赖：需要重启的脚本对后续脚本不产生约束
+            if dep in directives and not directives[dep].reboot_after:
+                preds[name].add(dep)
+        for other in info.conflicts:
+            if other in directives and other != name:
+                conflicts[name].add(other)
+                conflicts[other].add(name)
+
+    stages = []
+    done = set()
+    remaining = list(order)
+    while remaining:
+        ready = [name for name in remaining if preds[name] <= done]
+        if not ready:
+            raise PlanError(f"存在循环依赖: {', '.join(remaining)}")
+        stage = []
+        for name in sorted(ready, key=rank.get):
+            if not conflicts[name] & set(stage):
+                stage.append(name)
+        stages.append(stage)
+        done.update(stage)
+        remaining = [name for name in remaining if name not in done]
+
+    added = [name for name in order if name not in requested]
+    return Plan(stages, added, requires, reboot)
+
+
+def format_plan(plan, reboot_script=None, display=None):
+    """生成 --plan 输出的文本；display(name) 用于显示脚本名。"""
+    display = display or (lambda name: name)
+    lines = []
+    for i, stage in enumerate(plan.stages, 1):
+        parallel = '，可并行' if len(stage) > 1 else ''
+        lines.append(f'阶段 {i} ({len(stage)} 个脚本{parallel}):')
+        for name in stage:
+            note = ' (依赖，自动加入)' if name in plan.added else ''
+            deps = sorted(plan.requires.get(name, ()))
+            after = f" <- {', '.join(display(dep) for dep in deps)}" if deps else ''
+            lines.append(f'  - {display(name)}{note}{after}')
+    if plan.reboot:
+        target = display(reboot_script) if reboot_script else '手动重启'
+        lines.append(f'最后: 重启计算机 ({target})')
+    return '\n'.join(lines)
@@ -0,0 +1,191 @@
+# toolbox - Windows 工具箱核心模块
+# 性能剖析模块：轻量计时区间 + 耗时直方图，--profile 时配合 cProfile 使用
+
+import sys
+import time
+import pstats
+import cProfile
+import threading
+import functools
+
+# 计时区间默认关闭；关闭时 span() 只做一次全局标志判断
+_enabled = False
+_lock = threading.Lock()
+_histograms = {}
+
+
+class SpanHistogram:
+    """单个计时区间的耗时直方图，桶按 2 的幂 (微秒) 划分"""
+
+    def __init__(self, name):
+        self.name = name
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        # 桶序号 i 统计耗时不超过 2^i 微秒的调用
+        self.buckets = {}
+
+    def add(self, seconds):
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        bucket = max(0, int(seconds * 1e6) - 1).bit_length()
+        self.buckets[bucket] = self.buckets.get(bucket, 0) + 1
+
+    def percentile(self, q):
+        """按桶上界估算的分位数 (秒)"""
+        rank = max(1, int(q / 100 * self.count + 0.5))
+        seen = 0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if seen >= rank:
+                return min(2 ** bucket / 1e6, self.max)
+        return self.max
+
+
+class _Span:
+    __slots__ = ('name', 'start')
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        record(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def enable():
+    global _enabled
+    _enabled = True
+
+
+def disable():
+    global _enabled
+    _enabled = False
+
+
+def is_enabled():
+    return _enabled
+
+
+def reset():
+    with _lock:
+        _histograms.clear()
+
+
+def record(name, seconds):
+    """记录一次耗时"""
+    with _lock:
+        histogram = _histograms.get(name)
+        if histogram is None:
+            histogram = _histograms[name] = SpanHistogram(name)
+        histogram.add(seconds)
+
+
+def span(name):
+    """计时区间，用作 with span('name'): ... 上下文管理器。关闭时返回共享的空操作对象。"""
+    return _Span(name) if _enabled else _NULL_SPAN
+
+
+def timed(name):
+    """函数装饰器：启用时记录每次调用的耗时，关闭时直接调用原函数"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                record(name, time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+
+def get_histograms():
+    """返回 {名称: SpanHistogram} 的快照"""
+    with _lock:
+        return dict(_histograms)
+
+
+def _format_duration(seconds):
+    if seconds >= 1:
+        return f'{seconds:.2f}s'
+    if seconds >= 1e-3:
+        return f'{seconds * 1e3:.1f}ms'
+    return f'{seconds * 1e6:.0f}us'
+
+
+def format_histograms(histograms=None, bar_width=30):
+    """生成计时区间汇总和直方图文本，按总耗时从高到低排序"""
+    histograms = get_histograms() if histograms is None else histograms
+    if not histograms:
+        return '没有记录到计时区间。'
+    lines = []
+    for h in sorted(histograms.values(), key=lambda h: -h.total):
+        lines.append(f'{h.name}: {h.count} 次  总计 {_format_duration(h.total)}  '
+                     f'平均 {_format_duration(h.total / h.count)}  p50 ≤{_format_duration(h.percentile(50))}  '
+                     f'p95 ≤{_format_duration(h.percentile(95))}  最长 {_format_duration(h.max)}')
+        peak = max(h.buckets.values())
+        for bucket in range(min(h.buckets), max(h.buckets) + 1):
+            n = h.buckets.get(bucket, 0)
+            bar = '#' * max(1 if n else 0, round(n * bar_width / peak))
+            lines.append(f'  ≤{_format_duration(2 ** bucket / 1e6):>8} {n:>7} {bar}')
+    return '\n'.join(lines)
+
+
+class Profiler:
+    """--profile 使用的 cProfile 包装：同时启用计时区间，结束时写出 pstats 和直方图"""
+
+    def __init__(self, output_path, stream=None, top=30):
+        self.output_path = output_path
+        self.stream = stream or sys.stderr
+        self.top = top
+        self._profile = cProfile.Profile()
+
+    def __enter__(self):
+        reset()
+        enable()
+        self._profile.enable()
+        return self
+
+    def __exit__(self, *exc):
+        self._profile.disable()
+        disable()
+        self.dump()
+        return False
+
+    def dump(self):
+        """写出 pstats 文件 (可用 python -m pstats 或 snakeviz 查看) 和 .spans.txt 直方图"""
+        self._profile.dump_stats(self.output_path)
+        spans_path = f'{self.output_path}.spans.txt'
+        text = format_histograms()
+        with open(spans_path, 'w', encoding='utf-8') as f:
+            f.write(text + '\n')
+        try:
+            print(f'[PROFILE] cProfile 数据: {self.output_path}', file=self.stream)
+            print(f'[PROFILE] 计时区间直方图: {spans_path}', file=self.stream)
+            stats = pstats.Stats(self._profile, stream=self.stream)
+            stats.sort_stats('cumulative').print_stats(self.top)
+            print(text, file=self.stream)
+        except (AttributeError, OSError, ValueError):
+            # pythonw / 打包后的 GUI 没有可用的 stderr，文件已写出即可
+            pass
@@ -0,0 +1,139 @@
+# toolbox - Windows 工具箱核心模块
+# GitHub Release 元数据缓存模块：TTL + ETag 条件请求，离线时使用过期数据
+
+import os
+import re
+import sys
+import json
+import time
+import urllib.error
+import urllib.request
+
+from .utils import get_cache_dir
+
+GITHUB_API = 'https://api.github.com'
+DEFAULT_TTL = 3600
+
+# 环境变量：离线模式、缓存有效期 (秒)、API 地址 (镜像或测试)、访问令牌
+OFFLINE_ENV = 'TOOLBOX_OFFLINE'
+TTL_ENV = 'TOOLBOX_RELEASE_TTL'
+API_ENV = 'TOOLBOX_GITHUB_API'
+TOKEN_ENV = 'GITHUB_TOKEN'
+
+
+class ReleaseError(Exception):
+    """无法获取 Release 信息，且没有可用的缓存"""
+
+
+def _cache_key(owner, repo):
+    return re.sub(r'[^A-Za-z0-9._-]', '_', f'{owner}__{repo}').lower()
+
+
+class ReleaseResolver:
+    """查询仓库最新 Release，并把响应 JSON 缓存在磁盘上。
+
+    缓存未超过 ttl 秒时直接返回，不发请求；超过后带 If-None-Match 重新验证，
+    304 响应只刷新时间戳（GitHub 不计入速率限制）。offline=True 或请求失败
+    （网络错误、速率限制等）时返回过期的缓存。
+    """
+
+    def __init__(self, cache_dir, ttl=DEFAULT_TTL, api_base=GITHUB_API, offline=False, token=None,
+                 timeout=30, clock=time.time):
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.api_base = api_base.rstrip('/')
+        self.offline = offline
+        self.token = token
+        self.timeout = timeout
+        self._clock = clock
+        # 最近一次查询的结果来源: 'fresh' / 'revalidated' / 'network' / 'stale'
+        self.last_source = None
+
+    def _path(self, owner, repo):
+        return os.path.join(self.cache_dir, f'{_cache_key(owner, repo)}.json')
+
+    def _load(self, owner, repo):
+        try:
+            with open(self._path(owner, repo), 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return entry if isinstance(entry, dict) and 'data' in entry else None
+
+    def _save(self, owner, repo, entry):
+        path = self._path(owner, repo)
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(entry, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except OSError:
+            pass
+
+    def _request(self, url, etag):
+        headers = {'Accept': 'application/vnd.github+json', 'User-Agent': 'WindowsTools'}
+        if etag:
+            headers['If-None-Match'] = etag
+        if self.token:
+            headers['Authorization'] = f'Bearer {self.token}'
+        request = urllib.request.Request(url, headers=headers)
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return 200, response.headers.get('ETag'), json.loads(response.read().decode('utf-8'))
+        except urllib.error.HTTPError as e:
+            if e.code == 304:
+                return 304, e.headers.get('ETag') or etag, None
+            raise
+
+    def latest(self, owner, repo):
+        """返回 owner/repo 最新 Release 的 JSON 对象。"""
+        entry = self._load(owner, repo)
+        now = self._clock()
+        if entry is not None and (self.offline or now - entry.get('fetched', 0) < self.ttl):
+            self.last_source = 'stale' if self.offline else 'fresh'
+            return entry['data']
+        if self.offline:
+            raise ReleaseError(f'离线模式下没有 {owner}/{repo} 的缓存')
+
+        url = f'{self.api_base}/repos/{owner}/{repo}/releases/latest'
+        try:
+            status, etag, data = self._request(url, entry.get('etag') if entry else None)
+        except (OSError, ValueError) as e:
+            if entry is None:
+                raise ReleaseError(f'无法获取 {owner}/{repo} 的 Release 信息: {e}') from e
+            print(f'[WARN] 无法连接 GitHub API ({e})，使用缓存的 Release 信息', file=sys.stderr)
+            self.last_source = 'stale'
+            return entry['data']
+
+        if status == 304 and entry is not None:
+            entry['fetched'] = now
+            self.last_source = 'revalidated'
+        else:
+            entry = {'etag': etag, 'fetched': now, 'data': data}
+            self.last_source = 'network'
+        self._save(owner, repo, entry)
+        return entry['data']
+
+
+def find_assets(release, pattern):
+    """返回名称匹配正则 pattern（不区分大小写）的资源列表。"""
+    regex = re.compile(pattern, re.IGNORECASE)
+    return [asset for asset in release.get('assets', ()) if regex.search(asset.get('name', ''))]
+
+
+def open_release_resolver(offline=None):
+    """按环境变量配置创建解析器，缓存位于 cache/releases"""
+    if offline is None:
+        offline = os.environ.get(OFFLINE_ENV, '').lower() in ('1', 'true', 'yes')
+    try:
+        ttl = int(os.environ[TTL_ENV])
+    except (KeyError, ValueError):
+        ttl = DEFAULT_TTL
+    return ReleaseResolver(
+        os.path.join(get_cache_dir(), 'releases'),
+        ttl=ttl,
+        api_base=os.environ.get(API_ENV) or GITHUB_API,
+        offline=offline,
+        token=os.environ.get(TOKEN_ENV),
+    )
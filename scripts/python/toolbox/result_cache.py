@@ -0,0 +1,228 @@
+# toolbox - Windows 工具箱核心模块
+# 运行结果缓存模块：幂等脚本成功后记录结果，目标状态仍满足时跳过重复运行
+
+import os
+import sys
+import json
+import time
+import hashlib
+import threading
+import subprocess
+from collections import namedtuple
+from contextlib import contextmanager, suppress
+
+from .utils import get_cache_dir, sha256_file
+
+# 缓存文件路径；设为 0 / off 时不使用缓存
+RESULT_CACHE_ENV = 'TOOLBOX_RESULT_CACHE'
+
+# 记录格式变化时递增此版本号，旧缓存将整体失效
+RESULT_CACHE_VERSION = 1
+
+# 脚本未声明 cache-ttl 时成功结果的有效期 (秒)
+DEFAULT_TTL = 24 * 3600
+
+# 探测命令的最长运行秒数，超时视为目标状态未满足
+PROBE_TIMEOUT = 30
+
+# 保存时等待跨进程写锁的最长秒数；超过 SAVE_LOCK_STALE 秒未释放的锁视为崩溃进程的残留
+SAVE_LOCK_TIMEOUT = 15
+SAVE_LOCK_STALE = 10
+
+# 命中的缓存记录：脚本文件名、上次成功结束的时间 (time.time()) 和过期时间
+CachedRun = namedtuple('CachedRun', ['script', 'finished', 'expires'])
+
+
+def get_result_cache_path():
+    """缓存文件路径，禁用时返回 None"""
+    value = os.environ.get(RESULT_CACHE_ENV, '')
+    if value.lower() in ('0', 'off', 'false', 'no'):
+        return None
+    return value or os.path.join(get_cache_dir(), 'results.json')
+
+
+def probe_command(probe):
+    """探测命令的 argv。Windows 上 probe 为 PowerShell 表达式，结果为真即满足；其他平台交给 /bin/sh，退出码 0 即满足"""
+    if sys.platform == 'win32':
+        return ['powershell.exe', '-NoProfile', '-NonInteractive', '-ExecutionPolicy', 'Bypass',
+                '-Command', f'if ({probe}) {{ exit 0 }} exit 1']
+    return ['/bin/sh', '-c', probe]
+
+
+def run_probe(probe, timeout=PROBE_TIMEOUT):
+    """运行探测命令，返回目标状态是否已满足；无法启动或超时视为未满足"""
+    try:
+        result = subprocess.run(probe_command(probe), stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                                stderr=subprocess.DEVNULL, timeout=timeout)
+    except (OSError, subprocess.SubprocessError):
+        return False
+    return result.returncode == 0
+
+
+def cache_key(script_path, args, probe=None):
+    """缓存键：脚本内容的 SHA-256 + 参数 + 探测命令，任一变化都视为不同的运行"""
+    material = json.dumps([sha256_file(script_path), list(args), probe], ensure_ascii=False)
+    return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+
+@contextmanager
+def _save_lock(path, timeout=SAVE_LOCK_TIMEOUT):
+    """以 O_EXCL 创建锁文件实现跨进程互斥 (命令行与守护进程共用缓存文件)，超时抛出 TimeoutError"""
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            os.close(os.open(path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+            break
+        except FileExistsError:
+            try:
+                if time.time() - os.path.getmtime(path) > SAVE_LOCK_STALE:
+                    os.remove(path)
+                    continue
+            except OSError:
+                continue
+            if time.monotonic() > deadline:
+                raise TimeoutError(f'等待结果缓存锁超时: {path}')
+            time.sleep(0.02)
+    try:
+        yield
+    finally:
+        with suppress(OSError):
+            os.remove(path)
+
+
+def _read_entries(path, version):
+    """读取缓存文件中的记录，文件缺失、损坏或版本不符时返回 None"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if isinstance(data, dict) and data.get('version') == version and isinstance(data.get('entries'), dict):
+        return data['entries']
+    return None
+
+
+def is_cacheable(directives):
+    """只有声明了 probe 或 cache-ttl 指令的脚本才缓存结果"""
+    return bool(directives.probe or directives.cache_ttl)
+
+
+class ResultCache:
+    """以 cache_key 为键、带有效期的脚本成功记录。
+
+    命中要求记录未过期，且脚本声明了 probe 时探测命令报告目标状态仍满足；
+    探测失败的记录被删除。probe_runner(probe) 返回 bool，clock 返回当前
+    time.time()，测试时均可替换。
+
+    命令行和守护进程可能同时写同一个文件：save() 在锁文件保护下重新读取磁盘上的
+    记录，只合并本实例自上次保存以来的写入和删除，不会覆盖其他进程的记录。
+    """
+
+    def __init__(self, path=None, probe_runner=run_probe, clock=time.time, version=RESULT_CACHE_VERSION):
+        self.path = path
+        self.probe_runner = probe_runner
+        self.clock = clock
+        self.version = version
+        self._entries = {}
+        self._lock = threading.Lock()
+        # 自上次保存以来的修改：键 -> 新记录，删除时为 None
+        self._changes = {}
+        # 磁盘上的文件损坏或版本不符，需要整体重写
+        self._dirty = False
+
+    @classmethod
+    def load(cls, path, **kwargs):
+        """从磁盘加载缓存，文件缺失、损坏或版本不符时返回空缓存。"""
+        cache = cls(path, **kwargs)
+        entries = _read_entries(path, cache.version)
+        if entries is not None:
+            cache._entries = entries
+        elif os.path.exists(path):
+            cache._dirty = True
+        return cache
+
+    def __len__(self):
+        return len(self._entries)
+
+    def lookup(self, script_path, args, directives):
+        """目标状态已满足时返回 CachedRun，否则返回 None (未声明缓存指令、无记录、已过期或探测未通过)"""
+        if not is_cacheable(directives):
+            return None
+        try:
+            key = cache_key(script_path, args, directives.probe)
+        except OSError:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+        if not entry or entry.get('expires', 0) <= self.clock():
+            return None
+        if directives.probe and not self.probe_runner(directives.probe):
+            with self._lock:
+                if self._entries.pop(key, None) is not None:
+                    self._changes[key] = None
+            return None
+        return CachedRun(entry.get('script'), entry.get('finished'), entry['expires'])
+
+    def record(self, script_path, args, directives, returncode):
+        """记录一次运行：成功时写入 (有效期取 cache-ttl 指令，默认 DEFAULT_TTL)，失败时删除已有记录"""
+        if not is_cacheable(directives):
+            return
+        try:
+            key = cache_key(script_path, args, directives.probe)
+        except OSError:
+            return
+        now = self.clock()
+        with self._lock:
+            if returncode == 0:
+                self._entries[key] = self._changes[key] = {
+                    'script': os.path.basename(script_path),
+                    'finished': now,
+                    'expires': now + (directives.cache_ttl or DEFAULT_TTL),
+                }
+            elif self._entries.pop(key, None) is not None:
+                self._changes[key] = None
+
+    def save(self):
+        """把本实例的修改合并进磁盘上的记录并移除过期记录，原子写回磁盘；无变化或未指定路径时跳过。
+        成功或无需写入时返回 True，失败时保留修改，下次保存时重试。"""
+        now = self.clock()
+        with self._lock:
+            expired = [key for key, entry in self._entries.items() if entry.get('expires', 0) <= now]
+            for key in expired:
+                del self._entries[key]
+            if not (self._dirty or self._changes or expired) or self.path is None:
+                return True
+            changes, self._changes = self._changes, {}
+            dirty, self._dirty = self._dirty, False
+        tmp_path = f'{self.path}.{os.getpid()}.tmp'
+        try:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            with _save_lock(f'{self.path}.lock'):
+                entries = _read_entries(self.path, self.version) or {}
+                for key, entry in changes.items():
+                    if entry is None:
+                        entries.pop(key, None)
+                    else:
+                        entries[key] = entry
+                entries = {key: entry for key, entry in entries.items() if entry.get('expires', 0) > now}
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump({'version': self.version, 'entries': entries}, f, ensure_ascii=False)
+                os.replace(tmp_path, self.path)
+        except OSError:
+            with suppress(OSError):
+                os.remove(tmp_path)
+            with self._lock:
+                self._changes = dict(changes, **self._changes)
+                self._dirty = self._dirty or dirty
+            return False
+        # 同时获得其他进程写入的记录；保存期间本实例的新修改优先
+        with self._lock:
+            self._entries = {key: entry for key, entry in entries.items() if key not in self._changes}
+            self._entries.update((key, entry) for key, entry in self._changes.items() if entry is not None)
+        return True
+
+
+def open_result_cache():
+    """按 TOOLBOX_RESULT_CACHE 打开结果缓存，禁用时返回 None"""
+    path = get_result_cache_path()
+    return ResultCache.load(path) if path else None
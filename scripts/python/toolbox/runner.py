@@ -0,0 +1,466 @@
+# toolbox - Windows 工具箱核心模块
+# 任务运行模块：基于 asyncio 的子进程引擎 (超时、协作式取消、流式输出与背压)，GUI 与命令行共用
+
+import os
+import sys
+import time
+import signal
+import atexit
+import inspect
+import asyncio
+import threading
+import concurrent.futures
+from collections import namedtuple
+from contextlib import contextmanager, suppress
+
+from .executor import ExecutorError
+from .scheduler import DONE, FAILED, CANCELLED, TIMEOUT
+
+# status 为 DONE / FAILED / TIMEOUT / CANCELLED；returncode 为 None 表示任务在启动前被取消
+TaskResult = namedtuple('TaskResult', ['name', 'returncode', 'elapsed', 'status'])
+
+# 超时 / 取消时的退出码，与 GNU timeout 和 Ctrl+C 的惯例一致
+TIMEOUT_EXIT_CODE = 124
+CANCELLED_EXIT_CODE = 130
+
+# 终止子进程后等待其退出的秒数，超时后强制结束
+KILL_GRACE = 3
+
+# 强制结束进程树后等待子进程被回收的秒数
+KILL_WAIT = 2
+
+# 单次读取的字节数；逐行模式下超过该长度仍无换行的内容按块转发
+READ_LIMIT = 64 * 1024
+
+# 逐行模式下不完整的一行 (例如等待输入的提示) 在空闲多少秒后先行转发
+PARTIAL_LINE_DELAY = 0.2
+
+# 主线程等待任务时的轮询间隔，保证 Windows 上 Ctrl+C 能及时打断等待
+_WAIT_POLL = 0.2
+
+
+def _ignore_output(data):
+    pass
+
+
+async def _pump(reader, on_output, line_buffered=True):
+    """读取管道并回调 on_output(bytes)。
+
+    逐行模式下每次回调一整行 (含换行符)。on_output 返回 awaitable 时等待它完成
+    后才继续读取：期间管道不再被读取，子进程写满管道后阻塞，形成背压。
+    """
+    pending = b''
+    while True:
+        if pending:
+            try:
+                chunk = await asyncio.wait_for(reader.read(READ_LIMIT), PARTIAL_LINE_DELAY)
+            except asyncio.TimeoutError:
+                chunk = None
+        else:
+            chunk = await reader.read(READ_LIMIT)
+        if chunk == b'' or not line_buffered:
+            pieces = [pending + chunk] if chunk else [pending]
+            pending = b''
+        elif chunk is None:
+            pieces, pending = [pending], b''
+        else:
+            pieces = (pending + chunk).split(b'\n')
+            pending = pieces.pop()
+            pieces = [line + b'\n' for line in pieces]
+            if len(pending) >= READ_LIMIT:
+                pieces.append(pending)
+                pending = b''
+        for piece in pieces:
+            if piece:
+                result = on_output(piece)
+                if inspect.isawaitable(result):
+                    await result
+        if chunk == b'':
+            return
+
+
+def _read_stat(pid):
+    """读取 /proc/<pid>/stat 中进程名之后的字段 (状态、父进程、...)"""
+    with open(f'/proc/{pid}/stat', 'rb') as f:
+        data = f.read()
+    # 格式为 "pid (comm) state ppid ..."，comm 中可能含空格和括号
+    return data[data.rindex(b')') + 2:].split()
+
+
+def _identity(pid):
+    """返回 (pid, 启动时间)，用于在发送信号前确认 pid 未被复用；进程不存在或为僵尸进程时返回 None"""
+    try:
+        fields = _read_stat(pid)
+    except OSError:
+        return None
+    except (ValueError, IndexError):
+        return pid, None
+    if fields[0] == b'Z':
+        return None
+    # 第 22 个字段为启动时间
+    return pid, fields[19]
+
+
+def process_tree(pid):
+    """返回 pid 及其全部子孙进程的 (pid, 启动时间) 列表，父进程在前。
+
+    通过 /proc 枚举；没有 /proc 的平台只返回 pid 本身。
+    """
+    if not os.path.isdir('/proc'):
+        return [(pid, None)]
+    children = {}
+    for entry in os.listdir('/proc'):
+        if entry.isdigit():
+            try:
+                children.setdefault(int(_read_stat(entry)[1]), []).append(int(entry))
+            except (OSError, ValueError, IndexError):
+                continue
+    pids = [pid]
+    for parent in pids:
+        pids.extend(children.get(parent, ()))
+    return [identity for identity in map(_identity, pids) if identity is not None]
+
+
+def _alive(identity):
+    if not os.path.isdir('/proc'):
+        try:
+            os.kill(identity[0], 0)
+            return True
+        except OSError:
+            return False
+    return _identity(identity[0]) == identity
+
+
+def _signal_tree(tree, sig):
+    for identity in tree:
+        if _alive(identity):
+            try:
+                os.kill(identity[0], sig)
+            except OSError:
+                pass
+
+
+async def _taskkill(pid):
+    """Windows 上结束整个进程树"""
+    try:
+        killer = await asyncio.create_subprocess_exec(
+            'taskkill', '/PID', str(pid), '/T', '/F',
+            stdout=asyncio.subprocess.DEVNULL, stderr=asyncio.subprocess.DEVNULL)
+        await killer.wait()
+    except OSError:
+        pass
+
+
+async def kill_process_tree(process):
+    """立即强制结束子进程及其全部子孙进程，返回子进程的退出码"""
+    if process.returncode is None:
+        if sys.platform == 'win32':
+            await _taskkill(process.pid)
+        else:
+            _signal_tree(process_tree(process.pid), signal.SIGKILL)
+        try:
+            process.kill()
+        except ProcessLookupError:
+            pass
+    return await process.wait()
+
+
+async def stop_process(process, grace=KILL_GRACE):
+    """终止子进程及其全部子孙进程，返回子进程的退出码。
+
+    Windows 上的终止本身就是强制结束，直接用 taskkill /T /F 结束整个进程树。
+    其他平台先向进程树发送 SIGTERM，grace 秒后仍存活的进程 (包括父进程已退出、
+    但忽略了 SIGTERM 的子孙进程) 被 SIGKILL，避免安装程序等子进程成为孤儿。
+    """
+    if process.returncode is not None:
+        return process.returncode
+    if sys.platform == 'win32':
+        return await kill_process_tree(process)
+    tree = process_tree(process.pid)
+    _signal_tree(tree, signal.SIGTERM)
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + grace
+    try:
+        await asyncio.wait_for(process.wait(), grace)
+    except asyncio.TimeoutError:
+        pass
+    while loop.time() < deadline and any(_alive(identity) for identity in tree[1:]):
+        await asyncio.sleep(0.05)
+    survivors = [identity for identity in tree if _alive(identity)]
+    for identity in survivors:
+        # 终止期间新启动的子孙进程一并结束
+        _signal_tree(process_tree(identity[0]), signal.SIGKILL)
+    return await process.wait()
+
+
+async def _stop_and_drain(process, grace):
+    """终止进程树后读尽管道 (丢弃剩余输出)，让子进程的传输在事件循环中正常关闭"""
+    await stop_process(process, grace)
+    try:
+        await asyncio.wait_for(_pump(process.stdout, _ignore_output, False), KILL_WAIT)
+    except asyncio.TimeoutError:
+        pass
+
+
+async def run_process(argv, on_output, timeout=None, env=None, stdin=None, line_buffered=True,
+                      kill_grace=KILL_GRACE, on_start=None):
+    """运行一个子进程并流式转发其合并后的 stdout/stderr，返回 (退出码, 状态)。
+
+    超过 timeout 秒时终止子进程树并返回 (TIMEOUT_EXIT_CODE, TIMEOUT)；协程被取消或
+    on_output 抛出异常时先终止子进程树再继续抛出该异常。启动失败时抛出 ExecutorError。
+    on_start(process) 在子进程启动后调用。
+    """
+    try:
+        process = await asyncio.create_subprocess_exec(
+            *argv, stdin=stdin, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.STDOUT, env=env)
+    except OSError as e:
+        raise ExecutorError(f'执行脚本时发生错误: {e}') from e
+    if on_start is not None:
+        on_start(process)
+
+    async def communicate():
+        await _pump(process.stdout, on_output, line_buffered)
+        return await process.wait()
+
+    try:
+        returncode = await asyncio.wait_for(communicate(), timeout)
+    except asyncio.TimeoutError:
+        await _stop_and_drain(process, kill_grace)
+        return TIMEOUT_EXIT_CODE, TIMEOUT
+    except BaseException:
+        # 取消，或 on_output 抛出异常 (例如输出管道已关闭)：不留下无人读取输出的子进程
+        await asyncio.shield(_stop_and_drain(process, kill_grace))
+        raise
+    return returncode, DONE if returncode == 0 else FAILED
+
+
+class TaskHandle:
+    """TaskRunner.submit() 返回的任务句柄，可在任意线程中取消或等待"""
+
+    def __init__(self, runner, name):
+        self.name = name
+        self.started = False
+        self._runner = runner
+        self._task = None
+        self._process = None
+        self._cancel_requested = False
+        self._future = None
+        self._kill_task = None
+
+    def cancel(self):
+        """请求取消：尚未启动的任务不再启动，运行中的任务终止子进程"""
+        self._runner._call(self._cancel)
+
+    def _cancel(self):
+        self._cancel_requested = True
+        if self._task is not None:
+            self._task.cancel()
+
+    def kill(self):
+        """立即强制结束任务的整个进程树，不等待终止宽限期"""
+        self._runner._call(self._kill)
+
+    def _kill(self):
+        if not self._cancel_requested:
+            self._cancel()
+        if self._process is not None and self._kill_task is None:
+            self._kill_task = asyncio.ensure_future(kill_process_tree(self._process))
+
+    def _set_process(self, process):
+        self._process = process
+
+    def done(self):
+        return self._future.done()
+
+    def result(self, timeout=None):
+        """等待任务结束并返回 TaskResult，超时抛出 concurrent.futures.TimeoutError"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            wait = _WAIT_POLL if deadline is None else min(_WAIT_POLL, max(0.0, deadline - time.monotonic()))
+            try:
+                return self._future.result(wait)
+            except concurrent.futures.TimeoutError:
+                if deadline is not None and time.monotonic() >= deadline:
+                    raise
+
+
+class TaskRunner:
+    """共享的任务运行器，GUI 和命令行都通过它启动脚本子进程。
+
+    asyncio 事件循环在首次提交任务时于后台线程中启动，所有子进程由同一个
+    事件循环监视。submit() 线程安全；回调在运行器线程中调用，GUI 需通过信号
+    转发到主线程。
+    """
+
+    def __init__(self, env=None, kill_grace=KILL_GRACE):
+        self.env = env
+        self.kill_grace = kill_grace
+        self._loop = None
+        self._thread = None
+        self._closed = False
+        self._handles = set()
+        self._lock = threading.Lock()
+
+    def _ensure_loop(self):
+        with self._lock:
+            if self._closed:
+                raise ExecutorError('任务运行器已关闭')
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(target=self._loop.run_forever, name='toolbox-runner', daemon=True)
+                self._thread.start()
+            return self._loop
+
+    def _call(self, func):
+        """在事件循环线程中执行 func；已在该线程中时直接调用"""
+        if threading.current_thread() is self._thread:
+            func()
+        elif self._loop is not None and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(func)
+
+    def submit(self, name, argv, on_output=None, on_finished=None, timeout=None, env=None, stdin=None,
+               line_buffered=True):
+        """提交一个任务并立即返回 TaskHandle。
+
+        on_output(bytes) 接收输出 (line_buffered 时每次一整行)，on_finished(TaskResult)
+        在任务结束后调用。env 为空时使用运行器的 env。
+        """
+        loop = self._ensure_loop()
+        handle = TaskHandle(self, name)
+        with self._lock:
+            self._handles.add(handle)
+        coro = self._run(handle, argv, on_output or _ignore_output, on_finished, timeout,
+                         self.env if env is None else env, stdin, line_buffered)
+        handle._future = asyncio.run_coroutine_threadsafe(coro, loop)
+        return handle
+
+    async def _run(self, handle, argv, on_output, on_finished, timeout, env, stdin, line_buffered):
+        handle._task = asyncio.current_task()
+        returncode, status = None, CANCELLED
+        start = time.perf_counter()
+        try:
+            if not handle._cancel_requested:
+                handle.started = True
+                returncode, status = await run_process(argv, on_output, timeout, env, stdin, line_buffered,
+                                                       self.kill_grace, handle._set_process)
+        except asyncio.CancelledError:
+            returncode = CANCELLED_EXIT_CODE
+        except ExecutorError as e:
+            on_output(f'[ERROR] {e}\n'.encode('utf-8'))
+            returncode, status = 1, FAILED
+        except Exception as e:
+            # on_output 抛出异常 (例如 BrokenPipeError)：进程树已终止，任务记为失败，on_finished 照常调用
+            returncode, status = 1, FAILED
+            with suppress(Exception):
+                on_output(f'[ERROR] 转发输出时发生错误: {e!r}\n'.encode('utf-8'))
+        finally:
+            with self._lock:
+                self._handles.discard(handle)
+        result = TaskResult(handle.name, returncode, time.perf_counter() - start if handle.started else 0.0, status)
+        if on_finished is not None:
+            on_finished(result)
+        return result
+
+    def cancel_all(self):
+        """取消全部未结束的任务，返回它们的句柄"""
+        with self._lock:
+            handles = list(self._handles)
+        for handle in handles:
+            handle.cancel()
+        return handles
+
+    def close(self, timeout=None):
+        """停止未结束的任务 (见 stop_all，期限默认为 kill_grace) 后停止事件循环"""
+        with self._lock:
+            self._closed = True
+            handles = list(self._handles)
+        stop_all(handles, self.kill_grace if timeout is None else timeout)
+        if self._loop is not None:
+            # 等待后台的终止 / 强制结束协程完成，避免事件循环关闭后留下未回收的子进程
+            asyncio.run_coroutine_threadsafe(_drain(), self._loop).result()
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join()
+            self._loop.close()
+            self._loop = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+
+def stop_all(handles, timeout=KILL_GRACE):
+    """并行停止多个任务，返回是否全部在期限内正常结束。
+
+    先同时取消全部任务 (各自终止进程树)，在 timeout 秒的共同期限内等待；
+    期限到达时仍未结束的任务立即强制结束进程树。总耗时约为 timeout 而不是
+    任务数 × timeout。
+    """
+    deadline = time.monotonic() + timeout
+    for handle in handles:
+        handle.cancel()
+    stragglers = []
+    for handle in handles:
+        try:
+            handle.result(max(0.0, deadline - time.monotonic()))
+        except concurrent.futures.TimeoutError:
+            stragglers.append(handle)
+        except Exception:
+            pass
+    for handle in stragglers:
+        handle.kill()
+    deadline = time.monotonic() + KILL_WAIT
+    for handle in stragglers:
+        try:
+            handle.result(max(0.0, deadline - time.monotonic()))
+        except Exception:
+            pass
+    return not stragglers
+
+
+async def _drain():
+    pending = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+    if pending:
+        await asyncio.wait(pending, timeout=KILL_WAIT)
+
+
+_default_runner = None
+_default_lock = threading.Lock()
+
+
+def default_runner():
+    """进程内共享的 TaskRunner，首次调用时创建，解释器退出时关闭"""
+    global _default_runner
+    with _default_lock:
+        if _default_runner is None:
+            _default_runner = TaskRunner()
+            atexit.register(_default_runner.close)
+        return _default_runner
+
+
+@contextmanager
+def cancel_on_interrupt(runner):
+    """在此范围内第一次 Ctrl+C 取消 runner 中的全部任务 (终止子进程，调用方照常拿到结果)，
+    第二次 Ctrl+C 抛出 KeyboardInterrupt。产出的 Event 在收到 Ctrl+C 后被置位。
+
+    只能在主线程中安装信号处理函数，其他线程中不做任何事。
+    """
+    interrupted = threading.Event()
+    if threading.current_thread() is not threading.main_thread():
+        yield interrupted
+        return
+
+    def handler(signum, frame):
+        if interrupted.is_set():
+            raise KeyboardInterrupt
+        interrupted.set()
+        print('\n[INFO] 正在取消运行中的任务... (再按一次 Ctrl+C 立即退出)', file=sys.stderr, flush=True)
+        runner.cancel_all()
+
+    previous = signal.signal(signal.SIGINT, handler)
+    try:
+        yield interrupted
+    finally:
+        signal.signal(signal.SIGINT, previous)
@@ -0,0 +1,158 @@
+# toolbox - Windows 工具箱核心模块
+# 任务调度模块：并发上限 + 优先级队列（纯 Python，不依赖 Qt）
+
+import heapq
+import itertools
+import time
+
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+# 任务运行器终止超时子进程后的状态
+TIMEOUT = 'timeout'
+
+# 任务不会再变化的状态
+FINISHED_STATES = (DONE, FAILED, CANCELLED, TIMEOUT)
+
+
+class ScheduledTask:
+    """调度器中的一个任务，记录状态与各阶段的时间点（单调时钟秒数）。"""
+
+    def __init__(self, key, payload=None, priority=0, submitted_at=None):
+        self.key = key
+        self.payload = payload
+        self.priority = priority
+        self.state = QUEUED
+        self.cancel_requested = False
+        self.submitted_at = submitted_at
+        self.started_at = None
+        self.finished_at = None
+
+    @property
+    def wait_time(self):
+        """排队耗时，尚未启动时返回 None。"""
+        if self.started_at is None:
+            return None
+        return self.started_at - self.submitted_at
+
+    @property
+    def elapsed(self):
+        """运行耗时（墙钟时间），尚未启动时返回 None。"""
+        if self.started_at is None or self.finished_at is None:
+            return None
+        return self.finished_at - self.started_at
+
+    def __repr__(self):
+        return f'ScheduledTask({self.key!r}, state={self.state!r}, priority={self.priority})'
+
+
+class TaskScheduler:
+    """限制同时运行任务数的调度器。
+
+    priority 越大越先启动，同优先级按提交顺序（FIFO）。调度器本身不启动进程：
+    轮到某个任务时调用 on_start(task)，任务结束后由调用方调用 finish()。
+    on_state(task) 在每次状态变化后调用。已结束的任务不再被调度器引用。
+    """
+
+    def __init__(self, max_parallel=2, on_start=None, on_state=None, clock=time.monotonic):
+        if max_parallel < 1:
+            raise ValueError(f'max_parallel 必须大于 0: {max_parallel}')
+        self.max_parallel = max_parallel
+        self.on_start = on_start
+        self.on_state = on_state
+        self._clock = clock
+        self._queue = []
+        self._seq = itertools.count()
+        self._tasks = {}
+        self._running = {}
+
+    def __len__(self):
+        return len(self._tasks)
+
+    def get(self, key):
+        return self._tasks.get(key)
+
+    def queued(self):
+        """按启动顺序返回排队中的任务。"""
+        return [entry[2] for entry in sorted(self._queue) if entry[2].state == QUEUED]
+
+    def running(self):
+        return list(self._running.values())
+
+    def submit(self, key, payload=None, priority=0):
+        """提交任务，有空闲名额时立即启动。key 在调度器中必须唯一。"""
+        if key in self._tasks:
+            raise ValueError(f'任务已存在: {key}')
+        task = ScheduledTask(key, payload, priority, self._clock())
+        self._tasks[key] = task
+        heapq.heappush(self._queue, (-priority, next(self._seq), task))
+        self._notify(task)
+        self._pump()
+        return task
+
+    def set_max_parallel(self, max_parallel):
+        """调整并发上限；调小时不会中断已在运行的任务。"""
+        if max_parallel < 1:
+            raise ValueError(f'max_parallel 必须大于 0: {max_parallel}')
+        self.max_parallel = max_parallel
+        self._pump()
+
+    def cancel(self, key):
+        """取消任务。
+
+        排队中的任务直接变为 cancelled；运行中的任务只做标记，
+        由调用方终止进程后再调用 finish()，最终状态为 cancelled。
+        返回是否找到未结束的任务。
+        """
+        task = self._tasks.get(key)
+        if task is None:
+            return False
+        if task.state == QUEUED:
+            # 惰性删除：出队时跳过
+            self._finalize(task, CANCELLED)
+        else:
+            task.cancel_requested = True
+        return True
+
+    def finish(self, key, success):
+        """标记运行中的任务结束并启动下一个排队任务，返回该任务。"""
+        task = self._running.pop(key, None)
+        if task is None:
+            raise KeyError(key)
+        state = CANCELLED if task.cancel_requested else (DONE if success else FAILED)
+        self._finalize(task, state)
+        self._pump()
+        return task
+
+    def cancel_all(self):
+        """取消所有排队中的任务并返回它们，运行中的任务只做标记。"""
+        cancelled = self.queued()
+        for task in cancelled:
+            self._finalize(task, CANCELLED)
+        for task in self._running.values():
+            task.cancel_requested = True
+        return cancelled
+
+    def _finalize(self, task, state):
+        task.state = state
+        task.finished_at = self._clock()
+        del self._tasks[task.key]
+        self._notify(task)
+
+    def _pump(self):
+        while self._queue and len(self._running) < self.max_parallel:
+            _, _, task = heapq.heappop(self._queue)
+            if task.state != QUEUED:
+                continue
+            task.state = RUNNING
+            task.started_at = self._clock()
+            self._running[task.key] = task
+            self._notify(task)
+            if self.on_start is not None:
+                self.on_start(task)
+
+    def _notify(self, task):
+        if self.on_state is not None:
+            self.on_state(task)
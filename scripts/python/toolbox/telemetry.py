@@ -0,0 +1,149 @@
+# toolbox - Windows 工具箱核心模块
+# 运行遥测模块：每次脚本运行追加一条 JSONL 记录，并按脚本汇总耗时分位数
+
+import os
+import math
+import json
+import time
+import threading
+from datetime import datetime
+from collections import namedtuple
+
+from .utils import get_cache_dir
+
+# 记录文件路径；设为 0 / off 时不记录
+TELEMETRY_ENV = 'TOOLBOX_TELEMETRY'
+
+# 超过此大小时轮换为 runs.jsonl.1，统计时两个文件都会读取
+MAX_LOG_BYTES = 8 * 1024 * 1024
+
+ScriptStats = namedtuple('ScriptStats', ['script', 'runs', 'failures', 'p50', 'p95', 'max', 'total'])
+
+_write_lock = threading.Lock()
+
+
+class OutputMeter:
+    """统计输出字节数和峰值输出速率（按 interval 秒分桶，字节/秒）"""
+
+    def __init__(self, interval=1.0, clock=time.monotonic):
+        self.bytes = 0
+        self.interval = interval
+        self._clock = clock
+        self._start = clock()
+        self._bucket = 0
+        self._bucket_bytes = 0
+        self._peak = 0.0
+
+    def add(self, n):
+        bucket = int((self._clock() - self._start) / self.interval)
+        if bucket != self._bucket:
+            self._peak = max(self._peak, self._bucket_bytes / self.interval)
+            self._bucket = bucket
+            self._bucket_bytes = 0
+        self._bucket_bytes += n
+        self.bytes += n
+
+    @property
+    def peak_rate(self):
+        return max(self._peak, self._bucket_bytes / self.interval)
+
+
+def get_telemetry_path():
+    """记录文件路径，禁用时返回 None"""
+    value = os.environ.get(TELEMETRY_ENV, '')
+    if value.lower() in ('0', 'off', 'false', 'no'):
+        return None
+    return value or os.path.join(get_cache_dir(), 'telemetry', 'runs.jsonl')
+
+
+def _timestamp(seconds):
+    return datetime.fromtimestamp(seconds).astimezone().isoformat(timespec='milliseconds')
+
+
+def record_run(script, args, started, duration, exit_code, meter=None, queue_wait=None, source='cli', path=None):
+    """追加一条运行记录。
+
+    started 为开始时的 time.time()，duration 为单调时钟测得的秒数；meter 为 None
+    表示输出直接写到控制台、未经统计。写入失败不影响脚本运行，返回是否写入成功。
+    """
+    path = path or get_telemetry_path()
+    if path is None:
+        return False
+    event = {
+        'script': script,
+        'args': list(args),
+        'source': source,
+        'start': _timestamp(started),
+        'end': _timestamp(started + duration),
+        'duration': round(duration, 3),
+        'exit_code': exit_code,
+        'output_bytes': meter.bytes if meter is not None else None,
+        'peak_output_rate': round(meter.peak_rate, 1) if meter is not None else None,
+        'queue_wait': round(queue_wait, 3) if queue_wait is not None else None,
+    }
+    line = json.dumps(event, ensure_ascii=False) + '\n'
+    try:
+        with _write_lock:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            if os.path.exists(path) and os.path.getsize(path) > MAX_LOG_BYTES:
+                os.replace(path, f'{path}.1')
+            with open(path, 'a', encoding='utf-8') as f:
+                f.write(line)
+    except OSError:
+        return False
+    return True
+
+
+def read_runs(path=None):
+    """按时间顺序产出记录（先读轮换出的旧文件），跳过损坏的行"""
+    path = path or get_telemetry_path()
+    if path is None:
+        return
+    for name in (f'{path}.1', path):
+        try:
+            f = open(name, 'r', encoding='utf-8')
+        except OSError:
+            continue
+        with f:
+            for line in f:
+                try:
+                    event = json.loads(line)
+                except ValueError:
+                    continue
+                if isinstance(event, dict) and 'script' in event and 'duration' in event:
+                    yield event
+
+
+def percentile(values, q):
+    """最近秩法分位数，values 需已排序且非空"""
+    rank = max(1, math.ceil(q / 100 * len(values)))
+    return values[rank - 1]
+
+
+def summarize_runs(runs):
+    """按脚本汇总运行记录，按总耗时从高到低排序，便于找出最耗时的步骤"""
+    durations = {}
+    failures = {}
+    for event in runs:
+        script = event['script']
+        durations.setdefault(script, []).append(float(event['duration']))
+        failures[script] = failures.get(script, 0) + (event.get('exit_code') != 0)
+    stats = []
+    for script, values in durations.items():
+        values.sort()
+        stats.append(ScriptStats(script, len(values), failures[script], percentile(values, 50),
+                                 percentile(values, 95), values[-1], round(sum(values), 3)))
+    stats.sort(key=lambda s: (-s.total, s.script))
+    return stats
+
+
+def format_stats(stats):
+    """生成 --stats 输出的表格文本"""
+    if not stats:
+        return '暂无运行记录。'
+    width = max([len(s.script) for s in stats] + [4])
+    lines = [f"{'脚本':<{width - 2}}  {'次数':>4}  {'失败':>4}  {'p50':>8}  {'p95':>8}  {'最长':>6}  {'总计':>7}"]
+    for s in stats:
+        lines.append(f'{s.script:<{width}}  {s.runs:>6}  {s.failures:>6}  {s.p50:>7.1f}s  {s.p95:>7.1f}s  '
+                     f'{s.max:>7.1f}s  {s.total:>8.1f}s')
+    return '\n'.join(lines)
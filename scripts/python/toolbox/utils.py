@@ -4,10 +4,16 @@
 import sys
 import os
 import ctypes
-import glob
 import shutil
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
+from .metadata import read_header_comments, read_script_header, NO_DIRECTIVES
+from .metadata_cache import MetadataCache
+from .discovery import discover_scripts
+from .profiling import timed
+
 
 def is_admin():
     """检查当前进程是否具有管理员权限"""
@@ -56,6 +62,14 @@ def get_tmp_dir():
     return tmp_dir
 
 
+def get_cache_dir():
+    """获取持久化缓存目录（不会被 cleanup_tmp_dir 清理）"""
+    cache_dir = os.path.join(get_base_dir(), 'cache')
+    if not os.path.exists(cache_dir):
+        os.makedirs(cache_dir, exist_ok=True)
+    return cache_dir
+
+
 def cleanup_tmp_dir():
     """Clean up the tmp directory."""
     tmp_dir = os.path.join(get_base_dir(), 'tmp')
@@ -66,35 +80,25 @@ def cleanup_tmp_dir():
             print(f"Failed to cleanup tmp directory: {e}")
 
 
+def sha256_file(path, chunk_size=1024 * 1024):
+    """按固定大小分块计算文件的 SHA-256 十六进制摘要，内嵌大体积数据的脚本不会整体读入内存。"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+@timed('parse_script_metadata')
 def parse_script_metadata(filepath):
     """解析脚本中的标题和描述。"""
     original_title = os.path.splitext(os.path.basename(filepath))[0]
-    description = ""
 
     try:
-        with open(filepath, 'r', encoding='utf-8', errors='ignore') as f:
-            lines = f.readlines()[:20]
-
-        comments = []
-        for line in lines:
-            line_upper = line.upper().strip()
-            if line.startswith('::'):
-                text = line[2:].strip()
-                if text and not text.startswith('='):
-                    comments.append(text)
-            elif line_upper.startswith('REM '):
-                text = line[4:].strip()
-                if text and not text.startswith('='):
-                    comments.append(text)
-            elif line.startswith('#') and not line.startswith('#!'):
-                text = line[1:].strip()
-                if text and not text.startswith('='):
-                    comments.append(text)
-
+        comments = read_header_comments(filepath, limit=2)
         if comments:
             title = comments[0]
-            if len(comments) > 1:
-                description = comments[1]
+            description = comments[1] if len(comments) > 1 else ""
             return title, description
     except Exception as e:
         print(f"解析元数据失败 {filepath}: {e}")
@@ -102,38 +106,62 @@ def parse_script_metadata(filepath):
     return original_title, ""
 
 
-def scan_scripts():
-    """Scan scripts directory and subdirectories for supported scripts."""
+def parse_script_header(filepath):
+    """解析脚本中的标题、描述和头部指令 (requires / conflicts / after / reboot-after / timeout / probe / cache-ttl)。"""
+    original_title = os.path.splitext(os.path.basename(filepath))[0]
+
+    try:
+        comments, directives = read_script_header(filepath, limit=2)
+        if comments:
+            title = comments[0]
+            description = comments[1] if len(comments) > 1 else ""
+            return title, description, directives
+        return original_title, "", directives
+    except Exception as e:
+        print(f"解析元数据失败 {filepath}: {e}")
+
+    return original_title, "", NO_DIRECTIVES
+
+
+@timed('scan_scripts')
+def scan_scripts(use_cache=True, max_depth=1, include=None, exclude=None, workers=None):
+    """Scan scripts directory and subdirectories for supported scripts.
+
+    use_cache 为 True 时通过磁盘元数据索引跳过未变化的文件；
+    max_depth / include / exclude 透传给 discover_scripts；
+    workers 大于 1 时使用线程池并发解析未命中缓存的脚本，结果顺序与串行一致。
+    """
     scripts_dir = get_scripts_dir()
-    scripts = []
-
-    # 扫描所有子目录下的脚本
-    search_patterns = [
-        os.path.join(scripts_dir, '*.ps1'),
-        os.path.join(scripts_dir, '*', '*.ps1'),
-        os.path.join(scripts_dir, '*.bat'),
-        os.path.join(scripts_dir, '*', '*.bat'),
-        os.path.join(scripts_dir, '*.cmd'),
-        os.path.join(scripts_dir, '*', '*.cmd'),
-    ]
-
-    found_files = []
-    for pattern in search_patterns:
-        found_files.extend(glob.glob(pattern))
-
-    # 去重并过滤
-    unique_files = list(set(os.path.abspath(f) for f in found_files))
-
-    for filepath in unique_files:
-        basename = os.path.basename(filepath).lower()
-        
-        # 排除副本（同名的 .ps1 和 .bat/.cmd，优先保留 .ps1）
-        if basename.endswith('.bat') and os.path.exists(filepath.replace('.bat', '.ps1')):
-            continue
-        if basename.endswith('.cmd') and (os.path.exists(filepath.replace('.cmd', '.ps1')) or os.path.exists(filepath.replace('.cmd', '.bat'))):
-            continue
-
-        title, desc = parse_script_metadata(filepath)
-        scripts.append((filepath, title, desc))
-
-    return sorted(scripts, key=lambda x: x[1])
+    scripts = {}
+    pending = []
+    cache = MetadataCache.load(os.path.join(get_cache_dir(), 'metadata.json')) if use_cache else None
+
+    for entry in discover_scripts(scripts_dir, max_depth=max_depth, include=include, exclude=exclude):
+        filepath = entry.path
+        if cache is not None:
+            st = entry.stat()
+            meta = cache.get(filepath, st.st_mtime_ns, st.st_size)
+            if meta is not None:
+                scripts[filepath] = (meta['title'], meta['description'])
+                continue
+            pending.append((filepath, st))
+        else:
+            pending.append((filepath, None))
+
+    paths = [filepath for filepath, _ in pending]
+    if workers and workers > 1 and len(paths) > 1:
+        with ThreadPoolExecutor(max_workers=min(workers, len(paths))) as executor:
+            results = list(executor.map(parse_script_metadata, paths))
+    else:
+        results = [parse_script_metadata(filepath) for filepath in paths]
+
+    for (filepath, st), (title, desc) in zip(pending, results):
+        scripts[filepath] = (title, desc)
+        if cache is not None:
+            cache.put(filepath, st.st_mtime_ns, st.st_size, {'title': title, 'description': desc})
+
+    if cache is not None:
+        cache.prune(scripts_dir)
+        cache.save()
+
+    return sorted(((path, title, desc) for path, (title, desc) in scripts.items()), key=lambda x: (x[1], x[0]))
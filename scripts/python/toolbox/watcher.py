@@ -0,0 +1,60 @@
+# toolbox - Windows 工具箱核心模块
+# 脚本目录变更检测模块（纯 Python，不依赖 Qt）
+
+import os
+from collections import namedtuple
+
+from .discovery import discover_scripts
+
+ScriptDiff = namedtuple('ScriptDiff', ['added', 'removed', 'changed'])
+
+
+def diff_snapshots(old, new):
+    """比较两个 {路径: 值} 快照，返回按路径排序的新增、删除、变更列表。"""
+    added = sorted(path for path in new if path not in old)
+    removed = sorted(path for path in old if path not in new)
+    changed = sorted(path for path in new if path in old and old[path] != new[path])
+    return ScriptDiff(added, removed, changed)
+
+
+def take_snapshot(root, **kwargs):
+    """采集 root 下脚本的 {路径: (mtime_ns, size)} 快照，kwargs 透传给 discover_scripts。"""
+    snapshot = {}
+    for entry in discover_scripts(root, **kwargs):
+        try:
+            st = entry.stat()
+        except OSError:
+            continue
+        snapshot[entry.path] = (st.st_mtime_ns, st.st_size)
+    return snapshot
+
+
+class PollingWatcher:
+    """通过比较缓存的 mtime/size 检测脚本目录变更。
+
+    GUI 中由 QFileSystemWatcher 的通知或定时器触发 poll()，
+    两者共用同一套差异计算，便于在无界面环境下测试。
+    """
+
+    def __init__(self, root, **kwargs):
+        self.root = os.path.abspath(root)
+        self._kwargs = kwargs
+        self.snapshot = take_snapshot(self.root, **kwargs)
+
+    def directories(self):
+        """返回需要监听的目录列表（根目录及其下已知脚本所在的目录）。"""
+        dirs = {self.root}
+        dirs.update(os.path.dirname(path) for path in self.snapshot)
+        try:
+            with os.scandir(self.root) as it:
+                dirs.update(e.path for e in it if not e.name.startswith('.') and e.is_dir())
+        except OSError:
+            pass
+        return sorted(dirs)
+
+    def poll(self):
+        """重新采集快照并返回与上一次的差异。"""
+        current = take_snapshot(self.root, **self._kwargs)
+        diff = diff_snapshots(self.snapshot, current)
+        self.snapshot = current
+        return diff
@@ -0,0 +1,49 @@
+# 基准测试：StreamDecoder vs 旧版逐块 try utf-8 / except gbk 解码
+# 用法: python test/bench/bench_decoder.py [总MB] [块大小字节]
+
+import os
+import sys
+import time
+
+_scripts_python_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'scripts', 'python')
+if _scripts_python_dir not in sys.path:
+    sys.path.insert(0, _scripts_python_dir)
+from toolbox.decoder import StreamDecoder
+
+
+def legacy_decode(data):
+    """旧版 TaskInterface._on_output 的解码方式"""
+    try:
+        return data.decode('utf-8')
+    except:
+        return data.decode('gbk', errors='replace')
+
+
+def bench(name, decode, chunks, expected):
+    start = time.perf_counter()
+    out = [decode(chunk) for chunk in chunks]
+    elapsed = time.perf_counter() - start
+    text = ''.join(out)
+    total = sum(len(c) for c in chunks)
+    bad = sum(1 for a, b in zip(text.splitlines(), expected.splitlines()) if a != b)
+    print(f'{name:<14}{elapsed * 1000:>10.1f}{total / 2**20 / elapsed:>10.1f}{bad:>12}')
+
+
+def main():
+    total = int(float(sys.argv[1]) * 2**20) if len(sys.argv) > 1 else 50 * 2**20
+    chunk_size = int(sys.argv[2]) if len(sys.argv) > 2 else 4096
+    line = '部署映像服务和管理工具 Version: 10.0.17763 [=====   42.0%   ] ✅\r\n'
+    expected = line * (total // len(line.encode('utf-8')))
+    data = expected.encode('utf-8')
+    # 块大小与行长度互质，多字节字符会频繁跨越块边界
+    chunks = [data[i:i + chunk_size] for i in range(0, len(data), chunk_size)]
+
+    print(f'总量: {len(data) / 2**20:.0f} MB, 块大小: {chunk_size} 字节, 块数: {len(chunks)}')
+    print(f'{"方案":<14}{"耗时(ms)":>10}{"MB/s":>10}{"乱码行数":>12}')
+    bench('try/except', legacy_decode, chunks, expected)
+    decoder = StreamDecoder()
+    bench('StreamDecoder', decoder.decode, chunks + [b''], expected)
+
+
+if __name__ == '__main__':
+    main()
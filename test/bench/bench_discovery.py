@@ -0,0 +1,73 @@
+# 基准测试：os.scandir 单次遍历 vs 旧版六次 glob 扫描
+# 用法: python test/bench/bench_discovery.py [文件数]
+
+import os
+import sys
+import glob
+import time
+import shutil
+import tempfile
+
+_scripts_python_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'scripts', 'python')
+if _scripts_python_dir not in sys.path:
+    sys.path.insert(0, _scripts_python_dir)
+from toolbox.discovery import discover_scripts
+
+
+def legacy_discover(scripts_dir):
+    """旧版 scan_scripts 的文件发现部分（不含元数据解析）"""
+    patterns = [os.path.join(scripts_dir, *parts) for parts in (
+        ('*.ps1',), ('*', '*.ps1'), ('*.bat',), ('*', '*.bat'), ('*.cmd',), ('*', '*.cmd'))]
+    found = []
+    for pattern in patterns:
+        found.extend(glob.glob(pattern))
+    result = []
+    for filepath in set(os.path.abspath(f) for f in found):
+        basename = os.path.basename(filepath).lower()
+        if basename.endswith('.bat') and os.path.exists(filepath.replace('.bat', '.ps1')):
+            continue
+        if basename.endswith('.cmd') and (os.path.exists(filepath.replace('.cmd', '.ps1')) or os.path.exists(filepath.replace('.cmd', '.bat'))):
+            continue
+        result.append(filepath)
+    return result
+
+
+def build_tree(root, total):
+    """生成 total 个文件：100 个子目录，混合 .ps1/.bat/.cmd/.txt 与同名副本"""
+    exts = ('.ps1', '.bat', '.cmd', '.txt')
+    for i in range(total):
+        sub = os.path.join(root, f'dir{i % 100:03d}')
+        os.makedirs(sub, exist_ok=True)
+        # 每个主干出现两次扩展名，制造需要去重的同名脚本
+        stem = f'script{i // 2:05d}'
+        with open(os.path.join(sub, stem + exts[i % len(exts)]), 'w') as f:
+            f.write('# bench\n')
+
+
+def timeit(func, repeat=5):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    total = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    root = tempfile.mkdtemp(prefix='toolbox_bench_')
+    try:
+        build_tree(root, total)
+        legacy_time, legacy = timeit(lambda: legacy_discover(root))
+        new_time, new = timeit(lambda: [e.path for e in discover_scripts(root)])
+        assert sorted(legacy) == sorted(new), '结果不一致'
+        print(f'文件数: {total}, 脚本数: {len(new)}')
+        print(f'glob x6 : {legacy_time * 1000:8.2f} ms')
+        print(f'scandir : {new_time * 1000:8.2f} ms')
+        print(f'加速比  : {legacy_time / new_time:8.2f}x')
+    finally:
+        shutil.rmtree(root)
+
+
+if __name__ == '__main__':
+    main()
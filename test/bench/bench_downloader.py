@@ -0,0 +1,50 @@
+# 基准测试：单连接 vs 多连接分块下载，本地 http.server 注入请求延迟和单连接限速
+# 用法: python test/bench/bench_downloader.py [文件MB] [延迟毫秒] [单连接限速MB/s]
+
+import os
+import sys
+import time
+import shutil
+import tempfile
+
+_test_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_scripts_python_dir = os.path.join(os.path.dirname(_test_dir), 'scripts', 'python')
+for _path in (_scripts_python_dir, _test_dir):
+    if _path not in sys.path:
+        sys.path.insert(0, _path)
+from toolbox.downloader import download
+from http_stub import StubServer
+
+
+def main():
+    size = int(float(sys.argv[1]) * 2**20) if len(sys.argv) > 1 else 32 * 2**20
+    latency = (float(sys.argv[2]) if len(sys.argv) > 2 else 150.0) / 1000
+    rate = int(float(sys.argv[3]) * 2**20) if len(sys.argv) > 3 else 4 * 2**20
+    root = tempfile.mkdtemp(prefix='toolbox_bench_')
+    try:
+        www = os.path.join(root, 'www')
+        os.makedirs(www)
+        data = os.urandom(size)
+        with open(os.path.join(www, 'asset.msixbundle'), 'wb') as f:
+            f.write(data)
+        server = StubServer(www, latency=latency, rate=rate)
+        url = server.url('asset.msixbundle')
+
+        print(f'文件: {size / 2**20:.0f} MB, 请求延迟: {latency * 1000:.0f} ms, 单连接限速: {rate / 2**20:.1f} MB/s')
+        print(f'{"连接数":<8}{"耗时(s)":>10}{"MB/s":>10}{"请求数":>8}')
+        for connections in (1, 2, 4, 8):
+            out = os.path.join(root, f'out{connections}.bin')
+            del server.requests[:]
+            start = time.perf_counter()
+            download(url, out, connections=connections, chunk_size=4 * 2**20)
+            elapsed = time.perf_counter() - start
+            with open(out, 'rb') as f:
+                assert f.read() == data
+            print(f'{connections:<11}{elapsed:>10.2f}{size / 2**20 / elapsed:>10.1f}{len(server.requests):>8}')
+        server.close()
+    finally:
+        shutil.rmtree(root)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,51 @@
+# 基准测试：每个脚本新建进程 vs 复用常驻工作进程，N 个短脚本的总耗时
+# 解释器冷启动用 sleep 模拟 (PowerShell 冷启动通常为数百毫秒)
+# 用法: python test/bench/bench_executor.py [脚本数] [冷启动秒数]
+
+import os
+import sys
+import time
+import shutil
+import tempfile
+
+_scripts_python_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'scripts', 'python')
+if _scripts_python_dir not in sys.path:
+    sys.path.insert(0, _scripts_python_dir)
+from toolbox.executor import SH_BACKEND, HostBackend, ScriptJob, ProcessExecutor, WorkerPool
+
+
+def bench(executor, jobs):
+    start = time.perf_counter()
+    for job in jobs:
+        executor.run(job, len)
+    return time.perf_counter() - start
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    cold = float(sys.argv[2]) if len(sys.argv) > 2 else 0.3
+    backend = HostBackend(
+        'sh-cold',
+        ['/bin/sh', '-c', f'sleep {cold}; {SH_BACKEND.host_argv[2]}'],
+        lambda job: ['/bin/sh', '-c', f'sleep {cold}; sh "$0" "$@"', job.script] + list(job.args),
+        ('.sh',),
+    )
+    tmp = tempfile.mkdtemp()
+    try:
+        script = os.path.join(tmp, 'job.sh')
+        with open(script, 'w', encoding='utf-8') as f:
+            f.write('echo done\n')
+        jobs = [ScriptJob(script, []) for _ in range(n)]
+
+        process = bench(ProcessExecutor(argv_builder=backend.process_argv), jobs)
+        with WorkerPool(backend, max_jobs=n) as pool:
+            host = bench(pool, jobs)
+        print(f'{n} 个脚本，模拟冷启动 {cold * 1000:.0f}ms')
+        print(f"{'新建进程':<12}{process:>8.2f}s  {process / n * 1000:>7.1f}ms/个")
+        print(f"{'常驻工作进程':<12}{host:>8.2f}s  {host / n * 1000:>7.1f}ms/个")
+    finally:
+        shutil.rmtree(tmp)
+
+
+if __name__ == '__main__':
+    main()
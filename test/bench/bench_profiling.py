@@ -0,0 +1,51 @@
+# 基准测试：计时区间关闭 / 开启时相对未插桩函数的单次调用开销
+# 用法: python test/bench/bench_profiling.py [调用次数]
+
+import os
+import sys
+import time
+
+_scripts_python_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'scripts', 'python')
+if _scripts_python_dir not in sys.path:
+    sys.path.insert(0, _scripts_python_dir)
+from toolbox import profiling
+from toolbox.profiling import span, timed
+
+
+def plain(x):
+    return x + 1
+
+
+@timed('bench')
+def decorated(x):
+    return x + 1
+
+
+def with_span(x):
+    with span('bench'):
+        return x + 1
+
+
+def bench(func, n):
+    start = time.perf_counter()
+    for i in range(n):
+        func(i)
+    return (time.perf_counter() - start) / n * 1e9
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    print(f"{'方式':<18}{'关闭 ns/次':>12}{'开启 ns/次':>12}")
+    base = bench(plain, n)
+    print(f"{'未插桩':<18}{base:>12.0f}{'-':>12}")
+    for name, func in (('@timed', decorated), ('with span()', with_span)):
+        off = bench(func, n)
+        profiling.enable()
+        on = bench(func, n)
+        profiling.disable()
+        print(f'{name:<18}{off:>12.0f}{on:>12.0f}')
+    profiling.reset()
+
+
+if __name__ == '__main__':
+    main()
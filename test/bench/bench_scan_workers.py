@@ -0,0 +1,53 @@
+# 基准测试：scan_scripts 在注入 I/O 延迟下使用 1/4/16 个线程的扩展性
+# 用法: python test/bench/bench_scan_workers.py [脚本数] [延迟毫秒]
+
+import os
+import sys
+import time
+import shutil
+import tempfile
+from unittest.mock import patch
+
+_scripts_python_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'scripts', 'python')
+if _scripts_python_dir not in sys.path:
+    sys.path.insert(0, _scripts_python_dir)
+from toolbox import utils
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 400
+    latency = (float(sys.argv[2]) if len(sys.argv) > 2 else 5.0) / 1000
+    root = tempfile.mkdtemp(prefix='toolbox_bench_')
+    real_parse = utils.parse_script_metadata
+
+    def slow_parse(filepath):
+        # 模拟网络共享上每次打开文件的往返延迟
+        time.sleep(latency)
+        return real_parse(filepath)
+
+    try:
+        for i in range(count):
+            sub = os.path.join(root, f'dir{i % 10}')
+            os.makedirs(sub, exist_ok=True)
+            with open(os.path.join(sub, f'script{i:05d}.ps1'), 'w', encoding='utf-8') as f:
+                f.write(f'# 标题 {i}\n# 描述 {i}\n')
+
+        print(f'脚本数: {count}, 注入延迟: {latency * 1000:.1f} ms')
+        baseline = None
+        reference = None
+        with patch.object(utils, 'get_scripts_dir', return_value=root), \
+                patch.object(utils, 'parse_script_metadata', side_effect=slow_parse):
+            for workers in (1, 4, 16):
+                start = time.perf_counter()
+                result = utils.scan_scripts(use_cache=False, workers=workers)
+                elapsed = time.perf_counter() - start
+                reference = reference or result
+                assert result == reference, '输出顺序不一致'
+                baseline = baseline or elapsed
+                print(f'workers={workers:2d}: {elapsed * 1000:9.2f} ms  ({baseline / elapsed:5.2f}x)')
+    finally:
+        shutil.rmtree(root)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+# 基准测试：TerminalTextEdit 批量刷新 vs 逐块写入
+# 直接向 TaskInterface._on_output 灌入大量合成输出 (与运行器回调投递的数据块相同)
+# 用法: python test/bench/bench_terminal_output.py [总MB] [块大小KB]
+
+import os
+import sys
+import time
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+_scripts_python_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'scripts', 'python')
+if _scripts_python_dir not in sys.path:
+    sys.path.insert(0, _scripts_python_dir)
+
+from PySide6.QtGui import QTextCursor, QTextCharFormat, QColor
+from PySide6.QtWidgets import QApplication
+
+
+def legacy_append_text(terminal, text, color=None):
+    """旧版 append_text：每块都移动光标、新建格式并强制滚动"""
+    cursor = terminal.textCursor()
+    cursor.movePosition(QTextCursor.End)
+    fmt = QTextCharFormat()
+    fmt.setForeground(QColor(color or '#cdd6f4'))
+    cursor.insertText(text, fmt)
+    terminal.setTextCursor(cursor)
+    terminal.ensureCursorVisible()
+
+
+def make_chunk(size):
+    line = b'[DISM] Processing package 42.0%  ' + b'=' * 40 + b'\r\n'
+    return (line * (size // len(line) + 1))[:size]
+
+
+def run(kind, total, chunk_size, app):
+    import toolbox
+    task = toolbox.TaskInterface('bench', 'bench', __file__)
+    task.resize(900, 600)
+    task.show()
+    # 两种方案都限制文档行数，测量的是渲染吞吐而非内存增长
+    task.terminal.document().setMaximumBlockCount(10000)
+    if kind == 'legacy':
+        task.terminal.queue_text = lambda text, color=None: legacy_append_text(task.terminal, text, color)
+
+    chunk = make_chunk(chunk_size)
+    count = total // chunk_size
+    # 逐块投递并运行一次事件循环，记录单次事件处理的最长阻塞时间
+    max_stall = 0.0
+    start = time.perf_counter()
+    for _ in range(count):
+        tick = time.perf_counter()
+        task._on_output(chunk)
+        app.processEvents()
+        max_stall = max(max_stall, time.perf_counter() - tick)
+    while task.terminal._pending:
+        tick = time.perf_counter()
+        app.processEvents()
+        max_stall = max(max_stall, time.perf_counter() - tick)
+    elapsed = time.perf_counter() - start
+    renders = count if kind == 'legacy' else FLUSHES[0]
+    print(f'{kind:<8}{count:>10}{renders:>10}{elapsed:>12.2f}{total / 2**20 / elapsed:>10.1f}{max_stall * 1000:>14.1f}')
+
+
+FLUSHES = [0]
+
+
+def install_flush_counter():
+    """在类上包装 flush 以统计实际渲染次数（需在创建控件前调用）"""
+    import toolbox
+    original = toolbox.TerminalTextEdit.flush
+
+    def counting_flush(self, *args):
+        FLUSHES[0] += bool(self._pending)
+        original(self, *args)
+
+    toolbox.TerminalTextEdit.flush = counting_flush
+
+
+def main():
+    total = int(float(sys.argv[1]) * 2**20) if len(sys.argv) > 1 else 100 * 2**20
+    chunk_size = int(sys.argv[2]) * 1024 if len(sys.argv) > 2 else 4096
+    app = QApplication.instance() or QApplication([])
+    install_flush_counter()
+    print(f'总量: {total / 2**20:.0f} MB, 块大小: {chunk_size} 字节')
+    print(f'{"方案":<8}{"块数":>10}{"渲染次数":>10}{"耗时(s)":>12}{"MB/s":>10}{"最长阻塞(ms)":>14}')
+    for kind in ('batched', 'legacy'):
+        run(kind, total, chunk_size, app)
+
+
+if __name__ == '__main__':
+    main()
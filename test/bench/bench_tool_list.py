@@ -0,0 +1,89 @@
+# 基准测试：虚拟化工具列表 vs 每个脚本一个 ToolCard 控件
+# 在 offscreen 平台下测量 100 / 1k / 10k 个脚本时的构建耗时与常驻内存增量
+# 用法: python test/bench/bench_tool_list.py [数量...]
+
+import os
+import sys
+import time
+import subprocess
+from unittest.mock import patch
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+_scripts_python_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'scripts', 'python')
+if _scripts_python_dir not in sys.path:
+    sys.path.insert(0, _scripts_python_dir)
+
+
+def rss_bytes():
+    """读取当前进程常驻内存（仅 Linux，其他平台返回 0）"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        return 0
+
+
+def build_legacy(scripts):
+    """旧版 ToolsInterface：SmoothScrollArea 中为每个脚本创建一个 ToolCard"""
+    from PySide6.QtCore import Qt
+    from PySide6.QtWidgets import QWidget, QVBoxLayout
+    from qfluentwidgets import SmoothScrollArea
+    from toolbox import ToolCard
+
+    root = QWidget()
+    main_layout = QVBoxLayout(root)
+    scroll = SmoothScrollArea(root)
+    scroll.setWidgetResizable(True)
+    content = QWidget()
+    layout = QVBoxLayout(content)
+    layout.setAlignment(Qt.AlignTop)
+    for path, title, desc in scripts:
+        layout.addWidget(ToolCard(path, title, desc, content))
+    scroll.setWidget(content)
+    main_layout.addWidget(scroll)
+    return root
+
+
+def build_virtual(scripts):
+    from toolbox import ToolsInterface
+    with patch('toolbox.gui.main_window.scan_scripts', return_value=scripts), \
+            patch('toolbox.gui.main_window.get_scripts_dir', return_value=os.path.join(os.sep, 'nonexistent')):
+        return ToolsInterface()
+
+
+def run_one(kind, count):
+    from PySide6.QtWidgets import QApplication
+    app = QApplication.instance() or QApplication([])
+    import toolbox  # noqa: F401  预先导入，避免计入构建耗时
+
+    scripts = [(f'C:\\scripts\\Script{i:05d}.ps1', f'脚本 {i:05d}', f'描述 {i}') for i in range(count)]
+    before = rss_bytes()
+    start = time.perf_counter()
+    widget = (build_legacy if kind == 'legacy' else build_virtual)(scripts)
+    widget.resize(900, 680)
+    widget.show()
+    app.processEvents()
+    elapsed = time.perf_counter() - start
+    print(f'{kind},{count},{elapsed:.4f},{rss_bytes() - before}')
+
+
+def main():
+    if len(sys.argv) == 4 and sys.argv[1] == '--child':
+        run_one(sys.argv[2], int(sys.argv[3]))
+        return
+
+    counts = [int(a) for a in sys.argv[1:]] or [100, 1000, 10000]
+    print(f'{"方案":<8}{"数量":>8}{"构建耗时(ms)":>16}{"RSS 增量(MB)":>16}')
+    for count in counts:
+        for kind in ('legacy', 'virtual'):
+            # 每个组合在独立进程中运行，保证内存数据互不干扰
+            out = subprocess.run([sys.executable, __file__, '--child', kind, str(count)],
+                                 capture_output=True, text=True, check=True).stdout
+            line = [l for l in out.splitlines() if l.startswith(kind + ',')][-1]
+            _, _, elapsed, rss = line.split(',')
+            print(f'{kind:<8}{count:>8}{float(elapsed) * 1000:>16.1f}{int(rss) / 2**20:>16.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,11 @@
+# 测试用的可控时钟：代替 time.monotonic / time.time 传给接受 clock 参数的组件
+
+
+class FakeClock:
+    """返回 now 的时钟，测试中直接修改 now 推进时间"""
+
+    def __init__(self, now=0.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
@@ -0,0 +1,122 @@
+# 测试用本地 HTTP 服务：支持 Range、注入延迟、限速和故障
+
+import os
+import time
+import threading
+from functools import partial
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+
+
+class StubHandler(SimpleHTTPRequestHandler):
+    """提供静态文件的请求处理器，行为由 server 上的属性控制：
+
+    latency: 每个请求开始响应前的等待秒数
+    rate: 每个连接的限速 (字节/秒)，0 表示不限
+    ranges: 是否支持 Range 请求
+    fail_next: 接下来的若干个请求返回 503
+    fail_after: 第 fail_after 个请求之后的所有请求都返回 503，None 表示不启用
+    cut_next: 接下来的若干个响应在发送一半后断开连接
+    validators: 是否发送 ETag
+    """
+
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.requests.append((self.path, self.headers.get('Range')))
+            fail = server.fail_next > 0
+            server.fail_next -= fail
+            if server.fail_after is not None and len(server.requests) > server.fail_after:
+                fail = True
+            cut = not fail and server.cut_next > 0
+            server.cut_next -= cut
+        if server.latency:
+            time.sleep(server.latency)
+        if fail:
+            self.send_error(503)
+            return
+
+        path = self.translate_path(self.path)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+        except OSError:
+            self.send_error(404)
+            return
+
+        start, end = 0, len(data) - 1
+        range_header = self.headers.get('Range')
+        partial_response = server.ranges and range_header and range_header.startswith('bytes=')
+        if partial_response:
+            first, _, last = range_header[6:].partition('-')
+            start = int(first)
+            end = min(int(last), len(data) - 1) if last else len(data) - 1
+            if start >= len(data):
+                self.send_error(416)
+                return
+            self.send_response(206)
+            self.send_header('Content-Range', f'bytes {start}-{end}/{len(data)}')
+        else:
+            self.send_response(200)
+            self.send_header('Accept-Ranges', 'bytes' if server.ranges else 'none')
+        body = data[start:end + 1]
+        self.send_header('Content-Length', str(len(body)))
+        if server.validators:
+            self.send_header('ETag', f'"{os.path.getmtime(path)}-{len(data)}"')
+        self.end_headers()
+
+        if cut:
+            body = body[:len(body) // 2]
+        self._send_body(body, server.rate)
+        if cut:
+            self.close_connection = True
+
+    def _send_body(self, body, rate):
+        block = 16 * 1024
+        started = time.monotonic()
+        for offset in range(0, len(body), block):
+            self.wfile.write(body[offset:offset + block])
+            if rate:
+                # 按连接限速，模拟高延迟链路上单个 TCP 连接的吞吐上限
+                delay = started + (offset + block) / rate - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+
+    def log_message(self, *args):
+        pass
+
+
+class StubServer:
+    """在后台线程中提供 root 目录下文件的本地 HTTP 服务"""
+
+    def __init__(self, root, latency=0.0, rate=0, ranges=True):
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), partial(StubHandler, directory=root))
+        self.httpd.daemon_threads = True
+        self.httpd.lock = threading.Lock()
+        self.httpd.requests = []
+        self.httpd.latency = latency
+        self.httpd.rate = rate
+        self.httpd.ranges = ranges
+        self.httpd.fail_next = 0
+        self.httpd.fail_after = None
+        self.httpd.cut_next = 0
+        self.httpd.validators = True
+        self.thread = threading.Thread(target=self.httpd.serve_forever, kwargs={'poll_interval': 0.05}, daemon=True)
+        self.thread.start()
+
+    def __getattr__(self, name):
+        return getattr(self.httpd, name)
+
+    def __setattr__(self, name, value):
+        if name in ('latency', 'rate', 'ranges', 'fail_next', 'fail_after', 'cut_next', 'validators'):
+            setattr(self.httpd, name, value)
+        else:
+            super().__setattr__(name, value)
+
+    def url(self, name):
+        return f'http://127.0.0.1:{self.httpd.server_address[1]}/{name}'
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
@@ -0,0 +1,87 @@
+import io
+import os
+import sys
+import time
+import unittest
+from unittest.mock import patch
+
+
+# 添加模块路径
+_scripts_python_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'scripts', 'python')
+if _scripts_python_dir not in sys.path:
+    sys.path.insert(0, _scripts_python_dir)
+from toolbox.batch import BatchResult, run_batch, aggregate_exit_code, format_summary, SKIPPED
+
+
+def py(code):
+    return [sys.executable, '-c', code]
+
+
+class TestRunBatch(unittest.TestCase):
+    def test_prefixed_output_and_exit_codes(self):
+        out = io.StringIO()
+        results = run_batch([
+            ('a', py("print('hello'); print('world')")),
+            ('bb', py("import sys; print('oops'); sys.exit(3)")),
+        ], jobs=2, stream=out)
+        lines = out.getvalue().splitlines()
+        self.assertEqual([r.returncode for r in results], [0, 3])
+        self.assertEqual([r.name for r in results], ['a', 'bb'])
+        self.assertIn('[a ] hello', lines)
+        self.assertIn('[a ] world', lines)
+        self.assertIn('[bb] oops', lines)
+        # 同一进程的行保持原有顺序
+        self.assertLess(lines.index('[a ] hello'), lines.index('[a ] world'))
+        self.assertEqual(aggregate_exit_code(results), 3)
+
+    def test_parallel_faster_than_serial(self):
+        commands = [(str(i), py("import time; time.sleep(0.5)")) for i in range(4)]
+        start = time.perf_counter()
+        run_batch(commands, jobs=4, stream=io.StringIO())
+        self.assertLess(time.perf_counter() - start, 1.5)
+
+    def test_serial_keeps_order(self):
+        out = io.StringIO()
+        run_batch([(str(i), py(f"print({i})")) for i in range(5)], jobs=1, stream=out)
+        self.assertEqual(out.getvalue().splitlines(), [f'[{i}] {i}' for i in range(5)])
+
+    def test_fail_fast_skips_remaining(self):
+        results = run_batch([
+            ('ok', py("pass")),
+            ('bad', py("raise SystemExit(2)")),
+            ('later', py("pass")),
+        ], jobs=1, fail_fast=True, stream=io.StringIO())
+        self.assertEqual([r.returncode for r in results], [0, 2, SKIPPED])
+
+    def test_decodes_non_utf8_output(self):
+        out = io.StringIO()
+        with patch('toolbox.decoder.detect_console_encoding', return_value='gbk'):
+            run_batch([('gbk', py("import sys; sys.stdout.buffer.write('中文输出\\n'.encode('gbk'))"))],
+                      stream=out)
+        self.assertEqual(out.getvalue(), '[gbk] 中文输出\n')
+
+    def test_missing_executable(self):
+        out = io.StringIO()
+        results = run_batch([('x', ['/nonexistent/program'])], stream=out)
+        self.assertEqual(results[0].returncode, 1)
+        self.assertIn('[ERROR]', out.getvalue())
+
+
+class TestSummary(unittest.TestCase):
+    def test_format_summary(self):
+        text = format_summary([
+            BatchResult('Install-A', 0, 1.25),
+            BatchResult('Install-B', 5, 0.5),
+            BatchResult('Install-C', SKIPPED, 0.0),
+        ])
+        self.assertIn('成功', text.splitlines()[2])
+        self.assertIn('5', text.splitlines()[3])
+        self.assertIn('跳过', text.splitlines()[4])
+        self.assertIn('共 3 个脚本，成功 1 个', text)
+
+    def test_aggregate_all_success(self):
+        self.assertEqual(aggregate_exit_code([BatchResult('a', 0, 0), BatchResult('b', 0, 0)]), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
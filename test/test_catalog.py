@@ -0,0 +1,128 @@
+import io
+import os
+import sys
+import json
+import shutil
+import tempfile
+import unittest
+from contextlib import redirect_stderr
+from unittest.mock import patch
+
+
+# 添加模块路径
+_scripts_python_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'scripts', 'python')
+if _scripts_python_dir not in sys.path:
+    sys.path.insert(0, _scripts_python_dir)
+from toolbox import catalog
+from toolbox.catalog import ScriptRecord, iter_script_records, make_matcher, write_records
+from toolbox.cli import list_scripts
+
+
+class TestScriptCatalog(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.scripts_dir = os.path.join(self.tmp, 'scripts')
+        os.makedirs(self.scripts_dir)
+        self.write('Install-WSL2.ps1', '# 安装 WSL2\n# 一键安装 Linux 子系统\n')
+        self.write('Clean-Temp.bat', '::清理临时文件\n::删除 TEMP 目录\n')
+        self.write('Tab-Title.cmd', '::带\t制表符\n')
+        self.patches = [
+            patch('toolbox.catalog.get_scripts_dir', return_value=self.scripts_dir),
+            patch('toolbox.catalog.get_cache_dir', return_value=self.tmp),
+        ]
+        for p in self.patches:
+            p.start()
+
+    def tearDown(self):
+        for p in self.patches:
+            p.stop()
+        shutil.rmtree(self.tmp)
+
+    def write(self, name, text):
+        with open(os.path.join(self.scripts_dir, name), 'w', encoding='utf-8') as f:
+            f.write(text)
+
+    def records(self, **kwargs):
+        return {r.name: r for r in iter_script_records(**kwargs)}
+
+    def test_record_fields(self):
+        record = self.records()['Install-WSL2']
+        path = os.path.join(self.scripts_dir, 'Install-WSL2.ps1')
+        self.assertEqual(record.path, path)
+        self.assertEqual((record.title, record.description), ('安装 WSL2', '一键安装 Linux 子系统'))
+        self.assertEqual(record.extension, '.ps1')
+        self.assertEqual(record.size, os.path.getsize(path))
+        self.assertEqual(record.mtime, os.stat(path).st_mtime)
+        self.assertEqual(record.hash, catalog.sha256_file(path))
+
+    def test_unchanged_files_served_from_index(self):
+        first = self.records()
+        with patch('toolbox.catalog.parse_script_metadata') as parse, \
+                patch('toolbox.catalog.sha256_file') as digest:
+            self.assertEqual(self.records(), first)
+        parse.assert_not_called()
+        digest.assert_not_called()
+
+    def test_changed_file_rehashed(self):
+        before = self.records()['Clean-Temp'].hash
+        self.write('Clean-Temp.bat', '::清理临时文件\n::还会清理日志\n')
+        after = self.records()['Clean-Temp']
+        self.assertNotEqual(after.hash, before)
+        self.assertEqual(after.description, '还会清理日志')
+
+    def test_records_stream_lazily(self):
+        with patch('toolbox.catalog.parse_script_metadata', wraps=catalog.parse_script_metadata) as parse:
+            records = iter_script_records(use_cache=False)
+            next(records)
+            self.assertEqual(parse.call_count, 1)
+            records.close()
+
+    def test_filter_and_grep(self):
+        self.assertEqual(list(self.records(match=make_matcher('wsl'))), ['Install-WSL2'])
+        self.assertEqual(list(self.records(match=make_matcher(pattern='^清理|不存在'))), ['Clean-Temp'])
+        self.assertEqual(self.records(match=make_matcher('clean', 'WSL')), {})
+        self.assertIsNone(make_matcher())
+
+    def test_parallel_workers_same_result(self):
+        self.assertEqual(self.records(use_cache=False, workers=4), self.records(use_cache=False))
+
+    def test_write_formats(self):
+        record = ScriptRecord('A', '/s/A.ps1', '标题\t一', '描述\n二', '.ps1', 1.5, 10, 'ab')
+        out = io.StringIO()
+        self.assertEqual(write_records(iter([record, record]), 'json', out), 2)
+        data = json.loads(out.getvalue())
+        self.assertEqual(data, [record._asdict()] * 2)
+        self.assertTrue(out.getvalue().isascii())
+
+        out = io.StringIO()
+        write_records([], 'json', out)
+        self.assertEqual(json.loads(out.getvalue()), [])
+
+        out = io.StringIO()
+        write_records([record], 'jsonl', out)
+        self.assertEqual([json.loads(line) for line in out.getvalue().splitlines()], [record._asdict()])
+
+        out = io.StringIO()
+        write_records([record], 'tsv', out)
+        header, row = out.getvalue().splitlines()
+        self.assertEqual(header.split('\t'), list(ScriptRecord._fields))
+        self.assertEqual(row.split('\t')[2:4], ['标题\\t一', '描述\\n二'])
+
+    def test_list_scripts_formats(self):
+        out = io.StringIO()
+        self.assertEqual(list_scripts(fmt='jsonl', filter_text='temp', stream=out), 0)
+        self.assertEqual([json.loads(line)['name'] for line in out.getvalue().splitlines()], ['Clean-Temp'])
+        with redirect_stderr(io.StringIO()):
+            self.assertEqual(list_scripts(fmt='jsonl', grep='(', stream=io.StringIO()), 1)
+
+    def test_list_scripts_text_filter(self):
+        out = io.StringIO()
+        with patch('toolbox.utils.get_scripts_dir', return_value=self.scripts_dir), \
+                patch('toolbox.utils.get_cache_dir', return_value=self.tmp):
+            self.assertEqual(list_scripts(filter_text='wsl', stream=out), 0)
+        self.assertIn('Install-WSL2', out.getvalue())
+        self.assertNotIn('Clean-Temp', out.getvalue())
+
+
+if __name__ == '__main__':
+    unittest.main()
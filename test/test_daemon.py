@@ -0,0 +1,228 @@
+import io
+import os
+import sys
+import json
+import shutil
+import socket
+import tempfile
+import threading
+import subprocess
+import unittest
+from unittest.mock import patch
+
+
+# 添加模块路径
+_root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_scripts_python_dir = os.path.join(_root_dir, 'scripts', 'python')
+if _scripts_python_dir not in sys.path:
+    sys.path.insert(0, _scripts_python_dir)
+from toolbox.daemon_client import DaemonClient, DaemonError, DaemonUnavailable, forward_to_daemon, read_state
+from toolbox.daemon import Daemon, DaemonServer, _write_state
+
+
+def sh_command(path, headless=False, silent=False, force=False, no_admin=False):
+    """测试用的 command_builder：用 /bin/sh 运行脚本 (头部的 # 注释对 sh 同样是注释)"""
+    return ['/bin/sh', path]
+
+
+@unittest.skipUnless(hasattr(socket, 'AF_UNIX') and os.path.exists('/bin/sh'), '需要 AF_UNIX 和 /bin/sh')
+class TestDaemon(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.scripts_dir = os.path.join(self.tmp, 'scripts')
+        os.makedirs(self.scripts_dir)
+        self.state_path = os.path.join(self.tmp, 'daemon.json')
+        self.write_script('Install-Base.ps1', '# Base\n# 基础组件\necho base-output\n')
+        self.write_script('Install-Thing.ps1', '# Thing\n# requires: Install-Base\necho thing-output\n')
+        self.write_script('Sleep-Long.ps1', '# Long\necho started\nexec sleep 30\n')
+        patches = [
+            patch('toolbox.daemon.get_scripts_dir', return_value=self.scripts_dir),
+            patch('toolbox.catalog.get_scripts_dir', return_value=self.scripts_dir),
+            patch('toolbox.catalog.get_cache_dir', return_value=self.tmp),
+            patch.dict(os.environ, {'TOOLBOX_TELEMETRY': 'off',
+                                    'TOOLBOX_RESULT_CACHE': os.path.join(self.tmp, 'results.json')}),
+        ]
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+        self.server = self.start_server()
+
+    def tearDown(self):
+        self.stop_server(self.server)
+        shutil.rmtree(self.tmp)
+
+    def write_script(self, name, body):
+        with open(os.path.join(self.scripts_dir, name), 'w', encoding='utf-8') as f:
+            f.write(body)
+
+    def start_server(self):
+        daemon = Daemon(max_parallel=2, command_builder=sh_command, env=dict(os.environ))
+        server = DaemonServer(daemon, self.state_path)
+        server.thread = threading.Thread(target=server.serve_forever, daemon=True)
+        server.thread.start()
+        return server
+
+    def stop_server(self, server):
+        if server.thread.is_alive():
+            server.shutdown()
+            server.thread.join(10)
+            server.close()
+
+    def client(self):
+        return DaemonClient(read_state(self.state_path))
+
+    def forward(self, *argv):
+        out = io.StringIO()
+        code = forward_to_daemon(list(argv), self.state_path, out)
+        return code, out.getvalue()
+
+    def test_state_file_and_ping(self):
+        state = read_state(self.state_path)
+        self.assertEqual(state['family'], 'unix')
+        self.assertEqual(os.stat(self.state_path).st_mode & 0o777, 0o600)
+        self.assertEqual(os.stat(state['address']).st_mode & 0o777, 0o600)
+        response = self.client().request('ping')
+        self.assertEqual((response['pid'], response['scripts']), (os.getpid(), 3))
+
+    def test_state_file_acl_on_windows(self):
+        calls = []
+
+        def fake_run(argv, **kwargs):
+            # 限制 ACL 时临时文件中还没有令牌
+            calls.append((argv, os.path.getsize(argv[1]) if argv[0] == 'icacls' else None))
+            return subprocess.CompletedProcess(argv, 0, '"host\\user","S-1-5-21-7-1001"\r\n')
+
+        path = os.path.join(self.tmp, 'win', 'daemon.json')
+        with patch('toolbox.daemon.sys.platform', 'win32'), patch('toolbox.daemon.subprocess.run', fake_run):
+            _write_state(path, {'address': ['127.0.0.1', 1], 'token': 'secret'})
+        self.assertEqual(calls[1], (['icacls', f'{path}.tmp', '/inheritance:r', '/grant:r', '*S-1-5-21-7-1001:F'], 0))
+        self.assertEqual(read_state(path)['token'], 'secret')
+        with patch('toolbox.daemon.sys.platform', 'win32'), \
+                patch('toolbox.daemon.subprocess.run', side_effect=subprocess.CalledProcessError(5, 'icacls')):
+            with self.assertRaisesRegex(DaemonError, '无法限制状态文件的访问权限'):
+                _write_state(path, {'address': ['127.0.0.1', 1], 'token': 'other'})
+        self.assertEqual(sorted(os.listdir(os.path.dirname(path))), ['daemon.json'])
+
+    def test_list(self):
+        code, out = self.forward('--list', '--format', 'jsonl', '--filter', '基础')
+        self.assertEqual(code, 0)
+        records = [json.loads(line) for line in out.splitlines()]
+        self.assertEqual([r['name'] for r in records], ['Install-Base'])
+        code, out = self.forward('--list')
+        self.assertIn('可用脚本列表', out)
+        with patch('sys.stderr', io.StringIO()) as err:
+            self.assertEqual(self.forward('--list', '--grep', '(')[0], 1)
+        self.assertIn('无效的正则表达式', err.getvalue())
+
+    def test_run_follows_output_in_stage_order(self):
+        code, out = self.forward('--run', 'install-thing')
+        self.assertEqual(code, 0)
+        lines = out.splitlines()
+        self.assertLess(lines.index('[Install-Base ] base-output'), lines.index('[Install-Thing] thing-output'))
+        self.assertIn('共 2 个脚本，成功 2 个', out)
+
+    def test_dependency_failure_skips_dependents(self):
+        self.write_script('Install-Base.ps1', '# Base\nexit 3\n')
+        code, out = self.forward('--run', 'Install-Thing')
+        self.assertEqual(code, 3)
+        tasks = self.client().request('status', job=1)['jobs'][0]['tasks']
+        self.assertEqual([(t['script'], t['state']) for t in tasks],
+                         [('Install-Base', 'failed'), ('Install-Thing', 'skipped')])
+
+    def test_detach_status_and_cancel(self):
+        code, out = self.forward('--run', 'Sleep-Long,Install-Base', '--detach')
+        self.assertEqual(code, 0)
+        job_id = int(out)
+        client = self.client()
+        lines = client.stream('logs', job=job_id, follow=True)
+        self.assertEqual(next(lines)['event'], 'job')
+        self.assertIn('started', [next(lines)['text'] for _ in range(2)])
+        code, out = self.forward('--status')
+        self.assertIn('Sleep-Long (running)', out)
+        self.assertEqual(self.forward('--cancel', str(job_id))[0], 0)
+        end = [m for m in lines if m['event'] == 'end'][0]
+        self.assertEqual((end['state'], end['returncode']), ('cancelled', 130))
+        states = {t['script']: t['state'] for t in client.request('status', job=job_id)['jobs'][0]['tasks']}
+        self.assertEqual(states['Sleep-Long'], 'cancelled')
+        # 非跟随模式直接返回已有输出
+        logs = list(client.stream('logs', job=job_id, follow=False))
+        self.assertIn('[CANCELLED] 已取消', [m.get('text') for m in logs])
+
+    def test_errors(self):
+        with patch('sys.stdout', io.StringIO()), patch('sys.stderr', io.StringIO()) as err:
+            self.assertEqual(self.forward('--run', 'Install-Thnig')[0], 1)
+            self.assertEqual(self.forward('--logs', '99')[0], 1)
+        self.assertIn('未找到脚本: Install-Thnig', err.getvalue())
+        self.assertIn('您是不是要找: Install-Thing', err.getvalue())
+        self.assertIn('作业不存在: 99', err.getvalue())
+        state = dict(read_state(self.state_path), token='0' * 64)
+        with self.assertRaisesRegex(DaemonError, '令牌无效'):
+            DaemonClient(state).request('ping')
+        with self.assertRaisesRegex(DaemonError, '未知的操作'):
+            self.client().request('exec', argv=['/bin/sh'])
+
+    def test_lost_connection_after_run_is_not_rerun_locally(self):
+        real_stream = DaemonClient.stream
+
+        def dropped(client, op, **fields):
+            yield next(real_stream(client, op, **fields))
+            raise DaemonUnavailable('与守护进程的连接中断: [Errno 104] Connection reset by peer')
+
+        with patch.object(DaemonClient, 'stream', dropped), patch('sys.stderr', io.StringIO()) as err:
+            code, out = self.forward('--run', 'Install-Base')
+        self.assertEqual(code, 1)
+        self.assertIn('作业 1 可能仍在守护进程中运行', err.getvalue())
+        # 连接在作业开始前失败时仍交由本地处理
+        with patch.object(DaemonClient, '_send', side_effect=DaemonUnavailable('无法连接守护进程')):
+            self.assertIsNone(self.forward('--run', 'Install-Base')[0])
+            self.assertIsNone(self.forward('--logs', '1')[0])
+
+    def test_index_refreshes_when_scripts_change(self):
+        self.write_script('Install-New.ps1', '# New\necho new-output\n')
+        code, out = self.forward('--run', 'Install-New')
+        self.assertEqual(code, 0)
+        self.assertIn('[Install-New] new-output', out)
+
+    def test_single_instance_and_stop(self):
+        daemon = Daemon(command_builder=sh_command, env=dict(os.environ))
+        with self.assertRaisesRegex(DaemonError, '已在运行'):
+            DaemonServer(daemon, self.state_path)
+        daemon.close()
+        self.assertEqual(self.forward('--stop-daemon')[0], 0)
+        self.server.thread.join(10)
+        self.server.close()
+        self.assertFalse(os.path.exists(self.state_path))
+        # 守护进程停止后交由本地处理
+        self.assertIsNone(self.forward('--list')[0])
+
+    def test_stale_state_falls_back_to_local(self):
+        self.stop_server(self.server)
+        with open(self.state_path, 'w', encoding='utf-8') as f:
+            json.dump({'family': 'unix', 'address': os.path.join(self.tmp, 'gone.sock'), 'token': 'x'}, f)
+        self.assertIsNone(self.forward('--list')[0])
+        with self.assertRaises(DaemonUnavailable):
+            self.client().request('ping')
+        # 过期的状态文件不妨碍启动新实例
+        self.server = self.start_server()
+        self.assertEqual(self.client().request('ping')['pid'], os.getpid())
+
+    def test_local_only_arguments_not_forwarded(self):
+        for argv in (['--run', 'Install-Base', '--plan'], ['--manifest', 'x.txt'], ['--cache-fetch', 'URL'],
+                     ['--list', '--no-daemon'], ['--daemon'], ['--help'], ['--stats'], []):
+            self.assertIsNone(self.forward(*argv)[0], argv)
+
+    def test_forwarded_cli_imports_only_client(self):
+        env = dict(os.environ, TOOLBOX_DAEMON=self.state_path)
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', os.path.join(_root_dir, 'main.py'), '--list', '--format', 'tsv'],
+            capture_output=True, text=True, encoding='utf-8', errors='replace', env=env, timeout=60,
+        )
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertIn('Install-Thing', result.stdout)
+        loaded = {line.rsplit('|', 1)[1].strip() for line in result.stderr.splitlines() if line.startswith('import time:')}
+        self.assertEqual(sorted(name for name in loaded if name.startswith('toolbox')),
+                         ['toolbox', 'toolbox.daemon_client'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+import os
+import sys
+import random
+import unittest
+from unittest.mock import patch
+
+
+# 添加模块路径
+_scripts_python_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'scripts', 'python')
+if _scripts_python_dir not in sys.path:
+    sys.path.insert(0, _scripts_python_dir)
+from toolbox.decoder import StreamDecoder
+
+SAMPLE = "正在安装 Windows Terminal...\r\n[OK] 依赖 Microsoft.UI.Xaml 已就绪 ✅\r\nProgress: 42%\r\n" * 20
+
+
+def decode_chunks(decoder, data, rng, max_chunk):
+    """按随机边界切分 data 并逐块解码"""
+    out = []
+    i = 0
+    while i < len(data):
+        n = rng.randint(0, max_chunk)
+        out.append(decoder.decode(data[i:i + n]))
+        i += n
+    out.append(decoder.flush())
+    return "".join(out)
+
+
+class TestStreamDecoderProperties(unittest.TestCase):
+    """性质测试：任意切分方式下的解码结果都与整体解码一致"""
+
+    def _check(self, text, encoding, iterations=300, max_chunk=9):
+        data = text.encode(encoding)
+        for seed in range(iterations):
+            rng = random.Random(seed)
+            decoder = StreamDecoder(fallback="gbk")
+            self.assertEqual(decode_chunks(decoder, data, rng, rng.choice([1, 2, 3, max_chunk])), text,
+                             f"encoding={encoding} seed={seed}")
+
+    def test_utf8_arbitrary_splits(self):
+        self._check(SAMPLE, "utf-8")
+
+    def test_gbk_arbitrary_splits(self):
+        self._check(SAMPLE.replace("✅", "OK"), "gbk")
+
+    def test_utf8_bom_arbitrary_splits(self):
+        self._check(SAMPLE, "utf-8-sig")
+
+    def test_random_unicode_text(self):
+        rng = random.Random(1234)
+        alphabet = "abc \r\n中文字符éü😀✅" + "".join(chr(c) for c in range(0x4e00, 0x4e40))
+        for _ in range(50):
+            text = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 200)))
+            self._check(text, "utf-8", iterations=5)
+
+
+class TestStreamDecoder(unittest.TestCase):
+    def test_encoding_fixed_after_detection(self):
+        decoder = StreamDecoder(fallback="gbk")
+        self.assertEqual(decoder.decode("中".encode("utf-8")), "中")
+        self.assertEqual(decoder.encoding, "utf-8")
+        # 判定后不再切换编码
+        self.assertEqual(decoder.decode(b"\xd6\xd0") + decoder.flush(), "��")
+
+    def test_ascii_defers_detection(self):
+        decoder = StreamDecoder(fallback="gbk")
+        self.assertEqual(decoder.decode(b"hello "), "hello ")
+        self.assertIsNone(decoder.encoding)
+        self.assertEqual(decoder.decode("中文".encode("gbk")), "中文")
+        self.assertEqual(decoder.encoding, "gbk")
+
+    def test_truncated_tail_waits(self):
+        decoder = StreamDecoder(fallback="gbk")
+        self.assertEqual(decoder.decode(b"ab\xe4"), "ab")
+        self.assertIsNone(decoder.encoding)
+        self.assertEqual(decoder.decode(b"\xb8\xad"), "中")
+
+    def test_flush_incomplete(self):
+        decoder = StreamDecoder(encoding="utf-8")
+        self.assertEqual(decoder.decode(b"\xe4\xb8"), "")
+        self.assertEqual(decoder.flush(), "�")
+
+    def test_console_codepage_fallback(self):
+        with patch("toolbox.decoder.detect_console_encoding", return_value="cp936"):
+            decoder = StreamDecoder()
+            self.assertEqual(decoder.decode("测试".encode("gbk")), "测试")
+            self.assertEqual(decoder.encoding, "gbk")
+
+
+if __name__ == "__main__":
+    unittest.main()
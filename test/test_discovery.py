@@ -0,0 +1,113 @@
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+
+
+# 添加模块路径
+_scripts_python_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'scripts', 'python')
+if _scripts_python_dir not in sys.path:
+    sys.path.insert(0, _scripts_python_dir)
+from toolbox.discovery import discover_scripts, build_name_index, normalize_script_name, suggest_names
+
+
+class TestDiscoverScripts(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def _touch(self, *parts):
+        path = os.path.join(self.root, *parts)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("::x\n")
+        return path
+
+    def _names(self, entries):
+        return sorted(os.path.relpath(e.path, self.root).replace(os.sep, "/") for e in entries)
+
+    def test_precedence(self):
+        """测试同名脚本按 .ps1 > .bat > .cmd 保留"""
+        self._touch("a.ps1")
+        self._touch("a.bat")
+        self._touch("a.cmd")
+        self._touch("b.bat")
+        self._touch("b.cmd")
+        self._touch("c.cmd")
+        self._touch("readme.txt")
+        self.assertEqual(self._names(discover_scripts(self.root)), ["a.ps1", "b.bat", "c.cmd"])
+
+    def test_precedence_per_directory(self):
+        """测试不同目录下的同名脚本互不影响"""
+        self._touch("x.ps1")
+        self._touch("sub", "x.bat")
+        self.assertEqual(self._names(discover_scripts(self.root)), ["sub/x.bat", "x.ps1"])
+
+    def test_depth_limit(self):
+        """测试目录深度限制"""
+        self._touch("top.ps1")
+        self._touch("d1", "one.ps1")
+        self._touch("d1", "d2", "two.ps1")
+        self.assertEqual(self._names(discover_scripts(self.root, max_depth=0)), ["top.ps1"])
+        self.assertEqual(self._names(discover_scripts(self.root)), ["d1/one.ps1", "top.ps1"])
+        self.assertEqual(len(discover_scripts(self.root, max_depth=None)), 3)
+
+    def test_include_exclude(self):
+        """测试 include/exclude glob 过滤"""
+        self._touch("ps1", "Install-A.ps1")
+        self._touch("ps1", "Common.ps1")
+        self._touch("vendor", "Install-B.ps1")
+        entries = discover_scripts(self.root, exclude=["vendor", "Common.ps1"])
+        self.assertEqual(self._names(entries), ["ps1/Install-A.ps1"])
+        entries = discover_scripts(self.root, include=["Install-*"])
+        self.assertEqual(self._names(entries), ["ps1/Install-A.ps1", "vendor/Install-B.ps1"])
+
+    def test_hidden_and_missing(self):
+        """测试忽略隐藏目录以及不存在的根目录"""
+        self._touch(".git", "hook.ps1")
+        self.assertEqual(discover_scripts(self.root), [])
+        self.assertEqual(discover_scripts(os.path.join(self.root, "missing")), [])
+
+
+class TestNameIndex(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        for rel in ("ps1/Install-PowerShell7.ps1", "ps1/Install-WSL2.ps1", "ps1/Enable-UTF8Support.ps1", "bat/Tool.bat"):
+            path = os.path.join(self.root, *rel.split("/"))
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            open(path, "w").close()
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def test_lookup_case_insensitive(self):
+        """测试名称索引大小写不敏感并接受扩展名"""
+        index = build_name_index(self.root)
+        self.assertTrue(index[normalize_script_name("install-wsl2")].endswith("Install-WSL2.ps1"))
+        self.assertTrue(index[normalize_script_name("TOOL.BAT")].endswith("Tool.bat"))
+        self.assertNotIn(normalize_script_name("Missing"), index)
+
+    def test_normalize_keeps_unknown_suffix(self):
+        """测试非脚本扩展名不被去除"""
+        self.assertEqual(normalize_script_name("Foo.Bar"), "foo.bar")
+        self.assertEqual(normalize_script_name(" Foo.PS1 "), "foo")
+
+    def test_index_does_not_open_files(self):
+        """测试构建索引时不打开任何文件"""
+        from unittest.mock import patch
+        with patch("builtins.open", side_effect=AssertionError("opened")):
+            self.assertEqual(len(build_name_index(self.root)), 4)
+
+    def test_suggestions(self):
+        """测试前缀与模糊建议"""
+        index = build_name_index(self.root)
+        self.assertEqual(suggest_names("install-", index), ["Install-PowerShell7", "Install-WSL2"])
+        self.assertIn("Install-WSL2", suggest_names("Instal-WSL", index))
+        self.assertEqual(suggest_names("zzzzzz", index), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
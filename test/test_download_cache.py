@@ -0,0 +1,140 @@
+import os
+import sys
+import shutil
+import hashlib
+import tempfile
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+
+# 添加模块路径
+_scripts_python_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'scripts', 'python')
+if _scripts_python_dir not in sys.path:
+    sys.path.insert(0, _scripts_python_dir)
+from toolbox.download_cache import DownloadCache, DownloadError, cache_environment
+from toolbox.cli import cache_fetch
+from http_stub import StubServer
+
+
+class TestDownloadCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.www = os.path.join(self.tmp, 'www')
+        os.makedirs(self.www)
+        self.server = StubServer(self.www)
+        self.cache_dir = os.path.join(self.tmp, 'cache')
+
+    def tearDown(self):
+        self.server.close()
+        shutil.rmtree(self.tmp)
+
+    def publish(self, name, data):
+        with open(os.path.join(self.www, name), 'wb') as f:
+            f.write(data)
+        return self.server.url(name), hashlib.sha256(data).hexdigest()
+
+    def test_second_fetch_hits_cache(self):
+        url, sha = self.publish('pkg.msix', b'x' * 5000)
+        cache = DownloadCache(self.cache_dir)
+        path = cache.fetch(url)
+        self.assertEqual(os.path.basename(path), sha)
+        requests = len(self.server.requests)
+        # 新实例读取持久化的索引
+        dest = os.path.join(self.tmp, 'out', 'pkg.msix')
+        again = DownloadCache(self.cache_dir)
+        self.assertEqual(again.fetch(url, dest), dest)
+        with open(dest, 'rb') as f:
+            self.assertEqual(f.read(), b'x' * 5000)
+        self.assertEqual(len(self.server.requests), requests)
+        self.assertEqual((again.hits, again.misses), (1, 0))
+
+    def test_same_content_stored_once(self):
+        url_a, sha = self.publish('a.zip', b'same')
+        url_b, _ = self.publish('b.zip', b'same')
+        cache = DownloadCache(self.cache_dir)
+        self.assertEqual(cache.fetch(url_a), cache.fetch(url_b))
+        self.assertEqual(cache.total_size(), 4)
+
+    def test_corrupted_object_redownloaded(self):
+        url, sha = self.publish('pkg.zip', b'payload')
+        cache = DownloadCache(self.cache_dir)
+        path = cache.fetch(url)
+        with open(path, 'wb') as f:
+            f.write(b'tampered')
+        self.assertIsNone(cache.lookup(url))
+        self.assertEqual(cache.fetch(url), path)
+        with open(path, 'rb') as f:
+            self.assertEqual(f.read(), b'payload')
+        self.assertEqual(cache.misses, 2)
+
+    def test_expected_sha256(self):
+        url, sha = self.publish('pkg.zip', b'payload')
+        cache = DownloadCache(self.cache_dir)
+        with self.assertRaisesRegex(DownloadError, 'SHA-256'):
+            cache.fetch(url, expected_sha256='0' * 64)
+        self.assertIsNone(cache.lookup(url))
+        self.assertEqual(os.path.basename(cache.fetch(url, expected_sha256=sha.upper())), sha)
+
+    def test_lru_eviction(self):
+        cache = DownloadCache(self.cache_dir, max_bytes=250)
+        urls = [self.publish(f'{i}.bin', bytes([i]) * 100)[0] for i in range(3)]
+        with patch('toolbox.download_cache.time.time', side_effect=range(100, 200)):
+            cache.fetch(urls[0])
+            cache.fetch(urls[1])
+            # 访问 0 号使 1 号成为最久未使用
+            cache.fetch(urls[0])
+            cache.fetch(urls[2])
+        self.assertIsNotNone(cache.lookup(urls[0]))
+        self.assertIsNone(cache.lookup(urls[1]))
+        self.assertIsNotNone(cache.lookup(urls[2]))
+        self.assertEqual(cache.total_size(), 200)
+
+    def test_download_failure(self):
+        cache = DownloadCache(self.cache_dir)
+        with self.assertRaisesRegex(DownloadError, '下载失败'):
+            cache.fetch(self.server.url('missing.zip'), retries=0)
+        self.assertEqual(os.listdir(os.path.join(self.cache_dir, 'tmp')), [])
+
+    def test_concurrent_fetch(self):
+        payloads = [os.urandom(2000) for _ in range(8)]
+        urls = [self.publish(f'{i}.bin', data)[0] for i, data in enumerate(payloads)]
+        # 每个 URL 由共享实例和独立实例 (模拟另一个进程) 各获取两次
+        caches = [DownloadCache(self.cache_dir), DownloadCache(self.cache_dir)]
+
+        def fetch(url, cache):
+            with open(cache.fetch(url), 'rb') as f:
+                return f.read()
+
+        with ThreadPoolExecutor(max_workers=16) as pool:
+            futures = [(url, pool.submit(fetch, url, cache)) for url in urls * 2 for cache in caches]
+            contents = {}
+            for url, future in futures:
+                contents.setdefault(url, set()).add(future.result())
+        for url, data in zip(urls, payloads):
+            self.assertEqual(contents[url], {data})
+            self.assertIsNotNone(caches[0].lookup(url))
+        self.assertEqual(caches[0].total_size(), 8 * 2000)
+        self.assertEqual(sum(c.misses for c in caches), 8)
+        self.assertEqual(os.listdir(os.path.join(self.cache_dir, 'tmp')), [])
+
+    def test_cache_fetch_cli(self):
+        url, _ = self.publish('tool.zip', b'tool')
+        out = os.path.join(self.tmp, 'tool.zip')
+        with patch.dict(os.environ, {'TOOLBOX_CACHE_DIR': self.cache_dir}), patch('builtins.print') as mock_print:
+            self.assertEqual(cache_fetch(url, out), 0)
+            self.assertEqual(cache_fetch(url, out), 0)
+        printed = [c.args[0] for c in mock_print.call_args_list if c.args[0].startswith('[缓存]')]
+        self.assertIn('已下载', printed[0])
+        self.assertIn('命中', printed[1])
+
+    def test_cache_environment(self):
+        with patch.dict(os.environ, {'TOOLBOX_CACHE_DIR': self.cache_dir}):
+            env = cache_environment()
+        self.assertEqual(env['TOOLBOX_CACHE_DIR'], self.cache_dir)
+        self.assertEqual(env['TOOLBOX_PYTHON'], sys.executable)
+        self.assertTrue(env['TOOLBOX_MAIN'].endswith('main.py'))
+
+
+if __name__ == "__main__":
+    unittest.main()
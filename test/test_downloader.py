@@ -0,0 +1,164 @@
+import os
+import sys
+import random
+import hashlib
+import shutil
+import tempfile
+import unittest
+
+
+# 添加模块路径
+_scripts_python_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'scripts', 'python')
+if _scripts_python_dir not in sys.path:
+    sys.path.insert(0, _scripts_python_dir)
+from toolbox.downloader import DownloadFailed, backoff_delays, download, format_progress, Progress
+from http_stub import StubServer
+
+
+class TestBackoff(unittest.TestCase):
+    def test_full_jitter_bounds(self):
+        delays = list(backoff_delays(8, base=0.5, cap=4.0, rng=random.Random(0)))
+        self.assertEqual(len(delays), 8)
+        for attempt, delay in enumerate(delays):
+            self.assertGreaterEqual(delay, 0)
+            self.assertLessEqual(delay, min(4.0, 0.5 * 2 ** attempt))
+
+    def test_format_progress(self):
+        self.assertEqual(format_progress(Progress(512 * 1024, 1024 * 1024, 1.0)), ' 50.0% 0.5/1.0 MB 0.5 MB/s')
+        self.assertEqual(format_progress(Progress(1024 * 1024, None, 0)), '1.0 MB 0.0 MB/s')
+
+
+class TestDownload(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.www = os.path.join(self.tmp, 'www')
+        os.makedirs(self.www)
+        self.data = os.urandom(10000)
+        with open(os.path.join(self.www, 'pkg.bin'), 'wb') as f:
+            f.write(self.data)
+        self.server = StubServer(self.www)
+        self.url = self.server.url('pkg.bin')
+        self.out = os.path.join(self.tmp, 'out', 'pkg.bin')
+        self.sleeps = []
+
+    def tearDown(self):
+        self.server.close()
+        shutil.rmtree(self.tmp)
+
+    def download(self, **kwargs):
+        kwargs.setdefault('chunk_size', 1000)
+        kwargs.setdefault('sleep', self.sleeps.append)
+        return download(self.url, self.out, **kwargs)
+
+    def read_out(self):
+        with open(self.out, 'rb') as f:
+            return f.read()
+
+    def ranges(self):
+        return [r for _, r in self.server.requests]
+
+    def test_chunked_download(self):
+        reports = []
+        self.assertEqual(self.download(connections=4, progress=reports.append), 10000)
+        self.assertEqual(self.read_out(), self.data)
+        # 探测请求 + 10 个分块
+        self.assertEqual(len(self.server.requests), 11)
+        self.assertIn('bytes=9000-9999', self.ranges())
+        self.assertEqual(reports[-1].done, 10000)
+        self.assertEqual(reports[-1].total, 10000)
+        self.assertFalse(os.path.exists(self.out + '.part'))
+        self.assertFalse(os.path.exists(self.out + '.part.json'))
+
+    def test_server_without_ranges(self):
+        self.server.ranges = False
+        self.assertEqual(self.download(), 10000)
+        self.assertEqual(self.read_out(), self.data)
+        # 不支持 Range 时直接沿用探测请求的响应
+        self.assertEqual(len(self.server.requests), 1)
+
+    def test_resume_partial_file(self):
+        # 探测 + 前两个分块成功，之后的请求全部失败
+        self.server.fail_after = 3
+        with self.assertRaises(DownloadFailed):
+            self.download(connections=1, retries=0)
+        self.assertTrue(os.path.exists(self.out + '.part.json'))
+
+        self.server.fail_after = None
+        del self.server.requests[:]
+        self.download(connections=1)
+        self.assertEqual(self.read_out(), self.data)
+        self.assertEqual(self.ranges()[1:], [f'bytes={i}-{i + 999}' for i in range(2000, 10000, 1000)])
+
+    def test_changed_file_restarts(self):
+        self.server.fail_after = 3
+        with self.assertRaises(DownloadFailed):
+            self.download(connections=1, retries=0)
+        # 文件长度变化后续传状态失效
+        self.data = os.urandom(12000)
+        with open(os.path.join(self.www, 'pkg.bin'), 'wb') as f:
+            f.write(self.data)
+        self.server.fail_after = None
+        del self.server.requests[:]
+        self.download(connections=1)
+        self.assertEqual(self.read_out(), self.data)
+        self.assertEqual(len(self.server.requests), 13)
+
+    def test_no_validator_restarts(self):
+        # 没有 ETag / Last-Modified 时无法确认远端文件未变，已下载的分块作废
+        self.server.validators = False
+        self.server.fail_after = 3
+        with self.assertRaises(DownloadFailed):
+            self.download(connections=1, retries=0)
+        self.server.fail_after = None
+        del self.server.requests[:]
+        self.download(connections=1)
+        self.assertEqual(self.read_out(), self.data)
+        self.assertEqual(len(self.server.requests), 11)
+
+    def test_no_validator_resumes_with_sha256(self):
+        self.server.validators = False
+        self.server.fail_after = 3
+        sha256 = hashlib.sha256(self.data).hexdigest()
+        with self.assertRaises(DownloadFailed):
+            self.download(connections=1, retries=0, sha256=sha256)
+        self.server.fail_after = None
+        del self.server.requests[:]
+        self.download(connections=1, sha256=sha256)
+        self.assertEqual(self.read_out(), self.data)
+        self.assertEqual(len(self.server.requests), 9)
+
+    def test_sha256_mismatch(self):
+        with self.assertRaisesRegex(DownloadFailed, 'SHA-256'):
+            self.download(sha256='0' * 64)
+        self.assertEqual(os.listdir(os.path.dirname(self.out)), [])
+
+    def test_retry_with_backoff(self):
+        self.server.fail_next = 3
+        self.download(connections=1, rng=random.Random(1))
+        self.assertEqual(self.read_out(), self.data)
+        self.assertEqual(len(self.sleeps), 3)
+        self.assertLessEqual(self.sleeps[2], 2.0)
+
+    def test_resume_within_chunk_after_cut(self):
+        # 探测请求和唯一的分块请求都只发送一半
+        self.server.cut_next = 2
+        self.download(chunk_size=20000)
+        self.assertEqual(self.read_out(), self.data)
+        # 连接中断后从已写入的位置继续请求
+        self.assertEqual(self.ranges()[-1], 'bytes=5000-9999')
+
+    def test_not_found_not_retried(self):
+        self.url = self.server.url('missing.bin')
+        with self.assertRaisesRegex(DownloadFailed, '404'):
+            self.download()
+        self.assertEqual(self.sleeps, [])
+
+    def test_empty_file(self):
+        open(os.path.join(self.www, 'empty.bin'), 'wb').close()
+        self.url = self.server.url('empty.bin')
+        self.assertEqual(self.download(), 0)
+        self.assertEqual(self.read_out(), b'')
+
+
+if __name__ == "__main__":
+    unittest.main()
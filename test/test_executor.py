@@ -0,0 +1,165 @@
+import io
+import os
+import sys
+import time
+import shutil
+import tempfile
+import threading
+import unittest
+
+
+# 添加模块路径
+_scripts_python_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'scripts', 'python')
+if _scripts_python_dir not in sys.path:
+    sys.path.insert(0, _scripts_python_dir)
+from toolbox.executor import (
+    SH_BACKEND, HostBackend, ScriptJob, ExecutorError, ProcessExecutor, WorkerPool, create_executor,
+)
+from toolbox.batch import run_batch
+
+
+@unittest.skipUnless(os.path.exists('/bin/sh'), '需要 /bin/sh')
+class TestWorkerPool(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def script(self, name, body):
+        path = os.path.join(self.tmp, name)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(body)
+        return path
+
+    def run_job(self, executor, job):
+        lines = []
+        code = executor.run(job, lines.append)
+        return code, b''.join(lines).decode('utf-8')
+
+    def test_output_and_exit_code(self):
+        script = self.script('a.sh', 'echo "args: $1|$2"\nprintf "中文\\r\\n"\nprintf "no newline"\nexit 3\n')
+        with WorkerPool(SH_BACKEND) as pool:
+            code, output = self.run_job(pool, ScriptJob(script, ['two words', '-Headless']))
+        self.assertEqual(code, 3)
+        self.assertEqual(output, 'args: two words|-Headless\n中文\r\nno newline\n')
+
+    def test_worker_reused_between_jobs(self):
+        script = self.script('ok.sh', 'echo ok\n')
+        with WorkerPool(SH_BACKEND, max_jobs=10) as pool:
+            for _ in range(3):
+                self.assertEqual(self.run_job(pool, ScriptJob(script, [])), (0, 'ok\n'))
+            self.assertEqual(pool.spawned, 1)
+
+    def test_recycle_after_max_jobs_and_failure(self):
+        ok = self.script('ok.sh', 'exit 0\n')
+        bad = self.script('bad.sh', 'exit 1\n')
+        with WorkerPool(SH_BACKEND, max_jobs=2) as pool:
+            for _ in range(5):
+                pool.run(ScriptJob(ok, []), len)
+            self.assertEqual(pool.spawned, 3)
+        with WorkerPool(SH_BACKEND, max_jobs=10) as pool:
+            self.assertEqual(pool.run(ScriptJob(ok, []), len), 0)
+            self.assertEqual(pool.run(ScriptJob(bad, []), len), 1)
+            self.assertEqual(pool.run(ScriptJob(ok, []), len), 0)
+            self.assertEqual(pool.spawned, 2)
+
+    def test_fake_end_frame_in_output_ignored(self):
+        script = self.script('fake.sh', 'echo "E 0000 0"\necho "O x"\nexit 4\n')
+        with WorkerPool(SH_BACKEND) as pool:
+            self.assertEqual(self.run_job(pool, ScriptJob(script, [])), (4, 'E 0000 0\nO x\n'))
+
+    def test_script_cannot_read_job_stream(self):
+        reader = self.script('read.sh', 'read line; echo "got:$line"\n')
+        ok = self.script('ok.sh', 'echo ok\n')
+        with WorkerPool(SH_BACKEND) as pool:
+            self.assertEqual(self.run_job(pool, ScriptJob(reader, [])), (0, 'got:\n'))
+            self.assertEqual(self.run_job(pool, ScriptJob(ok, [])), (0, 'ok\n'))
+
+    def test_parallel_workers(self):
+        script = self.script('sleep.sh', 'sleep 0.3\n')
+        codes = []
+        with WorkerPool(SH_BACKEND, size=2) as pool:
+            start = time.perf_counter()
+            threads = [threading.Thread(target=lambda: codes.append(pool.run(ScriptJob(script, []), len)))
+                       for _ in range(4)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+            elapsed = time.perf_counter() - start
+            self.assertEqual(pool.spawned, 2)
+        self.assertEqual(codes, [0] * 4)
+        self.assertLess(elapsed, 1.1)
+
+    def test_lost_worker_replaced(self):
+        ok = self.script('ok.sh', 'echo ok\n')
+        crashing = HostBackend('crash', ['/bin/sh', '-c', "printf 'R\\n'; read line; printf 'O partial\\n'; exit 9"],
+                               SH_BACKEND.process_argv, ('.sh',))
+        lines = []
+        with WorkerPool(crashing) as pool:
+            with self.assertRaises(ExecutorError):
+                pool.run(ScriptJob(ok, []), lines.append)
+            self.assertEqual(lines, [b'partial\n'])
+            with self.assertRaises(ExecutorError):
+                pool.run(ScriptJob(ok, []), lines.append)
+            self.assertEqual(pool.spawned, 2)
+
+    def test_output_callback_error_frees_slot(self):
+        script = self.script('chatty.sh', 'echo one\necho two\n')
+
+        def broken(data):
+            raise BrokenPipeError('stdout closed')
+
+        with WorkerPool(SH_BACKEND, size=1) as pool:
+            for _ in range(3):
+                with self.assertRaises(BrokenPipeError):
+                    pool.run(ScriptJob(script, []), broken)
+            # 出错的工作进程被丢弃，名额归还后仍能运行新任务
+            self.assertEqual(self.run_job(pool, ScriptJob(script, [])), (0, 'one\ntwo\n'))
+            self.assertEqual(pool.spawned, 4)
+
+    def test_startup_failure(self):
+        broken = HostBackend('broken', ['/bin/sh', '-c', 'echo nope'], SH_BACKEND.process_argv, ('.sh',))
+        with WorkerPool(broken) as pool:
+            with self.assertRaises(ExecutorError):
+                pool.run(ScriptJob(self.script('ok.sh', ''), []), len)
+
+    def test_invalid_fields_rejected(self):
+        with WorkerPool(SH_BACKEND) as pool:
+            with self.assertRaises(ExecutorError):
+                pool.run(ScriptJob(self.script('ok.sh', ''), ['a\tb']), len)
+
+    def test_fallback_for_other_commands(self):
+        with WorkerPool(SH_BACKEND) as pool:
+            code, output = self.run_job(pool, [sys.executable, '-c', 'print("argv")'])
+            self.assertEqual((code, output.strip()), (0, 'argv'))
+            self.assertEqual(pool.spawned, 0)
+
+    def test_close_stops_workers(self):
+        pool = WorkerPool(SH_BACKEND)
+        pool.run(ScriptJob(self.script('ok.sh', ''), []), len)
+        worker = pool._idle[0]
+        pool.close()
+        self.assertIsNotNone(worker.process.poll())
+        with self.assertRaises(ExecutorError):
+            pool.run(ScriptJob(self.script('ok.sh', ''), []), len)
+
+    def test_process_executor_builds_argv(self):
+        executor = create_executor('process')
+        self.assertIsInstance(executor, ProcessExecutor)
+        script = self.script('p.sh', 'echo "$1"\n')
+        self.assertEqual(self.run_job(executor, ScriptJob(script, ['x'])), (0, 'x\n'))
+
+    def test_run_batch_with_pool(self):
+        scripts = [self.script(f's{i}.sh', f'echo line{i}\nexit {i}\n') for i in range(3)]
+        out = io.StringIO()
+        with create_executor('host', size=2) as pool:
+            results = run_batch([(f's{i}', ScriptJob(path, [])) for i, path in enumerate(scripts)],
+                                jobs=2, stream=out, executor=pool)
+        self.assertEqual([r.returncode for r in results], [0, 1, 2])
+        self.assertIn('[s2] line2', out.getvalue().splitlines())
+
+
+if __name__ == '__main__':
+    unittest.main()
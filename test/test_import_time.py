@@ -0,0 +1,59 @@
+import os
+import sys
+import subprocess
+import unittest
+
+
+_root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_main_py = os.path.join(_root_dir, 'main.py')
+
+# 命令行路径不应加载的 GUI 依赖
+GUI_MODULES = ('PySide6', 'qfluentwidgets', 'shiboken6')
+
+
+def import_times(args):
+    """用 python -X importtime 运行 main.py，返回 {顶层模块名: 累计导入耗时 (微秒)}。"""
+    env = dict(os.environ, TOOLBOX_OFFLINE='1')
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', _main_py] + args,
+        capture_output=True, text=True, encoding='utf-8', errors='replace', env=env, timeout=120,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith('import time:'):
+            continue
+        parts = line[len('import time:'):].split('|')
+        if len(parts) != 3 or not parts[1].strip().isdigit():
+            continue
+        name = parts[2].strip().split('.')[0]
+        times[name] = max(times.get(name, 0), int(parts[1]))
+    return result, times
+
+
+class TestCliImportTime(unittest.TestCase):
+    def assert_no_gui(self, args):
+        result, times = import_times(args)
+        loaded = [name for name in GUI_MODULES if name in times]
+        self.assertEqual(loaded, [], f'main.py {" ".join(args)} 导入了 GUI 模块\n{result.stdout}')
+        self.assertIn('toolbox', times)
+        return result
+
+    def test_list_does_not_import_qt(self):
+        result = self.assert_no_gui(['--list'])
+        self.assertEqual(result.returncode, 0)
+
+    def test_plan_does_not_import_qt(self):
+        result = self.assert_no_gui(['--run', 'Install-WSL2', '--plan'])
+        self.assertEqual(result.returncode, 0)
+
+    def test_release_does_not_import_qt(self):
+        # 离线且无缓存时失败，但仍不应加载 Qt
+        self.assert_no_gui(['--release', 'example/none', '--offline'])
+
+    def test_help_does_not_import_qt(self):
+        self.assert_no_gui(['--help'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,107 @@
+import os
+import sys
+import unittest
+
+
+# 添加模块路径
+_scripts_python_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'scripts', 'python')
+if _scripts_python_dir not in sys.path:
+    sys.path.insert(0, _scripts_python_dir)
+from toolbox.metadata import NO_DIRECTIVES
+from toolbox.planner import PlanError, build_plan, format_plan
+
+
+def directives(requires=(), conflicts=(), after=(), reboot_after=False):
+    return NO_DIRECTIVES._replace(requires=tuple(requires), conflicts=tuple(conflicts),
+                                  after=tuple(after), reboot_after=reboot_after)
+
+
+class TestBuildPlan(unittest.TestCase):
+    def plan(self, names, scripts, reboot_script=None):
+        return build_plan(names, scripts.get, reboot_script)
+
+    def test_independent_scripts_single_stage(self):
+        plan = self.plan(['a', 'b', 'c'], {k: NO_DIRECTIVES for k in 'abc'})
+        self.assertEqual(plan.stages, [['a', 'b', 'c']])
+        self.assertFalse(plan.reboot)
+
+    def test_requires_added_and_ordered(self):
+        scripts = {
+            'terminal': directives(requires=['utf8']),
+            'utf8': directives(requires=['base']),
+            'base': NO_DIRECTIVES,
+            'other': NO_DIRECTIVES,
+        }
+        plan = self.plan(['terminal', 'other'], scripts)
+        self.assertEqual(plan.stages, [['other', 'base'], ['utf8'], ['terminal']])
+        self.assertEqual(plan.added, ['utf8', 'base'])
+        self.assertEqual(plan.requires['terminal'], {'utf8'})
+
+    def test_diamond(self):
+        scripts = {
+            'top': directives(requires=['left', 'right']),
+            'left': directives(requires=['root']),
+            'right': directives(requires=['root']),
+            'root': NO_DIRECTIVES,
+        }
+        self.assertEqual(self.plan(['top'], scripts).stages, [['root'], ['left', 'right'], ['top']])
+
+    def test_after_is_soft(self):
+        scripts = {'terminal': directives(after=['pwsh']), 'pwsh': NO_DIRECTIVES}
+        self.assertEqual(self.plan(['terminal'], scripts).stages, [['terminal']])
+        self.assertEqual(self.plan(['terminal', 'pwsh'], scripts).stages, [['pwsh'], ['terminal']])
+
+    def test_conflicts_split_stage(self):
+        scripts = {
+            'store': directives(conflicts=['terminal']),
+            'terminal': NO_DIRECTIVES,
+            'utf8': NO_DIRECTIVES,
+        }
+        plan = self.plan(['terminal', 'store', 'utf8'], scripts)
+        self.assertEqual(plan.stages, [['terminal', 'utf8'], ['store']])
+        for stage in plan.stages:
+            self.assertFalse({'store', 'terminal'} <= set(stage))
+
+    def test_reboot_after(self):
+        scripts = {'wsl': directives(reboot_after=True), 'utf8': directives(after=['wsl'])}
+        plan = self.plan(['wsl', 'utf8'], scripts)
+        # 需要重启的脚本不约束软依赖
+        self.assertEqual(plan.stages, [['wsl', 'utf8']])
+        self.assertTrue(plan.reboot)
+
+    def test_requires_reboot_after_script_fails(self):
+        scripts = {'wsl': directives(reboot_after=True), 'distro': directives(requires=['wsl'])}
+        with self.assertRaises(PlanError):
+            self.plan(['distro'], scripts)
+
+    def test_reboot_script_removed_from_stages(self):
+        scripts = {'a': NO_DIRECTIVES, 'restart': NO_DIRECTIVES}
+        plan = self.plan(['restart', 'a'], scripts, reboot_script='restart')
+        self.assertEqual(plan.stages, [['a']])
+        self.assertTrue(plan.reboot)
+
+    def test_cycle(self):
+        scripts = {'a': directives(requires=['b']), 'b': directives(requires=['a'])}
+        with self.assertRaisesRegex(PlanError, '循环依赖'):
+            self.plan(['a'], scripts)
+
+    def test_missing_dependency(self):
+        with self.assertRaisesRegex(PlanError, 'missing'):
+            self.plan(['a'], {'a': directives(requires=['missing'])})
+
+    def test_duplicates_and_order(self):
+        plan = self.plan(['b', 'a', 'b'], {'a': NO_DIRECTIVES, 'b': NO_DIRECTIVES})
+        self.assertEqual(plan.stages, [['b', 'a']])
+
+    def test_format_plan(self):
+        scripts = {'x': directives(requires=['y']), 'y': NO_DIRECTIVES, 'dep': directives(reboot_after=True)}
+        plan = self.plan(['x', 'dep'], scripts)
+        text = format_plan(plan, 'restart', display=str.upper)
+        self.assertIn('阶段 1 (2 个脚本，可并行):', text)
+        self.assertIn('  - Y (依赖，自动加入)', text)
+        self.assertIn('  - X <- Y', text)
+        self.assertIn('最后: 重启计算机 (RESTART)', text)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,96 @@
+import io
+import os
+import sys
+import shutil
+import pstats
+import tempfile
+import unittest
+
+
+# 添加模块路径
+_scripts_python_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'scripts', 'python')
+if _scripts_python_dir not in sys.path:
+    sys.path.insert(0, _scripts_python_dir)
+from toolbox import profiling
+from toolbox.profiling import Profiler, SpanHistogram, span, timed, format_histograms, get_histograms
+
+
+@timed('work')
+def work(x):
+    return x * 2
+
+
+class TestSpans(unittest.TestCase):
+    def setUp(self):
+        profiling.reset()
+
+    def tearDown(self):
+        profiling.disable()
+        profiling.reset()
+
+    def test_disabled_records_nothing(self):
+        self.assertFalse(profiling.is_enabled())
+        self.assertIs(span('a'), span('b'))
+        with span('a'):
+            pass
+        self.assertEqual(work(2), 4)
+        self.assertEqual(get_histograms(), {})
+
+    def test_enabled_records_spans_and_calls(self):
+        profiling.enable()
+        with span('block'):
+            pass
+        for i in range(3):
+            work(i)
+        with self.assertRaises(ZeroDivisionError):
+            with span('block'):
+                1 / 0
+        histograms = get_histograms()
+        self.assertEqual(histograms['work'].count, 3)
+        self.assertEqual(histograms['block'].count, 2)
+        self.assertEqual(work.__name__, 'work')
+
+    def test_histogram_buckets(self):
+        h = SpanHistogram('x')
+        for seconds in (0.0000005, 0.000003, 0.000004, 0.001, 0.5):
+            h.add(seconds)
+        # ≤1us, ≤4us (两次), ≤1024us, ≤2^19us
+        self.assertEqual(h.buckets, {0: 1, 2: 2, 10: 1, 19: 1})
+        self.assertEqual(h.percentile(50), 0.000004)
+        self.assertEqual(h.percentile(100), 0.5)
+        text = format_histograms({'x': h})
+        self.assertIn('x: 5 次', text)
+        self.assertIn('#', text)
+
+    def test_instrumented_hot_paths(self):
+        from toolbox import utils
+        profiling.enable()
+        utils.parse_script_metadata(os.path.abspath(__file__))
+        self.assertIn('parse_script_metadata', get_histograms())
+
+
+class TestProfiler(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+        profiling.reset()
+
+    def test_dumps_pstats_and_histograms_on_exit(self):
+        path = os.path.join(self.tmp, 'run.prof')
+        out = io.StringIO()
+        with self.assertRaises(SystemExit):
+            with Profiler(path, stream=out):
+                self.assertTrue(profiling.is_enabled())
+                work(1)
+                sys.exit(0)
+        self.assertFalse(profiling.is_enabled())
+        self.assertIn('work', pstats.Stats(path).stats.__repr__())
+        with open(f'{path}.spans.txt', encoding='utf-8') as f:
+            self.assertIn('work: 1 次', f.read())
+        self.assertIn('cumulative', out.getvalue())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,165 @@
+import io
+import os
+import sys
+import json
+import shutil
+import tempfile
+import threading
+import unittest
+from contextlib import redirect_stdout, redirect_stderr
+from unittest.mock import patch
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+
+# 添加模块路径
+_scripts_python_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'scripts', 'python')
+if _scripts_python_dir not in sys.path:
+    sys.path.insert(0, _scripts_python_dir)
+from toolbox.releases import ReleaseError, ReleaseResolver, find_assets
+from toolbox.cli import release_info
+
+
+RELEASE = {
+    'tag_name': '2.4.13',
+    'assets': [
+        {'name': 'wsl.2.4.13.0.arm64.msi', 'browser_download_url': 'https://example.test/wsl.arm64.msi'},
+        {'name': 'wsl.2.4.13.0.x64.msi', 'browser_download_url': 'https://example.test/wsl.x64.msi'},
+    ],
+}
+
+
+class MockGitHubHandler(BaseHTTPRequestHandler):
+    """模拟 GitHub Releases API：按 ETag 返回 304，status 非 200 时模拟速率限制等错误"""
+
+    def do_GET(self):
+        server = self.server
+        server.requests.append((self.path, self.headers.get('If-None-Match'), self.headers.get('Authorization')))
+        body = json.dumps(server.release).encode('utf-8')
+        etag = f'"v{server.version}"'
+        if server.status != 200:
+            self.send_error(server.status)
+        elif self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.end_headers()
+        else:
+            self.send_response(200)
+            self.send_header('ETag', etag)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestReleaseResolver(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), MockGitHubHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.requests = []
+        self.httpd.release = RELEASE
+        self.httpd.version = 1
+        self.httpd.status = 200
+        threading.Thread(target=self.httpd.serve_forever, kwargs={'poll_interval': 0.05}, daemon=True).start()
+        self.api = f'http://127.0.0.1:{self.httpd.server_address[1]}'
+        self.now = 1000.0
+
+    def tearDown(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        shutil.rmtree(self.tmp)
+
+    def resolver(self, **kwargs):
+        kwargs.setdefault('ttl', 60)
+        return ReleaseResolver(os.path.join(self.tmp, 'releases'), api_base=self.api,
+                               clock=lambda: self.now, **kwargs)
+
+    def test_fresh_cache_skips_request(self):
+        self.assertEqual(self.resolver().latest('microsoft', 'WSL'), RELEASE)
+        self.assertEqual(self.httpd.requests[0][:2], ('/repos/microsoft/WSL/releases/latest', None))
+        # 新实例读取磁盘缓存
+        resolver = self.resolver()
+        self.now += 30
+        self.assertEqual(resolver.latest('microsoft', 'WSL'), RELEASE)
+        self.assertEqual(resolver.last_source, 'fresh')
+        self.assertEqual(len(self.httpd.requests), 1)
+
+    def test_expired_cache_revalidated_with_etag(self):
+        resolver = self.resolver()
+        resolver.latest('microsoft', 'WSL')
+        self.now += 120
+        self.assertEqual(resolver.latest('microsoft', 'WSL'), RELEASE)
+        self.assertEqual(resolver.last_source, 'revalidated')
+        self.assertEqual(self.httpd.requests[-1][1], '"v1"')
+        # 304 刷新了时间戳，有效期内不再请求
+        self.now += 30
+        resolver.latest('microsoft', 'WSL')
+        self.assertEqual(len(self.httpd.requests), 2)
+
+    def test_changed_release_replaces_cache(self):
+        resolver = self.resolver()
+        resolver.latest('microsoft', 'WSL')
+        self.httpd.release = dict(RELEASE, tag_name='2.5.0')
+        self.httpd.version = 2
+        self.now += 120
+        self.assertEqual(resolver.latest('microsoft', 'WSL')['tag_name'], '2.5.0')
+        self.assertEqual(resolver.last_source, 'network')
+
+    def test_rate_limit_serves_stale(self):
+        resolver = self.resolver()
+        resolver.latest('microsoft', 'WSL')
+        self.httpd.status = 403
+        self.now += 3600
+        with redirect_stderr(io.StringIO()):
+            self.assertEqual(resolver.latest('microsoft', 'WSL'), RELEASE)
+        self.assertEqual(resolver.last_source, 'stale')
+
+    def test_error_without_cache_raises(self):
+        self.httpd.status = 403
+        with self.assertRaises(ReleaseError):
+            self.resolver().latest('microsoft', 'WSL')
+
+    def test_offline_uses_stale_cache_only(self):
+        self.resolver().latest('microsoft', 'WSL')
+        self.now += 3600
+        offline = self.resolver(offline=True)
+        self.assertEqual(offline.latest('microsoft', 'WSL'), RELEASE)
+        self.assertEqual(len(self.httpd.requests), 1)
+        with self.assertRaises(ReleaseError):
+            offline.latest('PowerShell', 'PowerShell')
+
+    def test_token_sent_as_authorization(self):
+        self.resolver(token='secret').latest('microsoft', 'WSL')
+        self.assertEqual(self.httpd.requests[0][2], 'Bearer secret')
+
+    def test_find_assets(self):
+        self.assertEqual([a['name'] for a in find_assets(RELEASE, r'x64\.MSI$')], ['wsl.2.4.13.0.x64.msi'])
+        self.assertEqual(find_assets(RELEASE, 'aarch64'), [])
+
+    def test_release_info_cli(self):
+        env = {'TOOLBOX_GITHUB_API': self.api}
+        with patch.dict(os.environ, env), patch('toolbox.releases.get_cache_dir', return_value=self.tmp):
+            out = io.StringIO()
+            with redirect_stdout(out):
+                self.assertEqual(release_info('microsoft/WSL', r'x64\.msi$'), 0)
+            self.assertEqual(out.getvalue().strip(), 'https://example.test/wsl.x64.msi')
+
+            out = io.StringIO()
+            with redirect_stdout(out):
+                self.assertEqual(release_info('microsoft/WSL', offline=True), 0)
+            self.assertEqual(json.loads(out.getvalue()), RELEASE)
+            self.assertEqual(len(self.httpd.requests), 1)
+
+            with redirect_stderr(io.StringIO()) as err:
+                self.assertEqual(release_info('microsoft/WSL', 'riscv'), 1)
+                self.assertEqual(release_info('WSL'), 1)
+                self.assertEqual(release_info('microsoft/WSL', 'x64(.msi'), 1)
+            self.assertIn('无效的正则表达式 x64(.msi', err.getvalue())
+            self.assertEqual(len(self.httpd.requests), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,172 @@
+import os
+import sys
+import json
+import shutil
+import tempfile
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+
+# 添加模块路径
+_scripts_python_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'scripts', 'python')
+if _scripts_python_dir not in sys.path:
+    sys.path.insert(0, _scripts_python_dir)
+from toolbox.metadata import NO_DIRECTIVES
+from toolbox.result_cache import (
+    DEFAULT_TTL, ResultCache, cache_key, get_result_cache_path, open_result_cache, run_probe,
+)
+from fake_clock import FakeClock
+
+
+class FakeProbe:
+    """记录调用次数、返回预设结果的探测函数"""
+
+    def __init__(self, result=True):
+        self.result = result
+        self.calls = []
+
+    def __call__(self, probe):
+        self.calls.append(probe)
+        return self.result
+
+
+class TestResultCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.script = os.path.join(self.tmp, 'Enable-Thing.ps1')
+        self.write_script('# Thing\n')
+        self.path = os.path.join(self.tmp, 'cache', 'results.json')
+        self.probe = FakeProbe()
+        self.clock = FakeClock(1_000_000.0)
+        self.cache = ResultCache(self.path, probe_runner=self.probe, clock=self.clock)
+        self.directives = NO_DIRECTIVES._replace(probe='Test-Thing')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def write_script(self, body):
+        with open(self.script, 'w', encoding='utf-8') as f:
+            f.write(body)
+
+    def test_hit_after_success_when_probe_passes(self):
+        self.assertIsNone(self.cache.lookup(self.script, [], self.directives))
+        self.assertEqual(self.probe.calls, [])
+        self.cache.record(self.script, [], self.directives, 0)
+        hit = self.cache.lookup(self.script, [], self.directives)
+        self.assertEqual(hit.script, 'Enable-Thing.ps1')
+        self.assertEqual(hit.finished, self.clock.now)
+        self.assertEqual(hit.expires, self.clock.now + DEFAULT_TTL)
+        self.assertEqual(self.probe.calls, ['Test-Thing'])
+
+    def test_probe_failure_invalidates(self):
+        self.cache.record(self.script, [], self.directives, 0)
+        self.probe.result = False
+        self.assertIsNone(self.cache.lookup(self.script, [], self.directives))
+        self.probe.result = True
+        self.assertIsNone(self.cache.lookup(self.script, [], self.directives))
+        self.assertEqual(len(self.cache), 0)
+
+    def test_key_covers_content_args_and_probe(self):
+        self.cache.record(self.script, ['-Headless'], self.directives, 0)
+        self.assertIsNone(self.cache.lookup(self.script, [], self.directives))
+        self.assertIsNone(self.cache.lookup(self.script, ['-Headless'], self.directives._replace(probe='Other')))
+        self.assertIsNotNone(self.cache.lookup(self.script, ['-Headless'], self.directives))
+        self.write_script('# Thing v2\n')
+        self.assertIsNone(self.cache.lookup(self.script, ['-Headless'], self.directives))
+        self.assertNotEqual(cache_key(self.script, ['a b']), cache_key(self.script, ['a', 'b']))
+
+    def test_ttl(self):
+        directives = self.directives._replace(cache_ttl=60)
+        self.cache.record(self.script, [], directives, 0)
+        self.clock.now += 59
+        self.assertIsNotNone(self.cache.lookup(self.script, [], directives))
+        self.clock.now += 1
+        self.assertIsNone(self.cache.lookup(self.script, [], directives))
+        self.assertEqual(len(self.probe.calls), 1)
+
+    def test_ttl_only_without_probe(self):
+        directives = NO_DIRECTIVES._replace(cache_ttl=3600)
+        self.cache.record(self.script, [], directives, 0)
+        self.assertIsNotNone(self.cache.lookup(self.script, [], directives))
+        self.assertEqual(self.probe.calls, [])
+
+    def test_not_cacheable_without_directives(self):
+        self.cache.record(self.script, [], NO_DIRECTIVES, 0)
+        self.assertEqual(len(self.cache), 0)
+        self.assertIsNone(self.cache.lookup(self.script, [], NO_DIRECTIVES))
+
+    def test_failure_removes_entry(self):
+        self.cache.record(self.script, [], self.directives, 0)
+        self.cache.record(self.script, [], self.directives, 1)
+        self.assertIsNone(self.cache.lookup(self.script, [], self.directives))
+        self.assertEqual(self.probe.calls, [])
+
+    def test_missing_script(self):
+        os.remove(self.script)
+        self.cache.record(self.script, [], self.directives, 0)
+        self.assertIsNone(self.cache.lookup(self.script, [], self.directives))
+
+    def test_save_and_load(self):
+        self.cache.record(self.script, [], self.directives, 0)
+        self.cache.record(self.script, ['-Silent'], self.directives._replace(cache_ttl=10), 0)
+        self.clock.now += 10
+        self.assertTrue(self.cache.save())
+        loaded = ResultCache.load(self.path, probe_runner=self.probe, clock=self.clock)
+        # 过期记录在保存时移除
+        self.assertEqual(len(loaded), 1)
+        self.assertIsNotNone(loaded.lookup(self.script, [], self.directives))
+
+    def test_save_merges_other_writers(self):
+        # 命令行与守护进程各自加载同一个文件，先后保存时不丢失对方的记录和删除
+        self.cache.record(self.script, ['-A'], self.directives, 0)
+        self.cache.record(self.script, ['-B'], self.directives, 0)
+        self.assertTrue(self.cache.save())
+        cli = ResultCache.load(self.path, probe_runner=self.probe, clock=self.clock)
+        daemon = ResultCache.load(self.path, probe_runner=self.probe, clock=self.clock)
+        cli.record(self.script, ['-C'], self.directives, 0)
+        cli.record(self.script, ['-A'], self.directives, 1)
+        daemon.record(self.script, ['-D'], self.directives, 0)
+        self.assertTrue(cli.save())
+        self.assertTrue(daemon.save())
+        loaded = ResultCache.load(self.path, probe_runner=self.probe, clock=self.clock)
+        hits = {args: loaded.lookup(self.script, [args], self.directives) is not None
+                for args in ('-A', '-B', '-C', '-D')}
+        self.assertEqual(hits, {'-A': False, '-B': True, '-C': True, '-D': True})
+        # 保存后本实例也能看到其他进程的记录
+        self.assertEqual(len(daemon), 3)
+        self.assertEqual(sorted(os.listdir(os.path.dirname(self.path))), ['results.json'])
+
+    def test_concurrent_saves(self):
+        caches = [ResultCache.load(self.path, probe_runner=self.probe, clock=self.clock) for _ in range(8)]
+        for i, cache in enumerate(caches):
+            cache.record(self.script, [str(i)], self.directives, 0)
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            self.assertEqual(list(pool.map(ResultCache.save, caches)), [True] * 8)
+        self.assertEqual(len(ResultCache.load(self.path)), 8)
+
+    def test_load_corrupt_or_old_version(self):
+        os.makedirs(os.path.dirname(self.path))
+        with open(self.path, 'w', encoding='utf-8') as f:
+            f.write('{broken')
+        self.assertEqual(len(ResultCache.load(self.path)), 0)
+        with open(self.path, 'w', encoding='utf-8') as f:
+            json.dump({'version': -1, 'entries': {'k': {'expires': 1e12}}}, f)
+        self.assertEqual(len(ResultCache.load(self.path)), 0)
+
+    def test_env_path_and_disable(self):
+        with patch.dict(os.environ, {'TOOLBOX_RESULT_CACHE': 'off'}):
+            self.assertIsNone(get_result_cache_path())
+            self.assertIsNone(open_result_cache())
+        with patch.dict(os.environ, {'TOOLBOX_RESULT_CACHE': self.path}):
+            self.assertEqual(open_result_cache().path, self.path)
+
+    @unittest.skipUnless(os.path.exists('/bin/sh'), '需要 /bin/sh')
+    def test_run_probe(self):
+        self.assertTrue(run_probe('exit 0'))
+        self.assertFalse(run_probe('exit 1'))
+        self.assertFalse(run_probe('sleep 5', timeout=0.2))
+
+
+if __name__ == '__main__':
+    unittest.main()
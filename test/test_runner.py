@@ -0,0 +1,268 @@
+import io
+import os
+import sys
+import time
+import signal
+import shutil
+import asyncio
+import tempfile
+import threading
+import unittest
+from unittest.mock import patch
+
+
+# 添加模块路径
+_scripts_python_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'scripts', 'python')
+if _scripts_python_dir not in sys.path:
+    sys.path.insert(0, _scripts_python_dir)
+from toolbox.runner import (
+    READ_LIMIT, TIMEOUT_EXIT_CODE, CANCELLED_EXIT_CODE, TaskRunner, cancel_on_interrupt, process_tree, run_process,
+    stop_all,
+)
+from toolbox.scheduler import DONE, FAILED, CANCELLED, TIMEOUT
+from toolbox.batch import SKIPPED, run_batch
+
+
+def alive(pid, wait=2):
+    """wait 秒内进程一直存在且不是僵尸进程 (信号送达有延迟)"""
+    deadline = time.monotonic() + wait
+    while True:
+        try:
+            with open(f'/proc/{pid}/stat', 'rb') as f:
+                if f.read().rsplit(b')', 1)[1].split()[0] == b'Z':
+                    return False
+        except OSError:
+            return False
+        if time.monotonic() >= deadline:
+            return True
+        time.sleep(0.05)
+
+
+@unittest.skipUnless(os.path.exists('/bin/sh'), '需要 /bin/sh')
+class TestRunProcess(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def sh(self, body):
+        return ['/bin/sh', '-c', body]
+
+    def run_lines(self, argv, **kwargs):
+        lines = []
+        code, status = asyncio.run(run_process(argv, lines.append, **kwargs))
+        return code, status, lines
+
+    def test_lines_and_exit_code(self):
+        code, status, lines = self.run_lines(self.sh('echo a; echo b >&2; printf tail; exit 3'))
+        self.assertEqual((code, status), (3, FAILED))
+        self.assertEqual(lines, [b'a\n', b'b\n', b'tail'])
+        self.assertEqual(self.run_lines(self.sh('true'))[:2], (0, DONE))
+
+    def test_long_line_split_into_chunks(self):
+        code, _, lines = self.run_lines(self.sh(f'head -c {READ_LIMIT * 3} /dev/zero | tr "\\0" x; echo'))
+        self.assertEqual(code, 0)
+        self.assertEqual(len(b''.join(lines)), READ_LIMIT * 3 + 1)
+        self.assertTrue(all(len(line) <= READ_LIMIT * 2 for line in lines))
+
+    def test_partial_line_flushed_when_idle(self):
+        seen = []
+        asyncio.run(run_process(self.sh('printf "prompt: "; sleep 1; echo done'),
+                                lambda line: seen.append((time.perf_counter(), line))))
+        self.assertEqual([line for _, line in seen], [b'prompt: ', b'done\n'])
+        self.assertGreater(seen[1][0] - seen[0][0], 0.5)
+
+    def test_timeout_escalates_to_kill(self):
+        start = time.perf_counter()
+        code, status, lines = self.run_lines(self.sh("trap '' TERM; echo started; exec sleep 10"),
+                                             timeout=0.5, kill_grace=0.3)
+        self.assertEqual((code, status), (TIMEOUT_EXIT_CODE, TIMEOUT))
+        self.assertEqual(lines, [b'started\n'])
+        self.assertLess(time.perf_counter() - start, 5)
+
+    @unittest.skipUnless(os.path.isdir('/proc'), '需要 /proc')
+    def test_timeout_kills_process_tree(self):
+        # 孙进程忽略 SIGTERM，父进程收到 SIGTERM 后退出：孙进程仍需在宽限期后被强制结束
+        pids = []
+        code, status = asyncio.run(run_process(
+            self.sh("(trap '' TERM; exec sleep 30) & echo $!; wait"),
+            lambda line: pids.append(int(line)), timeout=0.5, kill_grace=0.5))
+        self.assertEqual(status, TIMEOUT)
+        self.assertEqual(len(pids), 1)
+        self.assertFalse(alive(pids[0]))
+
+    @unittest.skipUnless(os.path.isdir('/proc'), '需要 /proc')
+    def test_process_tree(self):
+        async def main():
+            process = await asyncio.create_subprocess_exec(
+                *self.sh('sleep 30 & sleep 30 & echo ready; wait'), stdout=asyncio.subprocess.PIPE)
+            await process.stdout.readline()
+            await asyncio.sleep(0.1)
+            tree = process_tree(process.pid)
+            process.kill()
+            for pid, _ in tree[1:]:
+                os.kill(pid, signal.SIGKILL)
+            await process.wait()
+            return process.pid, tree
+
+        pid, tree = asyncio.run(main())
+        self.assertEqual(tree[0][0], pid)
+        self.assertEqual(len(tree), 3)
+
+    def test_backpressure_blocks_child(self):
+        marker = os.path.join(self.tmp, 'written')
+        release = None
+        received = []
+
+        async def consume(data):
+            received.append(len(data))
+            await release.wait()
+
+        async def main():
+            nonlocal release
+            release = asyncio.Event()
+            task = asyncio.ensure_future(run_process(
+                self.sh(f'head -c 4000000 /dev/zero; touch {marker}'), consume, line_buffered=False))
+            await asyncio.sleep(1)
+            blocked = not os.path.exists(marker)
+            release.set()
+            return blocked, await task
+
+        blocked, (code, status) = asyncio.run(main())
+        self.assertTrue(blocked)
+        self.assertEqual((code, status), (0, DONE))
+        self.assertEqual(sum(received), 4000000)
+        self.assertTrue(os.path.exists(marker))
+
+    def test_cancel_terminates_child(self):
+        async def main():
+            task = asyncio.ensure_future(run_process(self.sh('exec sleep 10'), len))
+            await asyncio.sleep(0.3)
+            task.cancel()
+            await task
+
+        start = time.perf_counter()
+        with self.assertRaises(asyncio.CancelledError):
+            asyncio.run(main())
+        self.assertLess(time.perf_counter() - start, 5)
+
+
+@unittest.skipUnless(os.path.exists('/bin/sh'), '需要 /bin/sh')
+class TestTaskRunner(unittest.TestCase):
+    def test_submit_and_callbacks(self):
+        finished = []
+        lines = []
+        with TaskRunner(env=dict(os.environ, GREETING='hi')) as runner:
+            handle = runner.submit('t', ['/bin/sh', '-c', 'echo $GREETING'], lines.append, finished.append)
+            result = handle.result(10)
+        self.assertEqual(result.returncode, 0)
+        self.assertEqual(result.status, DONE)
+        self.assertEqual(finished, [result])
+        self.assertEqual(lines, [b'hi\n'])
+
+    def test_cancel_running_task(self):
+        with TaskRunner() as runner:
+            handle = runner.submit('t', ['/bin/sh', '-c', 'exec sleep 10'])
+            time.sleep(0.3)
+            handle.cancel()
+            result = handle.result(5)
+        self.assertEqual((result.returncode, result.status), (CANCELLED_EXIT_CODE, CANCELLED))
+
+    def test_launch_failure(self):
+        lines = []
+        with TaskRunner() as runner:
+            result = runner.submit('t', [os.path.join(tempfile.gettempdir(), 'no-such-binary')], lines.append).result(5)
+        self.assertEqual((result.returncode, result.status), (1, FAILED))
+        self.assertIn(b'[ERROR]', lines[0])
+
+    def test_output_callback_error_fails_task_and_kills_child(self):
+        pids = []
+        finished = []
+
+        def on_output(raw):
+            pids.append(int(raw))
+            raise BrokenPipeError(32, 'Broken pipe')
+
+        with TaskRunner() as runner:
+            handle = runner.submit('t', ['/bin/sh', '-c', 'echo $$; exec sleep 30'], on_output, finished.append)
+            result = handle.result(5)
+        self.assertEqual((result.returncode, result.status), (1, FAILED))
+        self.assertEqual(finished, [result])
+        self.assertFalse(alive(pids[0]))
+
+    def test_stop_all_shares_deadline_and_kills_stragglers(self):
+        # 子进程忽略 SIGTERM，且单个任务的宽限期远长于共同期限
+        runner = TaskRunner(kill_grace=30)
+        handles = [runner.submit(f't{i}', ['/bin/sh', '-c', "trap '' TERM; echo up; exec sleep 30"])
+                   for i in range(4)]
+        time.sleep(0.3)
+        start = time.perf_counter()
+        self.assertFalse(stop_all(handles, timeout=0.5))
+        self.assertLess(time.perf_counter() - start, 3)
+        self.assertEqual([h.result(0).status for h in handles], [CANCELLED] * 4)
+        runner.close()
+
+    def test_close_cancels_running_tasks(self):
+        runner = TaskRunner()
+        handles = [runner.submit(f't{i}', ['/bin/sh', '-c', 'exec sleep 10']) for i in range(3)]
+        time.sleep(0.3)
+        start = time.perf_counter()
+        runner.close()
+        self.assertLess(time.perf_counter() - start, 5)
+        self.assertEqual([h.result(0).status for h in handles], [CANCELLED] * 3)
+        with self.assertRaises(Exception):
+            runner.submit('late', ['/bin/sh', '-c', 'true'])
+
+
+@unittest.skipUnless(os.path.exists('/bin/sh'), '需要 /bin/sh')
+class TestRunBatchOnRunner(unittest.TestCase):
+    def test_prefixed_output_timeout_and_order(self):
+        out = io.StringIO()
+        commands = [
+            ('slow', ['/bin/sh', '-c', 'echo begin; exec sleep 10']),
+            ('ok', ['/bin/sh', '-c', 'echo fine']),
+        ]
+        results = run_batch(commands, jobs=2, stream=out, timeout=0.5)
+        self.assertEqual([(r.name, r.returncode) for r in results], [('slow', TIMEOUT_EXIT_CODE), ('ok', 0)])
+        lines = out.getvalue().splitlines()
+        self.assertIn('[slow] begin', lines)
+        self.assertIn('[ok  ] fine', lines)
+        self.assertIn('[slow] [TIMEOUT] 运行超过 0.5 秒，已终止', lines)
+
+    def test_fail_fast_skips_pending(self):
+        commands = [(f's{i}', ['/bin/sh', '-c', f'exit {i}']) for i in range(1, 4)]
+        results = run_batch(commands, jobs=1, stream=io.StringIO(), fail_fast=True)
+        self.assertEqual([r.returncode for r in results], [1, SKIPPED, SKIPPED])
+
+    def test_broken_output_stream_does_not_hang(self):
+        class BrokenStream(io.StringIO):
+            def write(self, text):
+                raise BrokenPipeError(32, 'Broken pipe')
+
+        commands = [(f's{i}', ['/bin/sh', '-c', 'echo x; exec sleep 30']) for i in range(3)]
+        start = time.perf_counter()
+        results = run_batch(commands, jobs=2, stream=BrokenStream())
+        self.assertLess(time.perf_counter() - start, 10)
+        self.assertEqual([r.returncode for r in results], [1, 1, 1])
+
+    @unittest.skipUnless(hasattr(signal, 'pthread_kill'), '需要 pthread_kill')
+    def test_ctrl_c_cancels_and_skips_rest(self):
+        commands = [('a', ['/bin/sh', '-c', 'exec sleep 10']), ('b', ['/bin/sh', '-c', 'echo b'])]
+        out = io.StringIO()
+        timer = threading.Timer(0.5, signal.pthread_kill, (threading.main_thread().ident, signal.SIGINT))
+        with TaskRunner() as runner, patch('sys.stderr', io.StringIO()) as err:
+            with cancel_on_interrupt(runner) as interrupted:
+                timer.start()
+                start = time.perf_counter()
+                results = run_batch(commands, jobs=1, stream=out, runner=runner)
+        self.assertTrue(interrupted.is_set())
+        self.assertIn('正在取消', err.getvalue())
+        self.assertLess(time.perf_counter() - start, 5)
+        self.assertEqual([r.returncode for r in results], [CANCELLED_EXIT_CODE, SKIPPED])
+        self.assertIn('[a] [CANCELLED] 已取消', out.getvalue().splitlines())
+        self.assertIs(signal.getsignal(signal.SIGINT), signal.default_int_handler)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,104 @@
+import os
+import sys
+import unittest
+
+
+# 添加模块路径
+_scripts_python_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'scripts', 'python')
+if _scripts_python_dir not in sys.path:
+    sys.path.insert(0, _scripts_python_dir)
+from toolbox.scheduler import TaskScheduler, QUEUED, RUNNING, DONE, FAILED, CANCELLED
+from fake_clock import FakeClock
+
+
+class TestTaskScheduler(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.started = []
+        self.scheduler = TaskScheduler(2, on_start=lambda t: self.started.append(t.key), clock=self.clock)
+
+    def test_respects_max_parallel_fifo(self):
+        for key in "abcd":
+            self.scheduler.submit(key)
+        self.assertEqual(self.started, ["a", "b"])
+        self.assertEqual([t.key for t in self.scheduler.queued()], ["c", "d"])
+        self.scheduler.finish("a", True)
+        self.assertEqual(self.started, ["a", "b", "c"])
+        self.assertEqual(len(self.scheduler.running()), 2)
+
+    def test_priority_order(self):
+        self.scheduler.set_max_parallel(1)
+        self.scheduler.submit("first")
+        self.scheduler.submit("low", priority=-1)
+        self.scheduler.submit("normal")
+        self.scheduler.submit("high", priority=5)
+        for _ in range(3):
+            self.scheduler.finish(self.started[-1], True)
+        self.assertEqual(self.started, ["first", "high", "normal", "low"])
+
+    def test_states_and_timing(self):
+        states = []
+        self.scheduler.on_state = lambda t: states.append((t.key, t.state))
+        self.scheduler.set_max_parallel(1)
+        a = self.scheduler.submit("a")
+        b = self.scheduler.submit("b")
+        self.clock.now = 3.0
+        self.scheduler.finish("a", False)
+        self.clock.now = 4.5
+        self.scheduler.finish("b", True)
+        self.assertEqual((a.state, b.state), (FAILED, DONE))
+        self.assertEqual(a.elapsed, 3.0)
+        self.assertEqual((b.wait_time, b.elapsed), (3.0, 1.5))
+        self.assertEqual(states, [("a", QUEUED), ("a", RUNNING), ("b", QUEUED),
+                                  ("a", FAILED), ("b", RUNNING), ("b", DONE)])
+        # 已结束的任务不再被调度器持有
+        self.assertEqual(len(self.scheduler), 0)
+        self.assertIsNone(self.scheduler.get("a"))
+
+    def test_cancel_queued_and_running(self):
+        for key in "abc":
+            self.scheduler.submit(key)
+        self.assertTrue(self.scheduler.cancel("c"))
+        self.assertTrue(self.scheduler.cancel("a"))
+        self.assertFalse(self.scheduler.cancel("missing"))
+        self.assertEqual(self.scheduler.get("a").state, RUNNING)
+        task = self.scheduler.finish("a", True)
+        self.assertEqual(task.state, CANCELLED)
+        # 已取消的排队任务不会被启动
+        self.assertEqual(self.started, ["a", "b"])
+        self.assertEqual(self.scheduler.queued(), [])
+
+    def test_cancel_all(self):
+        for key in "abcd":
+            self.scheduler.submit(key)
+        cancelled = self.scheduler.cancel_all()
+        self.assertEqual([t.key for t in cancelled], ["c", "d"])
+        self.scheduler.finish("a", True)
+        self.scheduler.finish("b", False)
+        self.assertEqual(self.started, ["a", "b"])
+        self.assertEqual(len(self.scheduler), 0)
+
+    def test_raise_max_parallel_starts_queued(self):
+        for key in "abcd":
+            self.scheduler.submit(key)
+        self.scheduler.set_max_parallel(4)
+        self.assertEqual(self.started, ["a", "b", "c", "d"])
+
+    def test_finish_inside_on_start(self):
+        # 启动失败时调用方可能在 on_start 中同步调用 finish
+        scheduler = TaskScheduler(1, on_start=lambda t: scheduler.finish(t.key, False))
+        tasks = [scheduler.submit(key) for key in "abc"]
+        self.assertEqual([t.state for t in tasks], [FAILED] * 3)
+
+    def test_invalid_arguments(self):
+        with self.assertRaises(ValueError):
+            TaskScheduler(0)
+        self.scheduler.submit("a")
+        with self.assertRaises(ValueError):
+            self.scheduler.submit("a")
+        with self.assertRaises(KeyError):
+            self.scheduler.finish("missing", True)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,112 @@
+import io
+import os
+import sys
+import json
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch
+
+
+# 添加模块路径
+_scripts_python_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'scripts', 'python')
+if _scripts_python_dir not in sys.path:
+    sys.path.insert(0, _scripts_python_dir)
+from toolbox import telemetry
+from toolbox.telemetry import (
+    OutputMeter, get_telemetry_path, percentile, read_runs, record_run, summarize_runs, format_stats,
+)
+from toolbox.batch import run_batch
+from toolbox.cli import show_stats
+from fake_clock import FakeClock
+
+
+class TestOutputMeter(unittest.TestCase):
+    def test_bytes_and_peak_rate(self):
+        clock = FakeClock()
+        meter = OutputMeter(clock=clock)
+        meter.add(100)
+        clock.now = 0.5
+        meter.add(300)
+        clock.now = 1.2
+        meter.add(50)
+        clock.now = 5.0
+        meter.add(10)
+        self.assertEqual(meter.bytes, 460)
+        self.assertEqual(meter.peak_rate, 400.0)
+
+
+class TestTelemetryLog(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp, 'telemetry', 'runs.jsonl')
+        self.env = patch.dict(os.environ, {'TOOLBOX_TELEMETRY': self.path})
+        self.env.start()
+
+    def tearDown(self):
+        self.env.stop()
+        shutil.rmtree(self.tmp)
+
+    def test_record_fields(self):
+        meter = OutputMeter()
+        meter.add(42)
+        self.assertTrue(record_run('Install-WSL2', ['powershell.exe', '-File', 'x.ps1'], 1700000000.0, 12.5, 0,
+                                   meter, queue_wait=0.25, source='batch'))
+        event, = read_runs()
+        self.assertEqual(event['script'], 'Install-WSL2')
+        self.assertEqual(event['args'], ['powershell.exe', '-File', 'x.ps1'])
+        self.assertEqual((event['duration'], event['exit_code'], event['queue_wait']), (12.5, 0, 0.25))
+        self.assertEqual((event['output_bytes'], event['peak_output_rate']), (42, 42.0))
+        self.assertEqual(event['source'], 'batch')
+        self.assertLess(event['start'], event['end'])
+
+    def test_disabled(self):
+        with patch.dict(os.environ, {'TOOLBOX_TELEMETRY': 'off'}):
+            self.assertIsNone(get_telemetry_path())
+            self.assertFalse(record_run('A', [], 0.0, 1.0, 0))
+        self.assertEqual(list(read_runs(self.path)), [])
+
+    def test_corrupt_lines_skipped_and_rotation(self):
+        record_run('A', [], 0.0, 1.0, 0)
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write('{broken\n')
+        with patch.object(telemetry, 'MAX_LOG_BYTES', 10):
+            record_run('B', [], 0.0, 2.0, 1)
+        self.assertTrue(os.path.exists(f'{self.path}.1'))
+        self.assertEqual([e['script'] for e in read_runs()], ['A', 'B'])
+
+    def test_run_batch_records_output_and_queue_wait(self):
+        script = 'import sys; sys.stdout.write("x" * 1000)'
+        commands = [(name, [sys.executable, '-c', script]) for name in ('one', 'two')]
+        results = run_batch(commands, jobs=1, stream=io.StringIO(), telemetry=True)
+        self.assertEqual([r.returncode for r in results], [0, 0])
+        events = list(read_runs())
+        self.assertEqual([e['script'] for e in events], ['one', 'two'])
+        self.assertEqual(events[0]['output_bytes'], 1000)
+        # 串行执行时第二个任务要等第一个完成
+        self.assertGreaterEqual(events[1]['queue_wait'], events[0]['duration'] - 0.01)
+
+    def test_summarize_and_show_stats(self):
+        for duration in (1, 2, 3, 4, 100):
+            record_run('Install-WSL2', [], 0.0, duration, 0)
+        record_run('Enable-UTF8Support', [], 0.0, 5.0, 2)
+        stats = summarize_runs(read_runs())
+        self.assertEqual([s.script for s in stats], ['Install-WSL2', 'Enable-UTF8Support'])
+        self.assertEqual((stats[0].runs, stats[0].p50, stats[0].p95, stats[0].max), (5, 3.0, 100.0, 100.0))
+        self.assertEqual(stats[1].failures, 1)
+        self.assertIn('Install-WSL2', format_stats(stats))
+
+        out = io.StringIO()
+        self.assertEqual(show_stats('jsonl', 'utf8', stream=out), 0)
+        self.assertEqual([json.loads(line)['script'] for line in out.getvalue().splitlines()],
+                         ['Enable-UTF8Support'])
+
+    def test_percentile(self):
+        values = list(range(1, 21))
+        self.assertEqual(percentile(values, 50), 10)
+        self.assertEqual(percentile(values, 95), 19)
+        self.assertEqual(percentile([7], 95), 7)
+
+
+if __name__ == '__main__':
+    unittest.main()
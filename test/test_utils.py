@@ -1,8 +1,11 @@
+import io
 import os 
 import sys 
 import unittest 
 import shutil 
-from unittest.mock import MagicMock,patch 
+import time
+import tempfile
+from unittest.mock import MagicMock,call,patch
 
 
 # 添加模块路径
@@ -130,6 +133,118 @@ class TestWindowsToolsUtils(unittest.TestCase):
         self.assertEqual(title, "empty")
         self.assertEqual(desc, "")
 
+    def test_parse_script_metadata_ps1_block_comment(self):
+        """测试解析PowerShell块注释（跳过.SYNOPSIS等关键字）"""
+        ps1_path = os.path.join(self.mock_scripts_dir, "block.ps1")
+        with open(ps1_path, "w", encoding="utf-8") as f:
+            f.write("<#\n.SYNOPSIS\n    块注释标题\n.DESCRIPTION\n    块注释描述\n#>\n")
+
+        title, desc = toolbox.parse_script_metadata(ps1_path)
+        self.assertEqual(title, "块注释标题")
+        self.assertEqual(desc, "块注释描述")
+
+    def test_parse_script_metadata_bat_ignores_hash(self):
+        """测试.bat脚本不把#当作注释"""
+        bat_path = os.path.join(self.mock_scripts_dir, "hash.bat")
+        with open(bat_path, "w", encoding="utf-8") as f:
+            f.write("# not a comment\n::批处理标题\n")
+
+        title, desc = toolbox.parse_script_metadata(bat_path)
+        self.assertEqual(title, "批处理标题")
+        self.assertEqual(desc, "")
+
+    def test_parse_script_metadata_bounded_read(self):
+        """测试超大单行载荷只读取有限字符"""
+        from toolbox.metadata import iter_header_lines, HEADER_MAX_CHARS
+        import io
+        payload = io.StringIO("A" * (HEADER_MAX_CHARS * 10) + "\n# late\n")
+        lines = list(iter_header_lines(payload))
+        self.assertEqual(sum(len(line) for line in lines), HEADER_MAX_CHARS)
+
+        ps1_path = os.path.join(self.mock_scripts_dir, "payload.ps1")
+        with open(ps1_path, "w", encoding="utf-8") as f:
+            f.write("$b64 = '" + "A" * (HEADER_MAX_CHARS * 10) + "'\n# 太靠后的标题\n")
+        self.assertEqual(toolbox.parse_script_metadata(ps1_path), ("payload", ""))
+
+    def test_parse_script_metadata_stops_early(self):
+        """测试找到标题和描述后立即停止读取"""
+        from toolbox.metadata import read_header_comments
+        ps1_path = os.path.join(self.mock_scripts_dir, "early.ps1")
+        with open(ps1_path, "w", encoding="utf-8") as f:
+            f.write("# 标题\n# 描述\n")
+            f.write("x\n" * 100)
+        consumed = []
+
+        def tracking(f, *args):
+            for line in f:
+                consumed.append(line)
+                yield line
+
+        with patch('toolbox.metadata.iter_header_lines', side_effect=tracking):
+            self.assertEqual(read_header_comments(ps1_path), ["标题", "描述"])
+        self.assertEqual(len(consumed), 2)
+
+    def test_parse_script_header_directives(self):
+        """测试解析头部依赖指令且不影响标题和描述"""
+        ps1_path = os.path.join(self.mock_scripts_dir, "deps.ps1")
+        with open(ps1_path, "w", encoding="utf-8") as f:
+            f.write("# 标题\n# Requires: A, B.ps1\n# 描述\n# conflicts: C # 说明\n"
+                    "# reboot-after: true\n# ----\n# requires: late\n")
+        title, desc, directives = toolbox.parse_script_header(ps1_path)
+        self.assertEqual((title, desc), ("标题", "描述"))
+        self.assertEqual(directives.requires, ("A", "B.ps1"))
+        self.assertEqual(directives.conflicts, ("C",))
+        self.assertTrue(directives.reboot_after)
+        self.assertEqual(toolbox.parse_script_metadata(ps1_path), ("标题", "描述"))
+
+    def test_parse_timeout_directive(self):
+        """测试 timeout 指令的时长单位，无法解析时视为不限制"""
+        from toolbox.metadata import parse_duration
+        self.assertEqual([parse_duration(t) for t in ("90", "90s", "30m", "1.5h", "0", "soon")],
+                         [90, 90, 1800, 5400, None, None])
+        ps1_path = os.path.join(self.mock_scripts_dir, "slow.ps1")
+        with open(ps1_path, "w", encoding="utf-8") as f:
+            f.write("# 标题\n# timeout: 20m  # 下载较慢\n# 描述\n")
+        title, desc, directives = toolbox.parse_script_header(ps1_path)
+        self.assertEqual((title, desc, directives.timeout), ("标题", "描述", 1200))
+        with open(ps1_path, "w", encoding="utf-8") as f:
+            f.write("# 标题\n# timeout: later\n")
+        self.assertIsNone(toolbox.parse_script_header(ps1_path)[2].timeout)
+
+    def test_parse_probe_directive(self):
+        """测试 probe 与 cache-ttl 指令"""
+        ps1_path = os.path.join(self.mock_scripts_dir, "probe.ps1")
+        with open(ps1_path, "w", encoding="utf-8") as f:
+            f.write("# 标题\n# probe: (Get-Thing).Enabled -eq 1\n# cache-ttl: 7d\n# 描述\n")
+        title, desc, directives = toolbox.parse_script_header(ps1_path)
+        self.assertEqual((title, desc), ("标题", "描述"))
+        self.assertEqual(directives.probe, "(Get-Thing).Enabled -eq 1")
+        self.assertEqual(directives.cache_ttl, 7 * 86400)
+
+    def test_bundled_script_directives(self):
+        """测试内置脚本的依赖声明"""
+        scripts_dir = os.path.join(os.path.dirname(self.test_dir), "scripts", "ps1")
+        wsl = toolbox.parse_script_header(os.path.join(scripts_dir, "Install-WSL2.ps1"))
+        self.assertEqual(wsl[0], "安装 WSL2")
+        self.assertTrue(wsl[2].reboot_after)
+        terminal = toolbox.parse_script_header(os.path.join(scripts_dir, "Install-WindowsTerminal.ps1"))
+        self.assertEqual(terminal[2].after, ("Install-PowerShell7",))
+        pwsh = toolbox.parse_script_header(os.path.join(scripts_dir, "Install-PowerShell7.ps1"))
+        self.assertEqual(pwsh[1], "一键安装或更新至最新稳定版 PowerShell 7")
+        self.assertTrue(pwsh[2].probe)
+
+    def test_register_comment_syntax(self):
+        """测试按扩展名注册注释语法"""
+        from toolbox.metadata import CommentSyntax, register_comment_syntax, _SYNTAX_REGISTRY
+        sh_path = os.path.join(self.mock_scripts_dir, "tool.sh")
+        with open(sh_path, "w", encoding="utf-8") as f:
+            f.write("#!/bin/sh\n// 斜杠标题\n")
+        register_comment_syntax(".SH", CommentSyntax(prefixes=("//",)))
+        try:
+            self.assertEqual(toolbox.parse_script_metadata(sh_path), ("斜杠标题", ""))
+        finally:
+            del _SYNTAX_REGISTRY[".sh"]
+
     def test_get_base_dir(self):
         """测试获取基础目录"""
         base_dir = toolbox.get_base_dir()
@@ -253,12 +368,310 @@ class TestWindowsToolsUtils(unittest.TestCase):
             titles = [s[1] for s in scripts]
             self.assertEqual(titles, sorted(titles))
 
+    def test_scan_scripts_cache_skips_unchanged(self):
+        """测试元数据缓存命中时不重新解析文件"""
+        bat_path = os.path.join(self.mock_scripts_dir, "cached.bat")
+        with open(bat_path, "w", encoding="utf-8") as f:
+            f.write("::Cached Title\n::Cached Desc\n")
+
+        with patch('toolbox.utils.get_scripts_dir', return_value=self.mock_scripts_dir), \
+                patch('toolbox.utils.get_cache_dir', return_value=self.mock_scripts_dir):
+            first = toolbox.scan_scripts()
+            with patch('toolbox.utils.parse_script_metadata') as mock_parse:
+                second = toolbox.scan_scripts()
+                mock_parse.assert_not_called()
+            self.assertEqual(first, second)
+
+    def test_scan_scripts_cache_detects_change(self):
+        """测试文件大小变化后缓存失效"""
+        bat_path = os.path.join(self.mock_scripts_dir, "changed.bat")
+        with open(bat_path, "w", encoding="utf-8") as f:
+            f.write("::Old\n")
+
+        with patch('toolbox.utils.get_scripts_dir', return_value=self.mock_scripts_dir), \
+                patch('toolbox.utils.get_cache_dir', return_value=self.mock_scripts_dir):
+            toolbox.scan_scripts()
+            with open(bat_path, "w", encoding="utf-8") as f:
+                f.write("::New Title\n")
+            scripts = toolbox.scan_scripts()
+            self.assertEqual(scripts[0][1], "New Title")
+
+    def test_scan_scripts_workers_deterministic(self):
+        """测试线程池并发解析结果与串行一致"""
+        for i in range(20):
+            with open(os.path.join(self.mock_scripts_dir, f"s{i:02d}.bat"), "w", encoding="utf-8") as f:
+                f.write(f"::Same Title\n::Desc {i}\n")
+        with open(os.path.join(self.mock_scripts_dir, "s00.ps1"), "w", encoding="utf-8") as f:
+            f.write("# Same Title\n")
+
+        with patch('toolbox.utils.get_scripts_dir', return_value=self.mock_scripts_dir):
+            serial = toolbox.scan_scripts(use_cache=False)
+            parallel = toolbox.scan_scripts(use_cache=False, workers=4)
+        self.assertEqual(serial, parallel)
+        self.assertEqual(len(parallel), 20)
+        self.assertTrue(parallel[0][0].endswith("s00.ps1"))
+
+    def test_metadata_cache_version_mismatch(self):
+        """测试缓存版本不符时整体失效"""
+        from toolbox.metadata_cache import MetadataCache
+        cache_path = os.path.join(self.mock_scripts_dir, "metadata.json")
+        cache = MetadataCache(cache_path, version=1)
+        cache.put("a.bat", 1, 2, {"title": "A", "description": ""})
+        self.assertTrue(cache.save())
+
+        self.assertIsNotNone(MetadataCache.load(cache_path, version=1).get("a.bat", 1, 2))
+        self.assertIsNone(MetadataCache.load(cache_path, version=2).get("a.bat", 1, 2))
+
     def test_run_as_admin(self):
         """测试以管理员权限运行"""
         with patch('ctypes.windll.shell32.ShellExecuteW') as mock_shell:
             toolbox.run_as_admin()
             mock_shell.assert_called_once()
 
+class TestParseArguments(unittest.TestCase):
+    def parse(self, *argv):
+        with patch('sys.argv', ['main.py', *argv]):
+            return toolbox.parse_arguments()
+
+    def assertRejected(self, *argv):
+        with patch('sys.stderr', new_callable=io.StringIO) as err, self.assertRaises(SystemExit):
+            self.parse(*argv)
+        return err.getvalue()
+
+    def test_max_parallel_range(self):
+        self.assertEqual(self.parse().max_parallel, 2)
+        self.assertEqual(self.parse('--max-parallel', '1').max_parallel, 1)
+        self.assertIn('必须大于或等于 1', self.assertRejected('--max-parallel', '0'))
+        self.assertIn('无效的整数', self.assertRejected('--max-parallel', 'x'))
+
+    def test_jobs_range(self):
+        self.assertEqual(self.parse().jobs, 1)
+        # 0 表示阶段内全部并发
+        self.assertEqual(self.parse('--jobs', '0').jobs, 0)
+        self.assertIn('必须大于或等于 0', self.assertRejected('-j', '-1'))
+
+class TestRunScriptHeadless(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = os.path.dirname(os.path.abspath(__file__))
+        self.mock_scripts_dir = os.path.join(self.test_dir, "mock_scripts_cli")
+        os.makedirs(self.mock_scripts_dir, exist_ok=True)
+        with open(os.path.join(self.mock_scripts_dir, "Install-Thing.ps1"), "w", encoding="utf-8") as f:
+            f.write("# Thing\n")
+        self.cache_path = os.path.join(self.mock_scripts_dir, "cache", "results.json")
+        self.telemetry = patch.dict(os.environ, {'TOOLBOX_TELEMETRY': 'off', 'TOOLBOX_RESULT_CACHE': self.cache_path})
+        self.telemetry.start()
+
+    def tearDown(self):
+        self.telemetry.stop()
+        shutil.rmtree(self.mock_scripts_dir)
+        toolbox.cleanup_tmp_dir()
+
+    def test_run_found_without_parsing(self):
+        """测试 --run 通过名称索引定位脚本且不解析元数据"""
+        with patch('toolbox.cli.get_scripts_dir', return_value=self.mock_scripts_dir), \
+                patch('toolbox.utils.parse_script_metadata') as mock_parse, \
+                patch('toolbox.cli.run_batch') as mock_batch:
+            mock_batch.return_value = [toolbox.BatchResult("Install-Thing", 0, 1.0)]
+            self.assertEqual(toolbox.run_script_headless("install-thing", silent=True, timeout=60), 0)
+            mock_parse.assert_not_called()
+            name, command = mock_batch.call_args[0][0][0]
+            self.assertEqual(name, "Install-Thing")
+            self.assertIn(os.path.join(self.mock_scripts_dir, "Install-Thing.ps1"), command)
+            self.assertEqual(mock_batch.call_args[1]['timeout'], 60)
+            self.assertEqual(mock_batch.call_args[1]['source'], 'cli')
+
+    def test_run_single_script_parses_once(self):
+        """测试 --run 单个脚本时只构建一次名称索引、只解析一次脚本头部"""
+        self._write_script("Install-Thing.ps1", "# Thing\n# timeout: 5m\n")
+        with patch('toolbox.cli.get_scripts_dir', return_value=self.mock_scripts_dir), \
+                patch('toolbox.cli.build_name_index', wraps=toolbox.cli.build_name_index) as mock_index, \
+                patch('toolbox.cli.parse_script_header', wraps=toolbox.cli.parse_script_header) as mock_header, \
+                patch('toolbox.cli.run_batch') as mock_batch:
+            mock_batch.return_value = [toolbox.BatchResult("Install-Thing", 0, 1.0)]
+            self.assertEqual(toolbox.run_scripts_batch(["install-thing"], silent=True), 0)
+            self.assertEqual((mock_index.call_count, mock_header.call_count), (1, 1))
+            self.assertEqual(mock_batch.call_args[1]['timeout'], 300)
+            self.assertEqual(mock_batch.call_args[1]['source'], 'cli')
+
+    def test_run_missing_suggests(self):
+        """测试未找到脚本时给出建议"""
+        with patch('toolbox.cli.get_scripts_dir', return_value=self.mock_scripts_dir), \
+                patch('builtins.print') as mock_print:
+            self.assertEqual(toolbox.run_script_headless("Install-Thin"), 1)
+            printed = " ".join(str(c.args[0]) for c in mock_print.call_args_list)
+            self.assertIn("Install-Thing", printed)
+
+    def test_run_batch_resolves_all_first(self):
+        """测试批量运行时任一脚本不存在则不运行任何脚本"""
+        with patch('toolbox.cli.get_scripts_dir', return_value=self.mock_scripts_dir), \
+                patch('toolbox.cli.run_batch') as mock_batch, \
+                patch('builtins.print'):
+            self.assertEqual(toolbox.run_scripts_batch(["install-thing", "missing"]), 1)
+            mock_batch.assert_not_called()
+
+    def _write_script(self, name, header):
+        with open(os.path.join(self.mock_scripts_dir, name), "w", encoding="utf-8") as f:
+            f.write(header)
+
+    def test_run_batch(self):
+        """测试批量运行构建命令并返回聚合退出码"""
+        self._write_script("Install-Other.ps1", "# Other\n")
+        with patch('toolbox.cli.get_scripts_dir', return_value=self.mock_scripts_dir), \
+                patch('toolbox.cli.run_batch') as mock_batch, \
+                patch('builtins.print'):
+            mock_batch.return_value = [toolbox.BatchResult("Install-Thing", 0, 1.0),
+                                       toolbox.BatchResult("Install-Other", 4, 1.0)]
+            code = toolbox.run_scripts_batch(["install-thing", "Install-Other"], jobs=2, headless=True)
+            self.assertEqual(code, 4)
+            commands = mock_batch.call_args[0][0]
+            self.assertEqual([name for name, _ in commands], ["Install-Thing", "Install-Other"])
+            self.assertIn("-Headless", commands[0][1])
+            self.assertEqual(mock_batch.call_args[1]["jobs"], 2)
+
+    def test_run_batch_stages_and_skips_dependents(self):
+        """测试按依赖分阶段运行，依赖失败时跳过后续脚本"""
+        self._write_script("Install-Thing.ps1", "# Thing\n# requires: Install-Base\n")
+        self._write_script("Install-Base.ps1", "# Base\n")
+        self._write_script("Install-Other.ps1", "# Other\n")
+        calls = []
+
+        def fake_batch(commands, **kwargs):
+            calls.append(([name for name, _ in commands], kwargs["jobs"]))
+            return [toolbox.BatchResult(name, 1 if name == "Install-Base" else 0, 0.1) for name, _ in commands]
+
+        with patch('toolbox.cli.get_scripts_dir', return_value=self.mock_scripts_dir), \
+                patch('toolbox.cli.run_batch', side_effect=fake_batch), \
+                patch('builtins.print') as mock_print:
+            code = toolbox.run_scripts_batch(["Install-Thing", "Install-Other"], jobs=0)
+        self.assertEqual(code, 1)
+        self.assertEqual(calls, [(["Install-Other", "Install-Base"], 2)])
+        printed = " ".join(str(c.args[0]) for c in mock_print.call_args_list)
+        self.assertIn("跳过", printed)
+
+    def test_run_batch_host_executor(self):
+        """测试 --executor host 时把 ScriptJob 交给常驻工作进程池并在结束后关闭"""
+        self._write_script("Install-Other.ps1", "# Other\n")
+        with patch('toolbox.cli.get_scripts_dir', return_value=self.mock_scripts_dir), \
+                patch('toolbox.cli.create_executor') as mock_create, \
+                patch('toolbox.cli.run_batch') as mock_batch, \
+                patch('builtins.print'):
+            mock_batch.return_value = [toolbox.BatchResult("Install-Thing", 0, 1.0),
+                                       toolbox.BatchResult("Install-Other", 0, 1.0)]
+            code = toolbox.run_scripts_batch(["install-thing", "Install-Other"], jobs=2, headless=True,
+                                             executor='host', max_jobs=5)
+        self.assertEqual(code, 0)
+        self.assertEqual(mock_create.call_args[0][0], 'host')
+        self.assertEqual(mock_create.call_args[1], {'size': 2, 'max_jobs': 5})
+        commands = mock_batch.call_args[0][0]
+        self.assertEqual(commands[0][1], toolbox.ScriptJob(os.path.join(self.mock_scripts_dir, "Install-Thing.ps1"),
+                                                           ['-Headless']))
+        self.assertIs(mock_batch.call_args[1]['executor'], mock_create.return_value)
+        mock_create.return_value.close.assert_called_once()
+
+    def test_plan_dry_run(self):
+        """测试 --plan 只打印执行计划"""
+        self._write_script("Install-Thing.ps1", "# Thing\n# requires: Install-Base\n")
+        self._write_script("Install-Base.ps1", "# Base\n# reboot-after: no\n")
+        with patch('toolbox.cli.get_scripts_dir', return_value=self.mock_scripts_dir), \
+                patch('toolbox.cli.run_batch') as mock_batch, \
+                patch('builtins.print') as mock_print:
+            self.assertEqual(toolbox.run_scripts_batch(["install-thing"], dry_run=True), 0)
+            mock_batch.assert_not_called()
+        printed = mock_print.call_args[0][0]
+        self.assertIn("阶段 1", printed)
+        self.assertIn("Install-Base (依赖，自动加入)", printed)
+        self.assertIn("Install-Thing <- Install-Base", printed)
+
+    def test_plan_error(self):
+        """测试依赖缺失时报错且不运行"""
+        self._write_script("Install-Thing.ps1", "# Thing\n# requires: Install-Missing\n")
+        with patch('toolbox.cli.get_scripts_dir', return_value=self.mock_scripts_dir), \
+                patch('toolbox.cli.run_batch') as mock_batch, \
+                patch('builtins.print'):
+            self.assertEqual(toolbox.run_scripts_batch(["install-thing"]), 1)
+            mock_batch.assert_not_called()
+
+    def _cache(self, probe_result=True):
+        probe = MagicMock(return_value=probe_result)
+        return patch('toolbox.cli.open_result_cache',
+                     side_effect=lambda: toolbox.ResultCache.load(self.cache_path, probe_runner=probe)), probe
+
+    def test_run_result_cache(self):
+        """测试成功结果被缓存，探测通过时跳过运行，--force 和探测失败时照常运行"""
+        self._write_script("Install-Thing.ps1", "# Thing\n# probe: Test-Thing\n")
+        patch_cache, probe = self._cache()
+        with patch('toolbox.cli.get_scripts_dir', return_value=self.mock_scripts_dir), patch_cache, \
+                patch('toolbox.cli.run_batch') as mock_batch, \
+                patch('builtins.print') as mock_print:
+            mock_batch.return_value = [toolbox.BatchResult("Install-Thing", 0, 1.0)]
+            self.assertEqual(toolbox.run_script_headless("install-thing", silent=True), 0)
+            self.assertEqual(mock_batch.call_count, 1)
+            probe.assert_not_called()
+
+            self.assertEqual(toolbox.run_script_headless("install-thing", silent=True), 0)
+            self.assertEqual(mock_batch.call_count, 1)
+            probe.assert_called_once_with("Test-Thing")
+            self.assertIn("目标状态已满足", mock_print.call_args[0][0])
+
+            # 缓存键不含 -Force：强制运行后照常命中
+            self.assertEqual(toolbox.run_script_headless("install-thing", silent=True, force=True), 0)
+            self.assertEqual(mock_batch.call_count, 2)
+            self.assertIn("-Force", mock_batch.call_args[0][0][0][1])
+            self.assertEqual(toolbox.run_script_headless("install-thing", silent=True), 0)
+            self.assertEqual(mock_batch.call_count, 2)
+
+            # 参数不同视为不同的运行
+            self.assertEqual(toolbox.run_script_headless("install-thing", silent=True, headless=True), 0)
+            self.assertEqual(mock_batch.call_count, 3)
+
+            probe.return_value = False
+            self.assertEqual(toolbox.run_script_headless("install-thing", silent=True), 0)
+            self.assertEqual(mock_batch.call_count, 4)
+
+    def test_run_batch_result_cache(self):
+        """测试批量运行时跳过已满足的脚本，依赖它的脚本照常运行且失败结果不被缓存"""
+        self._write_script("Install-Thing.ps1", "# Thing\n# requires: Install-Base\n# probe: Test-Thing\n")
+        self._write_script("Install-Base.ps1", "# Base\n# probe: Test-Base\n")
+        calls = []
+
+        def fake_batch(commands, **kwargs):
+            calls.append([name for name, _ in commands])
+            return [toolbox.BatchResult(name, 5 if name == "Install-Thing" else 0, 0.1) for name, _ in commands]
+
+        patch_cache, probe = self._cache()
+        with patch('toolbox.cli.get_scripts_dir', return_value=self.mock_scripts_dir), patch_cache, \
+                patch('toolbox.cli.run_batch', side_effect=fake_batch), \
+                patch('builtins.print') as mock_print:
+            self.assertEqual(toolbox.run_scripts_batch(["install-thing"], jobs=2), 5)
+            self.assertEqual(calls, [["Install-Base"], ["Install-Thing"]])
+            self.assertEqual(toolbox.run_scripts_batch(["install-thing"], jobs=2), 5)
+            self.assertEqual(calls[2:], [["Install-Thing"]])
+            self.assertEqual(probe.call_args_list, [call("Test-Base")])
+        printed = " ".join(str(c.args[0]) for c in mock_print.call_args_list)
+        self.assertIn("[Install-Base] [缓存]", printed)
+
+    def test_run_batch_cached_skips_reboot(self):
+        """测试需要重启的脚本命中缓存时不再重启"""
+        self._write_script("Install-Thing.ps1", "# Thing\n# probe: Test-Thing\n# reboot-after: true\n")
+        self._write_script("Restart-System.ps1", "# Restart\n")
+        patch_cache, _ = self._cache()
+        with patch('toolbox.cli.get_scripts_dir', return_value=self.mock_scripts_dir), patch_cache, \
+                patch('toolbox.cli.run_batch') as mock_batch, \
+                patch('builtins.print') as mock_print:
+            mock_batch.return_value = [toolbox.BatchResult("Install-Thing", 0, 1.0)]
+            self.assertEqual(toolbox.run_scripts_batch(["install-thing"]), 0)
+            self.assertEqual([c.args[0][0][0] for c in mock_batch.call_args_list], ["Install-Thing", "Restart-System"])
+            self.assertEqual(toolbox.run_scripts_batch(["install-thing"]), 0)
+            self.assertEqual(mock_batch.call_count, 2)
+        self.assertIn("已跳过重启", mock_print.call_args[0][0])
+
+    def test_read_manifest(self):
+        manifest = os.path.join(self.mock_scripts_dir, "provision.txt")
+        with open(manifest, "w", encoding="utf-8") as f:
+            f.write("# 基础环境\nInstall-A\n\nInstall-B, Install-C  # 终端\n")
+        self.assertEqual(toolbox.read_manifest(manifest), ["Install-A", "Install-B", "Install-C"])
+        self.assertEqual(toolbox.split_script_names("A,,B "), ["A", "B"])
+
 _app = None
 
 def get_app():
@@ -284,6 +697,67 @@ class TestTerminalTextEdit(unittest.TestCase):
         terminal.append_text("Hello World")
         self.assertIn("Hello World", terminal.toPlainText())
 
+    def test_terminal_queue_text_batches(self):
+        terminal = toolbox.TerminalTextEdit()
+        terminal.queue_text("a")
+        terminal.queue_text("b")
+        terminal.queue_text("c", "#f38ba8")
+        self.assertEqual(terminal.toPlainText(), "")
+        self.assertEqual(len(terminal._pending), 2)
+        self.assertTrue(terminal._flush_timer.isActive())
+        terminal.flush()
+        self.assertEqual(terminal.toPlainText(), "abc")
+        self.assertFalse(terminal._flush_timer.isActive())
+
+    def test_terminal_append_text_keeps_order(self):
+        terminal = toolbox.TerminalTextEdit()
+        terminal.queue_text("queued ")
+        terminal.append_text("direct", "#a6e3a1")
+        self.assertEqual(terminal.toPlainText(), "queued direct")
+
+    def test_terminal_scrollback_limit(self):
+        terminal = toolbox.TerminalTextEdit(scrollback=10)
+        for i in range(50):
+            terminal.queue_text(f"line {i}\n")
+        terminal.flush()
+        self.assertLessEqual(terminal.document().blockCount(), 10)
+        self.assertIn("line 49", terminal.toPlainText())
+        self.assertNotIn("line 0\n", terminal.toPlainText())
+
+    def test_terminal_pending_bounded(self):
+        terminal = toolbox.TerminalTextEdit(scrollback=10)
+        with patch.object(toolbox.TerminalTextEdit, 'PENDING_MAX_CHARS', 100):
+            for i in range(100):
+                terminal.queue_text("x" * 9 + "\n")
+            terminal.queue_text("tail\n", "#f38ba8")
+        self.assertLessEqual(terminal._pending_chars, 100)
+        self.assertEqual(terminal._pending_chars, sum(len("".join(c)) for c, _ in terminal._pending))
+        terminal.flush()
+        self.assertTrue(terminal.toPlainText().rstrip().endswith("tail"))
+        self.assertEqual(terminal._pending_chars, 0)
+
+    def test_terminal_full_log_on_disk(self):
+        import tempfile
+        log_dir = tempfile.mkdtemp()
+        try:
+            terminal = toolbox.TerminalTextEdit(scrollback=5)
+            terminal.open_log(os.path.join(log_dir, "logs", "task.log"))
+            for i in range(100):
+                terminal.queue_text(f"line {i}\n")
+            log = terminal.log_text()
+            self.assertTrue(log.startswith("line 0\n"))
+            self.assertIn("line 99\n", log)
+            terminal.flush()
+            self.assertLessEqual(terminal.document().blockCount(), 5)
+            terminal.close_log()
+        finally:
+            shutil.rmtree(log_dir)
+
+    def test_terminal_format_cache(self):
+        terminal = toolbox.TerminalTextEdit()
+        self.assertIs(terminal._format("#f38ba8"), terminal._format("#f38ba8"))
+        self.assertIs(terminal._format(None), terminal._format(terminal.DEFAULT_COLOR))
+
 class TestTaskInterface(unittest.TestCase):
     @classmethod 
     def setUpClass(cls):
@@ -298,12 +772,50 @@ class TestTaskInterface(unittest.TestCase):
         self.assertEqual(task.task_id, "test_id")
         self.assertEqual(task.title, "Test Title")
 
+    def test_task_interface_start_opens_log(self):
+        task = toolbox.TaskInterface("test/id:1", "Test Title", self.mock_script)
+        with patch.object(task.runner, 'submit'):
+            task.start()
+        try:
+            self.assertTrue(task.terminal.log_path.startswith(os.path.join(toolbox.get_tmp_dir(), 'logs')))
+            self.assertIn("启动: Test Title", task.terminal.log_text())
+            task._on_finished(toolbox.TaskResult("test/id:1", 0, 0.1, 'done'))
+            self.assertIsNone(task.terminal._log_file)
+            self.assertIn("成功", task.terminal.log_text())
+        finally:
+            task.terminal.close_log()
+            toolbox.cleanup_tmp_dir()
+
     def test_task_interface_on_output_utf8(self):
         task = toolbox.TaskInterface("test_id", "Test Title", self.mock_script)
-        with patch.object(task.process, 'readAllStandardOutput') as mock_read:
-            mock_read.return_value.data.return_value = "测试输出".encode('utf-8')
-            task._on_output()
-            self.assertIn("测试输出", task.terminal.toPlainText())
+        task._on_output("测试输出".encode('utf-8'))
+        task.terminal.flush()
+        self.assertIn("测试输出", task.terminal.toPlainText())
+
+    @unittest.skipUnless(os.path.exists('/bin/sh'), '需要 /bin/sh')
+    def test_task_interface_runs_through_runner(self):
+        """测试任务经由任务运行器运行，输出和结束信号回到 GUI 线程"""
+        from PySide6.QtCore import QCoreApplication
+        runner = toolbox.TaskRunner()
+        task = toolbox.TaskInterface("sh_task", "Shell", self.mock_script, runner=runner)
+        finished = []
+        task.task_finished.connect(lambda task_id, success: finished.append(success))
+        try:
+            with patch.object(task, 'build_command', return_value=['/bin/sh', '-c', 'echo "$TOOLBOX_TMP_DIR"; exit 2']):
+                task.start()
+            deadline = time.time() + 10
+            while not finished and time.time() < deadline:
+                QCoreApplication.processEvents()
+                time.sleep(0.01)
+            self.assertEqual(finished, [False])
+            self.assertEqual(task.exit_code, 2)
+            self.assertFalse(task.is_running())
+            self.assertIn(toolbox.get_tmp_dir(), task.terminal.log_text())
+            self.assertIn("code=2", task.terminal.log_text())
+        finally:
+            runner.close()
+            task.terminal.close_log()
+            toolbox.cleanup_tmp_dir()
 
 class TestToolCard(unittest.TestCase):
     @classmethod 
@@ -326,11 +838,83 @@ class TestToolsInterface(unittest.TestCase):
             interface = toolbox.ToolsInterface()
             self.assertEqual(interface.objectName(), "ToolsInterface")
 
+    def test_tools_interface_incremental_refresh(self):
+        import tempfile
+        scripts_dir = tempfile.mkdtemp()
+        try:
+            with open(os.path.join(scripts_dir, "b.bat"), "w", encoding="utf-8") as f:
+                f.write("::B\n")
+            with patch('toolbox.utils.get_scripts_dir', return_value=scripts_dir), \
+                    patch('toolbox.utils.get_cache_dir', return_value=scripts_dir), \
+                    patch('toolbox.gui.main_window.get_scripts_dir', return_value=scripts_dir):
+                interface = toolbox.ToolsInterface()
+                model = interface.model
+
+                with open(os.path.join(scripts_dir, "a.bat"), "w", encoding="utf-8") as f:
+                    f.write("::A\n")
+                diff = interface.refresh()
+                self.assertEqual(len(diff.added), 1)
+                self.assertEqual([model.script_at(row)[1] for row in range(model.rowCount())], ["A", "B"])
+
+                os.remove(os.path.join(scripts_dir, "a.bat"))
+                interface.refresh()
+                self.assertEqual(model.paths(), [os.path.join(scripts_dir, "b.bat")])
+        finally:
+            shutil.rmtree(scripts_dir)
+
+class TestToolList(unittest.TestCase):
+    @classmethod 
+    def setUpClass(cls):
+        cls.app = get_app()
+        cls.test_dir = os.path.dirname(os.path.abspath(__file__))
+
+    def test_model_sorted_insert_remove(self):
+        from toolbox.gui.tool_list import ToolListModel
+        model = ToolListModel([("/b", "B", ""), ("/c", "C", "desc")])
+        self.assertEqual(model.insert_script("/a", "A", ""), 0)
+        self.assertEqual(model.insert_script("/bb", "B", ""), 2)
+        self.assertEqual(model.rowCount(), 4)
+        self.assertEqual(model.data(model.index(3), ToolListModel.DescriptionRole), "desc")
+        self.assertTrue(model.remove_script("/b"))
+        self.assertFalse(model.remove_script("/missing"))
+        self.assertEqual([model.script_at(r)[0] for r in range(model.rowCount())], ["/a", "/bb", "/c"])
+
+    def test_run_button_emits_task(self):
+        from PySide6.QtCore import Qt, QPoint
+        from PySide6.QtTest import QTest
+        mock_script = os.path.join(self.test_dir, "mock_script.bat")
+        with patch('toolbox.gui.main_window.scan_scripts', return_value=[(mock_script, "Mock", "Desc")]):
+            interface = toolbox.ToolsInterface()
+        interface.resize(800, 400)
+        interface.show()
+        tasks = []
+        interface.task_created.connect(tasks.append)
+
+        view = interface.view
+        index = interface.model.index(0)
+        button = view.card_delegate.button_rect(view.visualRect(index))
+        QTest.mouseClick(view.viewport(), Qt.LeftButton, pos=button.center())
+        # 点击按钮以外的区域不会创建任务
+        QTest.mouseClick(view.viewport(), Qt.LeftButton, pos=view.visualRect(index).topLeft() + QPoint(5, 5))
+        self.assertEqual(len(tasks), 1)
+        self.assertEqual(tasks[0].task_id, "Mock_1")
+        self.assertEqual(tasks[0].script_path, mock_script)
+        interface.close()
+
 class TestWindow(unittest.TestCase):
     @classmethod 
     def setUpClass(cls):
         cls.app = get_app()
 
+    def setUp(self):
+        # 与 TestRunScriptHeadless 相同：不写入真实的遥测记录；tmp/ (终端日志) 和 cache/ 放在临时目录中
+        base_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(base_dir.cleanup)
+        for p in (patch.dict(os.environ, {'TOOLBOX_TELEMETRY': 'off'}),
+                  patch('toolbox.utils.get_base_dir', return_value=base_dir.name)):
+            p.start()
+            self.addCleanup(p.stop)
+
     def test_window_creation(self):
         with patch('toolbox.gui.main_window.scan_scripts', return_value=[]):
             window = toolbox.Window()
@@ -351,18 +935,119 @@ class TestWindow(unittest.TestCase):
         with patch('toolbox.gui.main_window.scan_scripts', return_value=[]):
             window = toolbox.Window()
             task = toolbox.TaskInterface("test", "Test", mock_script)
-            from PySide6.QtCore import QProcess 
-            with patch.object(task.process, 'state', return_value=QProcess.Running):
-                with patch.object(task.process, 'terminate') as mock_terminate:
-                    with patch.object(task.process, 'waitForFinished') as mock_wait:
-                        with patch.object(task, 'start'):
-                            window._add_task(task)
-                        with patch('toolbox.gui.main_window.cleanup_tmp_dir'):
-                            from PySide6.QtGui import QCloseEvent 
-                            event = QCloseEvent()
-                            window.closeEvent(event)
-                        mock_terminate.assert_called_once()
-                        mock_wait.assert_called_once_with(2000)
+            task.handle = MagicMock()
+            with patch.object(task, 'is_running', return_value=True), \
+                    patch('toolbox.gui.main_window.stop_all') as mock_stop_all:
+                with patch.object(task, 'start'):
+                    window._add_task(task)
+                with patch('toolbox.gui.main_window.cleanup_tmp_dir'):
+                    from PySide6.QtGui import QCloseEvent 
+                    event = QCloseEvent()
+                    window.closeEvent(event)
+                mock_stop_all.assert_called_once_with([task.handle], window.SHUTDOWN_TIMEOUT)
+
+    def _sh_tasks(self, window, runner, count, body):
+        test_dir = os.path.dirname(os.path.abspath(__file__))
+        tasks = []
+        for i in range(count):
+            task = toolbox.TaskInterface(f"sh{i}", "Shell", os.path.join(test_dir, "mock_script.bat"), runner=runner)
+            task.build_command = lambda body=body: ['/bin/sh', '-c', body]
+            window._add_task(task)
+            tasks.append(task)
+        return tasks
+
+    def _wait_until(self, condition, timeout=10):
+        from PySide6.QtCore import QCoreApplication
+        deadline = time.time() + timeout
+        while not condition() and time.time() < deadline:
+            QCoreApplication.processEvents()
+            time.sleep(0.01)
+        return condition()
+
+    @unittest.skipUnless(os.path.exists('/bin/sh'), '需要 /bin/sh')
+    def test_window_close_stops_tasks_in_parallel(self):
+        """测试关闭窗口时同时终止全部任务，忽略 SIGTERM 的任务在共同期限后被强制结束"""
+        with patch('toolbox.gui.main_window.scan_scripts', return_value=[]):
+            window = toolbox.Window(max_parallel=4)
+        window.SHUTDOWN_TIMEOUT = 1
+        runner = toolbox.TaskRunner(kill_grace=30)
+        try:
+            tasks = self._sh_tasks(window, runner, 4, "trap '' TERM; echo up; exec sleep 30")
+            self.assertTrue(self._wait_until(lambda: all("up" in t.terminal.log_text() for t in tasks)))
+            start = time.perf_counter()
+            with patch('toolbox.gui.main_window.cleanup_tmp_dir'):
+                from PySide6.QtGui import QCloseEvent
+                window.closeEvent(QCloseEvent())
+            self.assertLess(time.perf_counter() - start, 3.5)
+            self.assertFalse(any(task.is_running() for task in tasks))
+        finally:
+            runner.close()
+
+    @unittest.skipUnless(os.path.exists('/bin/sh'), '需要 /bin/sh')
+    def test_window_cancel_task(self):
+        """测试取消按钮：运行中的任务被终止，排队中的任务直接移出队列"""
+        with patch('toolbox.gui.main_window.scan_scripts', return_value=[]):
+            window = toolbox.Window(max_parallel=1)
+        runner = toolbox.TaskRunner()
+        try:
+            running, queued = self._sh_tasks(window, runner, 2, "echo up; exec sleep 30")
+            self.assertEqual(queued.statusLabel.text(), "排队中...")
+            queued.cancelBtn.click()
+            self.assertEqual(queued.statusLabel.text(), "已取消")
+            self.assertFalse(queued.cancelBtn.isEnabled())
+
+            self.assertTrue(self._wait_until(lambda: "up" in running.terminal.log_text()))
+            running.cancelBtn.click()
+            self.assertTrue(self._wait_until(lambda: not window._running_tasks))
+            self.assertIn("已取消", running.statusLabel.text())
+            self.assertEqual(running.exit_code, 130)
+            self.assertIsNone(queued.handle)
+        finally:
+            runner.close()
+
+    def test_window_queues_tasks_over_limit(self):
+        test_dir = os.path.dirname(os.path.abspath(__file__))
+        mock_script = os.path.join(test_dir, "mock_script.bat")
+        with patch('toolbox.gui.main_window.scan_scripts', return_value=[]):
+            window = toolbox.Window(max_parallel=1)
+        tasks = [toolbox.TaskInterface(f"t{i}", "Test", mock_script) for i in range(3)]
+        started = []
+        for task in tasks:
+            task.start = lambda task=task: started.append(task)
+            window._add_task(task)
+        self.assertEqual(started, tasks[:1])
+        self.assertEqual(tasks[1].statusLabel.text(), "排队中...")
+
+        tasks[0].task_finished.emit("t0", True)
+        self.assertEqual(started, tasks[:2])
+        self.assertEqual(window._running_tasks, [tasks[1]])
+        self.assertIsNone(tasks[0].handle)
+
+        with patch('toolbox.gui.main_window.cleanup_tmp_dir'):
+            from PySide6.QtGui import QCloseEvent
+            window.closeEvent(QCloseEvent())
+        self.assertEqual(tasks[2].statusLabel.text(), "已取消")
+        self.assertEqual(started, tasks[:2])
+
+    def test_window_records_task_telemetry(self):
+        test_dir = os.path.dirname(os.path.abspath(__file__))
+        mock_script = os.path.join(test_dir, "mock_script.bat")
+        with patch('toolbox.gui.main_window.scan_scripts', return_value=[]):
+            window = toolbox.Window()
+        task = toolbox.TaskInterface("t", "Test", mock_script)
+        with patch.object(task.runner, 'submit'):
+            window._add_task(task)
+        task._on_output(b"hello\n")
+        with patch('toolbox.gui.main_window.record_run') as mock_record:
+            task._on_finished(toolbox.TaskResult("t", 3, 0.1, 'failed'))
+        args = mock_record.call_args
+        self.assertEqual(args[0][0], "mock_script")
+        self.assertEqual(args[0][1][-1], mock_script)
+        self.assertEqual(args[0][4], 3)
+        self.assertEqual(args[0][5].bytes, 6)
+        self.assertGreaterEqual(args[0][6], 0)
+        self.assertEqual(args[1]["source"], "gui")
+        task.terminal.close_log()
 
 class TestParseMetadataException(unittest.TestCase):
     def setUp(self):
@@ -0,0 +1,81 @@
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+
+
+# 添加模块路径
+_scripts_python_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'scripts', 'python')
+if _scripts_python_dir not in sys.path:
+    sys.path.insert(0, _scripts_python_dir)
+from toolbox.watcher import diff_snapshots, PollingWatcher
+
+
+class TestDiffSnapshots(unittest.TestCase):
+    def test_diff(self):
+        """测试新增、删除、变更的计算"""
+        old = {"a": (1, 1), "b": (1, 1), "c": (1, 1)}
+        new = {"a": (1, 1), "c": (2, 1), "d": (1, 1)}
+        diff = diff_snapshots(old, new)
+        self.assertEqual(diff.added, ["d"])
+        self.assertEqual(diff.removed, ["b"])
+        self.assertEqual(diff.changed, ["c"])
+
+    def test_no_change(self):
+        """测试快照相同时差异为空"""
+        self.assertEqual(diff_snapshots({"a": 1}, {"a": 1}), ([], [], []))
+
+
+class TestPollingWatcher(unittest.TestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self._write("keep.ps1", "# keep\n")
+        self._write("edit.ps1", "# edit\n")
+        self._write("gone.bat", "::gone\n")
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def _write(self, name, content):
+        path = os.path.join(self.root, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(content)
+        return path
+
+    def test_poll(self):
+        """测试轮询检测新增、删除和修改"""
+        watcher = PollingWatcher(self.root)
+        self.assertEqual(watcher.poll(), ([], [], []))
+
+        edited = self._write("edit.ps1", "# edited title\n")
+        added = self._write(os.path.join("sub", "new.cmd"), "::new\n")
+        os.remove(os.path.join(self.root, "gone.bat"))
+
+        diff = watcher.poll()
+        self.assertEqual(diff.added, [added])
+        self.assertEqual(diff.removed, [os.path.join(self.root, "gone.bat")])
+        self.assertEqual(diff.changed, [edited])
+        self.assertEqual(watcher.poll(), ([], [], []))
+
+    def test_shadowed_bat_becomes_visible(self):
+        """测试删除 .ps1 后同名 .bat 作为新增出现"""
+        ps1 = self._write("dual.ps1", "# dual\n")
+        bat = self._write("dual.bat", "::dual\n")
+        watcher = PollingWatcher(self.root)
+        os.remove(ps1)
+        diff = watcher.poll()
+        self.assertEqual(diff.added, [bat])
+        self.assertEqual(diff.removed, [ps1])
+
+    def test_directories(self):
+        """测试监听目录包含根目录与子目录"""
+        os.makedirs(os.path.join(self.root, "empty_sub"))
+        dirs = PollingWatcher(self.root).directories()
+        self.assertIn(os.path.abspath(self.root), dirs)
+        self.assertIn(os.path.join(os.path.abspath(self.root), "empty_sub"), dirs)
+
+
+if __name__ == "__main__":
+    unittest.main()